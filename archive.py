@@ -0,0 +1,226 @@
+import contextlib
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+import discord
+
+from idempotency import KeyedLocks
+
+ARCHIVED_PREFIX = "arquivado-"
+MAX_CHANNEL_NAME = 100
+# Discord refuses to put more channels than this in one category.
+CATEGORY_CHANNEL_LIMIT = 50
+
+RESTRICTED_OVERWRITE = discord.PermissionOverwrite(read_messages=False, send_messages=False)
+
+
+def _merged(overwrite: discord.PermissionOverwrite | None, **changes) -> discord.PermissionOverwrite:
+    allow, deny = (overwrite or discord.PermissionOverwrite()).pair()
+    merged = discord.PermissionOverwrite.from_pair(allow, deny)
+    merged.update(**changes)
+    return merged
+
+
+def _set_overwrite(overwrites: dict, target, overwrite: discord.PermissionOverwrite):
+    # Targets may be Member or Object for the same id; keep a single entry.
+    for existing in [t for t in overwrites if t.id == target.id and t is not target]:
+        del overwrites[existing]
+    overwrites[target] = overwrite
+
+
+def _member_targets(channel: discord.TextChannel) -> list:
+    """Members (or Objects standing for uncached ones) with their own overwrite on the channel.
+
+    These are the opener, the bot and anyone added with /add. Unlike
+    ``channel.members``, this does not depend on the member cache.
+    """
+    guild = channel.guild
+    return [
+        target
+        for target in channel.overwrites
+        if getattr(target, "type", None) is not discord.Role and guild.get_role(target.id) is None
+    ]
+
+
+def _overwrite_key(overwrites: dict) -> dict[int, tuple[int, int]]:
+    return {target.id: tuple(p.value for p in overwrite.pair()) for target, overwrite in overwrites.items()}
+
+
+@dataclass
+class ArchivePlan:
+    """Final state of an archived ticket, applied with a single channel.edit."""
+
+    name: str | None = None
+    category: discord.CategoryChannel | None = None
+    overwrites: dict | None = None
+    legacy_calls: int = 0
+    restricted: list[int] = field(default_factory=list)
+
+    @property
+    def edit_kwargs(self) -> dict:
+        kwargs = {}
+        if self.name is not None:
+            kwargs["name"] = self.name
+        if self.category is not None:
+            kwargs["category"] = self.category
+        if self.overwrites is not None:
+            kwargs["overwrites"] = self.overwrites
+        return kwargs
+
+    @property
+    def calls(self) -> int:
+        return 1 if self.edit_kwargs else 0
+
+
+def archived_name(channel_name: str) -> str:
+    if channel_name.startswith(ARCHIVED_PREFIX):
+        return channel_name
+    return f"{ARCHIVED_PREFIX}{channel_name}"[:MAX_CHANNEL_NAME]
+
+
+def plan_archive(
+    channel: discord.TextChannel,
+    archive_category: discord.CategoryChannel | None,
+    opener_id: int | None,
+    staff_role_ids: frozenset[int],
+) -> ArchivePlan:
+    """Compute the archived name, category and overwrite map for a ticket.
+
+    Only the parts that differ from the channel's current state end up in
+    the plan, so re-archiving an archived channel costs no REST calls.
+    """
+    guild = channel.guild
+    plan = ArchivePlan()
+
+    if archive_category is None:
+        # No archive category: lock the channel for everyone in place.
+        overwrites = dict(channel.overwrites)
+        overwrites[guild.default_role] = _merged(
+            overwrites.get(guild.default_role), read_messages=False, send_messages=False
+        )
+        plan.legacy_calls = 2  # rename + @everyone
+    else:
+        # Same result as moving with sync_permissions=True and then locking
+        # down every non-staff member other than the opener.
+        overwrites = dict(archive_category.overwrites)
+        for target in _member_targets(channel):
+            if target.id in (opener_id, guild.me.id):
+                continue
+            # Members missing from the cache (lean mode) can't be checked for
+            # staff roles, so they are locked out like any other member.
+            member = target if hasattr(target, "roles") else guild.get_member(target.id)
+            if member is not None:
+                is_staff = not staff_role_ids.isdisjoint(role.id for role in member.roles)
+                if member.bot or is_staff or member.guild_permissions.administrator:
+                    continue
+            _set_overwrite(overwrites, target, RESTRICTED_OVERWRITE)
+            plan.restricted.append(target.id)
+        overwrites[guild.default_role] = _merged(overwrites.get(guild.default_role), send_messages=False)
+        # move + rename + one set_permissions per member + @everyone
+        plan.legacy_calls = 3 + len(plan.restricted)
+
+        if channel.category_id != archive_category.id:
+            plan.category = archive_category
+
+    new_name = archived_name(channel.name)
+    if new_name != channel.name:
+        plan.name = new_name
+    if _overwrite_key(overwrites) != _overwrite_key(channel.overwrites):
+        plan.overwrites = overwrites
+
+    return plan
+
+
+class ArchiveStats:
+    """Running totals of REST calls made versus the per-call archive flow."""
+
+    def __init__(self):
+        self.closes = 0
+        self.calls = 0
+        self.legacy_calls = 0
+
+    def record(self, plan: ArchivePlan):
+        self.closes += 1
+        self.calls += plan.calls
+        self.legacy_calls += plan.legacy_calls
+
+    @property
+    def calls_saved(self) -> int:
+        return self.legacy_calls - self.calls
+
+    @property
+    def saved_per_close(self) -> float:
+        return self.calls_saved / self.closes if self.closes else 0.0
+
+
+def overflow_category_name(primary_name: str, index: int) -> str:
+    return f"{primary_name} {index + 2}"[:MAX_CHANNEL_NAME]
+
+
+class ArchiveRotation:
+    """Spreads archived tickets over the archive category and its overflow categories.
+
+    Moves in flight are counted as reservations, so concurrent closes never
+    overfill a category. When every category is full a new overflow one is
+    created, one at a time per primary archive category.
+    """
+
+    def __init__(self, limit: int = CATEGORY_CHANNEL_LIMIT):
+        self.limit = limit
+        self.overflows_created = 0
+        self._reserved: Counter[int] = Counter()
+        self._locks = KeyedLocks()
+
+    def free_slots(self, category: discord.CategoryChannel) -> int:
+        return self.limit - len(category.channels) - self._reserved[category.id]
+
+    def pick(self, categories: list[discord.CategoryChannel]) -> discord.CategoryChannel | None:
+        return next((category for category in categories if self.free_slots(category) > 0), None)
+
+    @contextlib.asynccontextmanager
+    async def reserve(
+        self,
+        key: int,
+        categories: Callable[[], list[discord.CategoryChannel]],
+        create: Callable[[int], Awaitable[discord.CategoryChannel | None]],
+    ):
+        """Yield a category with room for one more channel, held until the block exits.
+
+        ``categories()`` returns the primary archive category followed by its
+        overflows and is read under the lock for ``key``, so waiters see an
+        overflow created meanwhile. ``create(index)`` makes the next overflow
+        and may return None, in which case None is yielded (archive in place).
+        """
+        async with self._locks.hold(key):
+            current = categories()
+            category = self.pick(current)
+            if category is None:
+                category = await create(len(current) - 1)
+                if category is not None:
+                    self.overflows_created += 1
+            if category is not None:
+                self._reserved[category.id] += 1
+        try:
+            yield category
+        finally:
+            if category is not None:
+                self._reserved[category.id] -= 1
+                if self._reserved[category.id] <= 0:
+                    del self._reserved[category.id]
+
+    async def prune(
+        self,
+        key: int,
+        categories: Callable[[], list[discord.CategoryChannel]],
+        delete: Callable[[discord.CategoryChannel], Awaitable[None]],
+    ) -> list[int]:
+        """Delete trailing overflow categories left empty (e.g. after a purge); returns their ids."""
+        removed = []
+        async with self._locks.hold(key):
+            for category in reversed(categories()[1:]):
+                if category.channels or self._reserved[category.id]:
+                    break
+                await delete(category)
+                removed.append(category.id)
+        return removed
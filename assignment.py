@@ -0,0 +1,140 @@
+import heapq
+from dataclasses import dataclass, field
+from typing import Iterable
+
+
+@dataclass
+class _Staff:
+    load: int = 0
+    online: bool = False
+    # Bumped on every change; heap entries carrying an older version are stale.
+    version: int = 0
+    # Sequence number of the last ticket given to this member; among equal
+    # loads the one who waited longest goes first.
+    assigned: int = 0
+    types: set[str] = field(default_factory=set)
+
+
+class StaffAssigner:
+    """Picks the eligible staff member with the fewest open tickets.
+
+    Loads (open tickets held, across every type) are counted per guild and
+    member and updated by ``add_load`` as tickets are claimed, transferred
+    and closed. Each (guild, ticket type) pool is a heap of
+    (offline, load, last assigned, member id, version) entries. A change
+    pushes one fresh entry per pool the member is in, and stale entries are
+    dropped when they reach the top, so ``pick`` and ``add_load`` cost
+    O(log n) amortized instead of a scan over the staff. Offline members only
+    sort last when ``prefer_online`` is set.
+
+    Pools are built by the caller (``set_pool``) from the staff roles and
+    dropped with ``drop_guild`` whenever roles change; loads survive that.
+    """
+
+    def __init__(self, prefer_online: bool = False):
+        self.prefer_online = prefer_online
+        self._staff: dict[int, dict[int, _Staff]] = {}
+        self._heaps: dict[int, dict[str, list]] = {}
+        self._pool_sizes: dict[int, dict[str, int]] = {}
+        self._sequence = 0
+
+    def _member(self, guild_id: int, member_id: int) -> _Staff:
+        return self._staff.setdefault(guild_id, {}).setdefault(member_id, _Staff())
+
+    def _entry(self, member_id: int, staff: _Staff) -> tuple:
+        offline = 1 if self.prefer_online and not staff.online else 0
+        return (offline, staff.load, staff.assigned, member_id, staff.version)
+
+    def _changed(self, guild_id: int, member_id: int, staff: _Staff):
+        staff.version += 1
+        heaps = self._heaps.get(guild_id, {})
+        for ticket_type in staff.types:
+            heap = heaps[ticket_type]
+            heapq.heappush(heap, self._entry(member_id, staff))
+            # Drop stale entries once they outnumber live ones; amortized O(1) per push.
+            if len(heap) > 2 * self._pool_sizes[guild_id][ticket_type] + 16:
+                self._compact(guild_id, ticket_type)
+
+    def _compact(self, guild_id: int, ticket_type: str):
+        staff_by_id = self._staff[guild_id]
+        heap = [entry for entry in self._heaps[guild_id][ticket_type] if entry[-1] == staff_by_id[entry[3]].version]
+        heapq.heapify(heap)
+        self._heaps[guild_id][ticket_type] = heap
+
+    # ---- pools ----
+
+    def has_pool(self, guild_id: int, ticket_type: str) -> bool:
+        return ticket_type in self._heaps.get(guild_id, {})
+
+    def set_pool(self, guild_id: int, ticket_type: str, members: Iterable[tuple[int, bool]]):
+        """(Re)build the pool of a ticket type from (member id, online) pairs."""
+        for staff in self._staff.get(guild_id, {}).values():
+            staff.types.discard(ticket_type)
+        heap = []
+        for member_id, online in members:
+            staff = self._member(guild_id, member_id)
+            staff.online = online
+            staff.types.add(ticket_type)
+            heap.append(self._entry(member_id, staff))
+        heapq.heapify(heap)
+        self._heaps.setdefault(guild_id, {})[ticket_type] = heap
+        self._pool_sizes.setdefault(guild_id, {})[ticket_type] = len(heap)
+
+    def drop_guild(self, guild_id: int):
+        """Forget every pool of the guild (rebuilt on the next pick); loads are kept."""
+        self._heaps.pop(guild_id, None)
+        self._pool_sizes.pop(guild_id, None)
+        for staff in self._staff.get(guild_id, {}).values():
+            staff.types.clear()
+            staff.version += 1
+
+    def remove_member(self, guild_id: int, member_id: int):
+        staff = self._staff.get(guild_id, {}).get(member_id)
+        if staff is not None:
+            sizes = self._pool_sizes.get(guild_id, {})
+            for ticket_type in staff.types:
+                sizes[ticket_type] -= 1
+            staff.types.clear()
+            staff.version += 1
+
+    def forget_guild(self, guild_id: int):
+        self._heaps.pop(guild_id, None)
+        self._pool_sizes.pop(guild_id, None)
+        self._staff.pop(guild_id, None)
+
+    # ---- updates ----
+
+    def add_load(self, guild_id: int, member_id: int, delta: int):
+        staff = self._member(guild_id, member_id)
+        staff.load = max(0, staff.load + delta)
+        if delta > 0:
+            self._sequence += 1
+            staff.assigned = self._sequence
+        self._changed(guild_id, member_id, staff)
+
+    def set_online(self, guild_id: int, member_id: int, online: bool):
+        staff = self._staff.get(guild_id, {}).get(member_id)
+        if staff is None or staff.online == online:
+            return
+        staff.online = online
+        if self.prefer_online:
+            self._changed(guild_id, member_id, staff)
+
+    # ---- reads ----
+
+    def pick(self, guild_id: int, ticket_type: str) -> int | None:
+        """Member with the lowest load in the pool (online first if preferred), without assigning.
+
+        The caller assigns with ``add_load(+1)``, which moves the member down the heap.
+        """
+        heap = self._heaps.get(guild_id, {}).get(ticket_type)
+        if not heap:
+            return None
+        staff_by_id = self._staff[guild_id]
+        while heap:
+            member_id, version = heap[0][3], heap[0][-1]
+            staff = staff_by_id.get(member_id)
+            if staff is not None and staff.version == version and ticket_type in staff.types:
+                return member_id
+            heapq.heappop(heap)
+        return None
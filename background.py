@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from rest_scheduler import QueueFull
+
+log = logging.getLogger(__name__)
+
+
+class BackgroundWorkers:
+    """Bounded pool of asyncio workers for the slow part of interaction handlers.
+
+    ``submit`` only enqueues. A handler acknowledges the interaction, hands
+    the rest over and returns, so nothing slow can push its response past
+    Discord's 3-second window; the job reports back through followups.
+    ``submit`` raises QueueFull once ``max_queue`` jobs are waiting.
+    """
+
+    def __init__(self, workers: int = 4, max_queue: int = 200):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def full(self) -> bool:
+        return self.depth >= self.max_queue
+
+    @property
+    def backlogged(self) -> bool:
+        # A new job would wait for another one to finish first.
+        return self.depth + self.active >= self.workers
+
+    def submit(
+        self,
+        name: str,
+        factory: Callable[[], Awaitable[None]],
+        on_done: Callable[[float], None] | None = None,
+    ):
+        """Queue ``factory()``; ``on_done(seconds)`` runs when it finishes, even on error."""
+        if self.full:
+            self.rejected += 1
+            raise QueueFull(f"Background queue full ({self.depth} jobs)")
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker(), name=f"background-{i}") for i in range(self.workers)]
+        self._queue.put_nowait((name, factory, on_done, time.monotonic()))
+
+    async def _worker(self):
+        while True:
+            name, factory, on_done, queued_at = await self._queue.get()
+            self.active += 1
+            try:
+                await factory()
+                self.completed += 1
+            except Exception:
+                self.failed += 1
+                log.exception("Erro em tarefa em segundo plano", extra={"job": name})
+            finally:
+                self.active -= 1
+                self._queue.task_done()
+                if on_done is not None:
+                    on_done(time.monotonic() - queued_at)
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -0,0 +1,64 @@
+"""Tickets/second for each counter backend versus the old in-place JSON rewrite.
+
+Run from the repository root:
+
+    python benchmarks/bench_counters.py --tickets 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from counter_store import JsonCounterStore, SqliteCounterStore  # noqa: E402
+
+TYPES = ["suporte", "denúncia", "financeiro", "roleplay"]
+
+
+async def bench_legacy(path: str, n: int) -> float:
+    # What save_ticket_counters used to do: blocking full rewrite per ticket.
+    counters = {t: 0 for t in TYPES}
+    start = time.perf_counter()
+    for i in range(n):
+        counters[TYPES[i % len(TYPES)]] += 1
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(counters, f, indent=4, ensure_ascii=False)
+    return time.perf_counter() - start
+
+
+async def bench_store(store, n: int) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        await store.increment(TYPES[i % len(TYPES)])
+    await store.flush()
+    elapsed = time.perf_counter() - start
+    store.close()
+    return elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=5000)
+    args = parser.parse_args()
+    n = args.tickets
+
+    with tempfile.TemporaryDirectory() as tmp:
+        defaults = {t: 0 for t in TYPES}
+        results = {
+            "legacy json rewrite": await bench_legacy(os.path.join(tmp, "legacy.json"), n),
+            "json write-behind": await bench_store(JsonCounterStore(os.path.join(tmp, "c.json"), defaults), n),
+            "sqlite (WAL)": await bench_store(SqliteCounterStore(os.path.join(tmp, "c.db"), defaults), n),
+        }
+
+    baseline = results["legacy json rewrite"]
+    print(f"{n} tickets")
+    for name, elapsed in results.items():
+        print(f"{name:<22} {n / elapsed:>12,.0f} tickets/s   ({baseline / elapsed:.1f}x legacy)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+"""Startup time and memory of the all-intents mode versus LEAN_INTENTS.
+
+Needs a real bot token (DISCORD_TOKEN in the environment or .env) and logs
+the bot in once per mode and run. Run from the repository root:
+
+    python benchmarks/bench_startup.py --runs 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = {"all-intents": "false", "lean": "true"}
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+async def child(ready_timeout: float):
+    """Import main, log in, and report once on_ready has fired (after chunking, if any)."""
+    started = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    import main
+
+    result = {}
+
+    async def report():
+        guilds = main.bot.guilds
+        result.update(
+            ready_s=time.perf_counter() - started,
+            rss_mb=rss_mb(),
+            max_rss_mb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            guilds=len(guilds),
+            cached_members=sum(len(g.members) for g in guilds),
+        )
+        await main.bot.close()
+
+    main.bot.add_listener(report, "on_ready")
+    try:
+        await asyncio.wait_for(main.bot.start(main.TOKEN), ready_timeout)
+    finally:
+        main.counter_store.close()
+        main.ticket_records.close()
+        main.search_index.close()
+        main.sla_stats.close()
+        main.guild_configs.close()
+        if main.shard_health is not None:
+            main.shard_health.close()
+        main.transcript_exporter.close()
+    print(json.dumps(result))
+
+
+def run_mode(lean: str, timeout: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            LEAN_INTENTS=lean,
+            LOG_LEVEL="CRITICAL",
+            METRICS_ENABLED="false",
+            CHANNEL_POOL_ENABLED="false",
+            COUNTERS_FILE=os.path.join(tmp, "ticket_counters.json"),
+            COUNTERS_DB=os.path.join(tmp, "ticket_counters.db"),
+            TICKETS_DB=os.path.join(tmp, "tickets.db"),
+            GUILD_CONFIG_DB=os.path.join(tmp, "guild_config.db"),
+            SEARCH_DB=os.path.join(tmp, "search.db"),
+            SLA_STATS_FILE=os.path.join(tmp, "sla_stats.json"),
+            CLUSTER_DB=os.path.join(tmp, "cluster.db"),
+        )
+        # COMMAND_SYNC_FILE stays the bot's own: with the tree unchanged the
+        # hash check skips the global sync, as on a normal restart.
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", "--timeout", str(timeout)],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+        )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds to wait for on_ready")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(child(args.timeout))
+        return
+
+    from dotenv import load_dotenv
+
+    load_dotenv(os.path.join(ROOT, ".env"))
+    if not os.getenv("DISCORD_TOKEN"):
+        sys.exit("DISCORD_TOKEN is required: this benchmark logs the bot in.")
+
+    for name, lean in MODES.items():
+        runs = [run_mode(lean, args.timeout) for _ in range(args.runs)]
+        print(
+            f"{name:<12} ready {statistics.median(r['ready_s'] for r in runs):>7.2f} s"
+            f"   rss {statistics.median(r['rss_mb'] for r in runs):>8.1f} MB"
+            f"   peak {max(r['max_rss_mb'] for r in runs):>8.1f} MB"
+            f"   {runs[-1]['cached_members']:,} members cached in {runs[-1]['guilds']} guild(s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Throughput, latency and REST calls of the ticket flow against a fake guild.
+
+Drives main.py's handlers against in-memory stand-ins (benchmarks/fakes.py)
+that record REST calls instead of sending them. Run from the repository root:
+
+    python benchmarks/bench_tickets.py --channels 10000 --members 100000 --roles 500
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import FakeInteraction, build_guild, next_id  # noqa: E402
+from ticket_types import DEFAULT_TICKET_TYPES, env_name_for  # noqa: E402
+
+UNTHROTTLED = (1_000_000, 1.0)
+
+
+def configure_env(tmp: str) -> int:
+    """Point main.py at fake category ids and throwaway storage; returns the archive category id."""
+    archive_id = next_id()
+    os.environ.update(
+        DISCORD_TOKEN="bench",
+        LOG_LEVEL="ERROR",
+        TICKET_TYPES_FILE="",
+        ARCHIVE_CATEGORY_ID=str(archive_id),
+        COUNTERS_FILE=os.path.join(tmp, "ticket_counters.json"),
+        COUNTERS_DB=os.path.join(tmp, "ticket_counters.db"),
+        TICKETS_DB=os.path.join(tmp, "tickets.db"),
+        GUILD_CONFIG_DB=os.path.join(tmp, "guild_config.db"),
+        SEARCH_DB=os.path.join(tmp, "search.db"),
+        SLA_STATS_FILE=os.path.join(tmp, "sla_stats.json"),
+        CLUSTER_DB=os.path.join(tmp, "cluster.db"),
+        COMMAND_SYNC_FILE=os.path.join(tmp, "command_sync.json"),
+        CHANNEL_POOL_ENABLED="false",
+        # Measure the modal path, not the opening rate limits.
+        TICKET_LIMIT_USER="0",
+        TICKET_LIMIT_TYPE="0",
+        TICKET_LIMIT_GUILD="0",
+        METRICS_ENABLED="false",
+    )
+    for entry in DEFAULT_TICKET_TYPES:
+        os.environ[f"CATEGORY_{env_name_for(entry['key'])}_ID"] = str(next_id())
+    return archive_id
+
+
+class Result:
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: list[float] = []
+        self.rest_calls = 0
+        self.elapsed = 0.0
+
+    def row(self) -> str:
+        n = len(self.latencies)
+        cuts = statistics.quantiles(self.latencies, n=100, method="inclusive") if n > 1 else self.latencies * 99
+        return (
+            f"{self.name:<34} {n / self.elapsed:>10,.0f} ops/s"
+            f"   p50 {cuts[49] * 1000:>7.3f} ms   p99 {cuts[98] * 1000:>7.3f} ms"
+            f"   {self.rest_calls / n:>5.2f} REST/op"
+        )
+
+
+async def measure(name: str, guild, ops, run) -> Result:
+    """Await ``run(op)`` for every op, timing each call and counting recorded REST calls."""
+    result = Result(name)
+    guild.rest.reset()
+    start = time.perf_counter()
+    for op in ops:
+        started = time.perf_counter()
+        await run(op)
+        result.latencies.append(time.perf_counter() - started)
+    result.elapsed = time.perf_counter() - start
+    result.rest_calls = guild.rest.total
+    return result
+
+
+async def bench(main, args, archive_id: int) -> list[Result]:
+    from rest_scheduler import RestScheduler
+
+    setup_started = time.perf_counter()
+    guild, categories, _ = build_guild(
+        main.TICKET_TYPES, channels=args.channels, members=args.members, roles=args.roles,
+        archive_category_id=archive_id,
+    )
+    print(
+        f"guild: {args.channels:,} channels, {args.members:,} members, {len(guild.roles):,} roles"
+        f"   (built in {time.perf_counter() - setup_started:.1f}s)"
+    )
+
+    # Measure the bot's own work, not the Discord rate limits it would wait on.
+    main.rest = RestScheduler(
+        workers=main.rest.workers, max_queue=args.ops * 10,
+        route_limits={kind: UNTHROTTLED for kind in main.rest.route_limits}, global_limit=UNTHROTTLED,
+    )
+    main.bot._connection.user = guild.me
+
+    # OpenTicketIndex.rebuild only walks real discord.py channels; index the
+    # fake ones from their topics the same way.
+    for category in categories.values():
+        ticket_type = main.TICKET_TYPES.for_category(category.id)
+        for channel in category.text_channels:
+            for user_id in main.OpenTicketIndex._openers(channel):
+                main.open_tickets.add(guild.id, user_id, ticket_type.key, channel.id)
+
+    types = list(main.TICKET_TYPES)
+    existing = [c for category in categories.values() for c in category.text_channels][: args.ops]
+    fresh = guild.member_list[-args.ops:]
+    n = min(args.ops, len(existing), len(fresh))
+    existing, fresh = existing[:n], fresh[:n]
+
+    menu = main.TicketMenuView()
+    control = main.TicketControlView()
+    confirm = main.ConfirmCloseView()
+
+    def type_of(channel):
+        return main.TICKET_TYPES.for_category(channel.category_id)
+
+    staff_for = {t.key: next(m for m in guild.staff if m.name.startswith(f"staff-{t.key}-")) for t in types}
+
+    def opener_of(channel):
+        return guild.get_member(main.OpenTicketIndex._openers(channel)[0])
+
+    results = [
+        await measure(
+            "handle_ticket_creation (duplicate)", guild, existing,
+            lambda c: menu.handle_ticket_creation(FakeInteraction(guild, opener_of(c)), type_of(c)),
+        ),
+        await measure(
+            "handle_ticket_creation (modal)", guild, range(n),
+            lambda i: menu.handle_ticket_creation(FakeInteraction(guild, fresh[i]), types[i % len(types)]),
+        ),
+    ]
+
+    created = []
+
+    async def open_ticket(i):
+        created.append(await main.create_ticket_channel(FakeInteraction(guild, fresh[i]), types[i % len(types)], fresh[i]))
+
+    results.append(await measure("create_ticket_channel", guild, range(n), open_ticket))
+
+    # Same opens served from pre-created pool channels: one edit instead of a
+    # create. The fakes answer instantly, so this is the bot-side cost; the
+    # Discord-side gap shows up live in /config and ticket_open_latency{mode}.
+    from channel_pool import POOL_PREFIX
+
+    main.CHANNEL_POOL_ENABLED = True
+    for category in categories.values():
+        for i in range(n // len(categories) + 1):
+            main.channel_pool.track(await category.create_text_channel(name=f"{POOL_PREFIX}{i}"))
+    results.append(await measure(
+        "create_ticket_channel (pooled)", guild, range(n),
+        lambda i: main.create_ticket_channel(FakeInteraction(guild, fresh[i]), types[i % len(types)], fresh[i]),
+    ))
+    main.CHANNEL_POOL_ENABLED = False
+    results.append(await measure(
+        "create_ticket_embed", guild, range(n),
+        lambda i: main.create_ticket_embed(types[i % len(types)], fresh[i], "Benchmark", i + 1),
+    ))
+    results.append(await measure(
+        "has_permission (staff)", guild, existing,
+        lambda c: control.has_permission(FakeInteraction(guild, staff_for[type_of(c).key], c)),
+    ))
+    results.append(await measure(
+        "has_permission (member)", guild, existing,
+        lambda c: control.has_permission(FakeInteraction(guild, fresh[0], c)),
+    ))
+    main.AUTO_ASSIGN = True
+    results.append(await measure(
+        "auto_assign", guild, created, lambda c: main.auto_assign(guild, type_of(c), c.id),
+    ))
+    results.append(await measure(
+        "archive_ticket", guild, created,
+        lambda c: confirm.archive_ticket(c, guild, opener_of(c), guild.staff[0], "0m"),
+    ))
+
+    await main.rest.close()
+    return results
+
+
+async def run(args):
+    tmp = tempfile.mkdtemp(prefix="ticketbot-bench-")
+    try:
+        archive_id = configure_env(tmp)
+        import main
+
+        try:
+            results = await bench(main, args, archive_id)
+        finally:
+            await main.counter_store.flush()
+            main.counter_store.close()
+            main.ticket_records.close()
+            main.guild_configs.close()
+            main.transcript_exporter.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"{args.ops:,} ops per scenario")
+    for result in results:
+        print(result.row())
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--channels", type=int, default=10_000)
+    parser.add_argument("--members", type=int, default=100_000)
+    parser.add_argument("--roles", type=int, default=500)
+    parser.add_argument("--ops", type=int, default=2_000)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
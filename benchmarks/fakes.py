@@ -0,0 +1,337 @@
+"""In-memory stand-ins for the discord.py objects main.py touches.
+
+They only implement the attributes and coroutines the ticket flow uses.
+Every coroutine that would hit Discord's REST API is recorded in a
+RestRecorder instead of being sent.
+"""
+import datetime
+import itertools
+from collections import Counter
+
+import discord
+
+_ids = itertools.count(100_000_000_000_000_000)
+EPOCH = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def next_id() -> int:
+    return next(_ids)
+
+
+class RestRecorder:
+    def __init__(self):
+        self.calls = Counter()
+
+    def record(self, route: str):
+        self.calls[route] += 1
+
+    @property
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+    def reset(self):
+        self.calls.clear()
+
+
+class FakeAsset:
+    url = "https://cdn.discordapp.com/embed/avatars/0.png"
+
+
+class FakePermissions:
+    __slots__ = ("administrator",)
+
+    def __init__(self, administrator: bool = False):
+        self.administrator = administrator
+
+
+class FakeRole:
+    __slots__ = ("id", "name", "position", "guild")
+
+    def __init__(self, guild, name: str, position: int, role_id: int | None = None):
+        self.id = role_id or next_id()
+        self.name = name
+        self.position = position
+        self.guild = guild
+
+    @property
+    def mention(self) -> str:
+        return f"<@&{self.id}>"
+
+    @property
+    def members(self):
+        # A scan over the guild's members, like discord.py's Role.members.
+        return [member for member in self.guild.members if self in member.roles]
+
+    def __hash__(self):
+        return self.id >> 22
+
+    def __eq__(self, other):
+        return isinstance(other, FakeRole) and other.id == self.id
+
+
+class FakeMember:
+    __slots__ = ("id", "name", "guild", "roles", "bot", "guild_permissions", "created_at", "status")
+
+    def __init__(self, guild, name: str, roles=(), bot: bool = False, administrator: bool = False):
+        self.id = next_id()
+        self.name = name
+        self.guild = guild
+        self.roles = list(roles)
+        self.bot = bot
+        self.guild_permissions = FakePermissions(administrator)
+        self.created_at = EPOCH
+        self.status = discord.Status.online
+
+    @property
+    def display_name(self) -> str:
+        return self.name
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+    @property
+    def display_avatar(self):
+        return FakeAsset()
+
+    def __str__(self):
+        return self.name
+
+    def __hash__(self):
+        return self.id >> 22
+
+    def __eq__(self, other):
+        return getattr(other, "id", None) == self.id
+
+
+class FakeTextChannel:
+    def __init__(self, guild, name: str, category=None, overwrites=None, topic: str | None = None, members=()):
+        self.id = next_id()
+        self.guild = guild
+        self.name = name
+        self.category = category
+        self.overwrites = dict(overwrites or {})
+        self.topic = topic
+        self.members = list(members)
+        self.created_at = EPOCH
+
+    @property
+    def category_id(self):
+        return self.category.id if self.category else None
+
+    @property
+    def mention(self) -> str:
+        return f"<#{self.id}>"
+
+    async def edit(self, **kwargs):
+        self.guild.rest.record("channel_edit")
+        if "name" in kwargs:
+            self.name = kwargs["name"]
+        if "topic" in kwargs:
+            self.topic = kwargs["topic"]
+        if "category" in kwargs:
+            if self.category:
+                self.category.channels.remove(self)
+            self.category = kwargs["category"]
+            self.category.channels.append(self)
+        if "overwrites" in kwargs:
+            self.overwrites = dict(kwargs["overwrites"])
+        return self
+
+    async def set_permissions(self, target, **perms):
+        self.guild.rest.record("permissions")
+        self.overwrites[target] = discord.PermissionOverwrite(**perms)
+
+    async def send(self, *args, **kwargs):
+        self.guild.rest.record("message")
+
+
+class FakeCategoryChannel:
+    def __init__(self, guild, name: str, overwrites=None, category_id: int | None = None, position: int = 0):
+        self.id = category_id or next_id()
+        self.guild = guild
+        self.name = name
+        self.overwrites = dict(overwrites or {})
+        self.position = position
+        self.channels: list[FakeTextChannel] = []
+
+    @property
+    def text_channels(self):
+        return self.channels
+
+    async def create_text_channel(self, name: str, overwrites=None, topic: str | None = None):
+        self.guild.rest.record("channel_create")
+        members = [target for target in (overwrites or {}) if isinstance(target, FakeMember)]
+        channel = FakeTextChannel(self.guild, name, self, overwrites, topic, members)
+        self.guild.add_channel(channel)
+        return channel
+
+
+class FakeGuild:
+    def __init__(self, name: str = "Bench Guild"):
+        self.id = next_id()
+        self.name = name
+        self.rest = RestRecorder()
+        self.roles: list[FakeRole] = []
+        self._roles: dict[int, FakeRole] = {}
+        self._members: dict[int, FakeMember] = {}
+        self._channels: dict[int, object] = {}
+        self.default_role = self.add_role("@everyone", role_id=self.id)
+        self.me: FakeMember | None = None
+        self.filesize_limit = 10 * 1024 * 1024
+
+    def add_role(self, name: str, role_id: int | None = None) -> FakeRole:
+        role = FakeRole(self, name, len(self.roles), role_id)
+        self.roles.append(role)
+        self._roles[role.id] = role
+        return role
+
+    def add_member(self, member: FakeMember) -> FakeMember:
+        self._members[member.id] = member
+        return member
+
+    def add_channel(self, channel):
+        self._channels[channel.id] = channel
+        if isinstance(channel, FakeTextChannel) and channel.category:
+            channel.category.channels.append(channel)
+
+    async def create_category(self, name: str, overwrites=None, position: int = 0, reason: str | None = None):
+        self.rest.record("channel_create")
+        category = FakeCategoryChannel(self, name, overwrites, position=position)
+        self.add_channel(category)
+        return category
+
+    def get_role(self, role_id: int):
+        return self._roles.get(role_id)
+
+    def get_member(self, member_id: int):
+        return self._members.get(member_id)
+
+    def get_channel(self, channel_id: int):
+        return self._channels.get(channel_id)
+
+    @property
+    def members(self):
+        return list(self._members.values())
+
+    @property
+    def channels(self):
+        return list(self._channels.values())
+
+
+class FakeResponse:
+    def __init__(self, rest: RestRecorder):
+        self.rest = rest
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def send_message(self, *args, **kwargs):
+        self.rest.record("interaction_response")
+        self._done = True
+
+    async def send_modal(self, modal):
+        self.rest.record("interaction_response")
+        self._done = True
+
+    async def defer(self, *args, **kwargs):
+        self.rest.record("interaction_response")
+        self._done = True
+
+
+class FakeFollowup:
+    def __init__(self, rest: RestRecorder):
+        self.rest = rest
+
+    async def send(self, *args, **kwargs):
+        self.rest.record("followup")
+
+
+class FakeInteraction:
+    def __init__(self, guild: FakeGuild, user: FakeMember, channel=None):
+        self.guild = guild
+        self.user = user
+        self.channel = channel
+        self.response = FakeResponse(guild.rest)
+        self.followup = FakeFollowup(guild.rest)
+        self.message = None
+        self.extras = {}
+        self.created_at = datetime.datetime.now(datetime.timezone.utc)
+
+
+def build_guild(
+    ticket_types,
+    channels: int = 10_000,
+    members: int = 100_000,
+    roles: int = 500,
+    staff_per_type: int = 20,
+    archive_category_id: int | None = None,
+) -> tuple[FakeGuild, dict[str, FakeCategoryChannel], FakeCategoryChannel | None]:
+    """Synthetic guild with a category per ticket type and ``channels`` open tickets.
+
+    Categories reuse the ticket types' configured category ids (and
+    ``archive_category_id``) so main.py's config resolves to them.
+
+    Role names listed by the ticket types are created first so that role
+    resolution has to look through the whole role list like on a real guild.
+    """
+    guild = FakeGuild()
+
+    filler = max(0, roles - 1 - len({name for t in ticket_types for name in t.roles}))
+    for i in range(filler):
+        guild.add_role(f"role-{i}")
+    staff_roles = {}
+    for ticket_type in ticket_types:
+        for name in ticket_type.roles:
+            if name not in staff_roles:
+                staff_roles[name] = guild.add_role(name)
+
+    guild.me = guild.add_member(FakeMember(guild, "TicketBot", bot=True))
+
+    filler_roles = guild.roles[1:1 + filler]
+    member_list = []
+    for i in range(members):
+        extra = (filler_roles[i % len(filler_roles)],) if filler_roles else ()
+        member_list.append(guild.add_member(FakeMember(guild, f"member-{i}", roles=extra)))
+
+    staff = []
+    for ticket_type in ticket_types:
+        for i in range(staff_per_type):
+            roles_for = [staff_roles[name] for name in ticket_type.roles]
+            staff.append(guild.add_member(FakeMember(guild, f"staff-{ticket_type.key}-{i}", roles=roles_for)))
+    guild.staff = staff
+
+    categories = {}
+    for ticket_type in ticket_types:
+        category = FakeCategoryChannel(guild, ticket_type.label, category_id=ticket_type.category_id)
+        guild.add_channel(category)
+        categories[ticket_type.key] = category
+
+    types = list(ticket_types)
+    for i in range(channels):
+        ticket_type = types[i % len(types)]
+        opener = member_list[i % len(member_list)]
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(read_messages=False),
+            opener: discord.PermissionOverwrite(read_messages=True, send_messages=True),
+        }
+        channel = FakeTextChannel(
+            guild,
+            f"{ticket_type.prefix}{i + 1}",
+            categories[ticket_type.key],
+            overwrites,
+            topic=f"Ticket de {ticket_type.label} - {opener.name} ({opener.id})",
+            members=[opener, *staff[:staff_per_type]],
+        )
+        guild.add_channel(channel)
+
+    archive = None
+    if archive_category_id:
+        archive = FakeCategoryChannel(
+            guild, "Arquivo", {guild.default_role: discord.PermissionOverwrite(read_messages=False)}, archive_category_id
+        )
+        guild.add_channel(archive)
+
+    guild.member_list = member_list
+    return guild, categories, archive
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass, fields
+from typing import Callable
+
+from ticket_types import TicketType, TicketTypeRegistry, load_ticket_types
+
+log = logging.getLogger(__name__)
+
+CONFIG_KEYS = (
+    "server_name",
+    "brand_icon_url",
+    "brand_thumb_url",
+    "archive_category_id",
+    "dashboard_channel_id",
+    "ticket_types",
+)
+DEFAULT_SERVER_NAME = "Your Discord Server"
+
+
+@dataclass(frozen=True)
+class BotConfig:
+    """The settings /reload and the config watcher can swap in without a restart."""
+
+    ticket_types: TicketTypeRegistry
+    server_name: str = DEFAULT_SERVER_NAME
+    brand_icon_url: str = ""
+    brand_thumb_url: str = ""
+    archive_category_id: int | None = None
+    dashboard_channel_id: int | None = None
+
+
+def read_config_file(path: str | None) -> dict:
+    if not path:
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path}: {e}")
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} must contain a JSON object")
+    unknown = sorted(set(data) - set(CONFIG_KEYS))
+    if unknown:
+        raise ValueError(f"{path} has unknown keys {unknown} (expected some of {list(CONFIG_KEYS)})")
+    return data
+
+
+def _optional_id(name: str, value) -> int | None:
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a channel id (got {value!r})")
+
+
+def load_bot_config(
+    path: str | None,
+    ticket_types_file: str | None,
+    env: Callable[[str], str | None],
+    env_int: Callable[[str], int | None],
+    env_list: Callable[[str], list[str]],
+) -> BotConfig:
+    """Build the config from the env and the JSON file at ``path``.
+
+    Env vars win over the file, as they do over TICKET_TYPES_FILE; the file's
+    ``ticket_types`` list replaces TICKET_TYPES_FILE when present.
+    """
+    data = read_config_file(path)
+    ticket_types = load_ticket_types(ticket_types_file, env_int, env_list, data.get("ticket_types"))
+    server_name = env("SERVER_NAME") or data.get("server_name") or DEFAULT_SERVER_NAME
+    brand_icon_url = env("BRAND_ICON_URL") or data.get("brand_icon_url") or ""
+    brand_thumb_url = env("BRAND_THUMB_URL") or data.get("brand_thumb_url") or brand_icon_url
+    for name, value in (("server_name", server_name), ("brand_icon_url", brand_icon_url), ("brand_thumb_url", brand_thumb_url)):
+        if not isinstance(value, str):
+            raise ValueError(f"{name} must be a string (got {value!r})")
+    return BotConfig(
+        ticket_types=ticket_types,
+        server_name=server_name,
+        brand_icon_url=brand_icon_url,
+        brand_thumb_url=brand_thumb_url,
+        archive_category_id=env_int("ARCHIVE_CATEGORY_ID")
+        or _optional_id("archive_category_id", data.get("archive_category_id")),
+        dashboard_channel_id=env_int("DASHBOARD_CHANNEL_ID")
+        or _optional_id("dashboard_channel_id", data.get("dashboard_channel_id")),
+    )
+
+
+def check_reloadable(old: BotConfig, new: BotConfig):
+    """Raise ValueError for changes that need a restart.
+
+    Slash-command choices and the persistent buttons of menus already posted
+    are keyed by the ticket types' keys and custom ids, so those must stay.
+    """
+    old_ids = {ticket_type.key: ticket_type.custom_id for ticket_type in old.ticket_types}
+    new_ids = {ticket_type.key: ticket_type.custom_id for ticket_type in new.ticket_types}
+    if old_ids.keys() != new_ids.keys():
+        added, removed = sorted(new_ids.keys() - old_ids.keys()), sorted(old_ids.keys() - new_ids.keys())
+        raise ValueError(f"Adding or removing ticket types needs a restart (added {added}, removed {removed})")
+    changed = sorted(key for key in old_ids if old_ids[key] != new_ids[key])
+    if changed:
+        raise ValueError(f"Changing a ticket type's custom_id needs a restart ({changed})")
+
+
+def config_changes(old: BotConfig, new: BotConfig) -> list[str]:
+    """Dotted names of the settings that differ, e.g. ``ticket_types.suporte.roles``."""
+    changes = [
+        f.name for f in fields(BotConfig)
+        if f.name != "ticket_types" and getattr(old, f.name) != getattr(new, f.name)
+    ]
+    for ticket_type in new.ticket_types:
+        before = old.ticket_types.get(ticket_type.key)
+        changes += [
+            f"ticket_types.{ticket_type.key}.{f.name}"
+            for f in fields(TicketType)
+            if f.compare and getattr(before, f.name) != getattr(ticket_type, f.name)
+        ]
+    return changes
+
+
+class FileWatcher:
+    """Polls the modification time and size of a few files and reports when any changed."""
+
+    def __init__(self, paths: list[str], interval: float = 5.0):
+        self.paths = [path for path in paths if path]
+        self.interval = interval
+        self._last = self.snapshot()
+
+    def snapshot(self) -> tuple:
+        stamps = []
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+                stamps.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                stamps.append(None)
+        return tuple(stamps)
+
+    def mark(self):
+        """Take the files as they are now as seen, e.g. after a manual reload."""
+        self._last = self.snapshot()
+
+    async def run(self, on_change: Callable[[], None]):
+        while True:
+            await asyncio.sleep(self.interval)
+            current = self.snapshot()
+            if current == self._last:
+                continue
+            self._last = current
+            try:
+                on_change()
+            except Exception:
+                log.exception("Erro ao recarregar configuração", extra={"paths": self.paths})
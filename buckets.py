@@ -0,0 +1,109 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+Limit = tuple[int, float]  # (tokens, per seconds)
+
+
+class TokenBucket:
+    """Classic token bucket: ``capacity`` tokens, refilled at ``rate`` per second."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, tokens: float = 1.0, now: float | None = None) -> float:
+        """Seconds until ``tokens`` are available, without taking them."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.tokens >= tokens and now >= self.updated:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return max(0.0, self.updated - now) + (tokens - self.tokens) / self.rate
+
+    def try_acquire(self, tokens: float = 1.0, now: float | None = None) -> float:
+        """Take ``tokens`` if available and return 0, else return seconds to wait."""
+        wait = self.wait_time(tokens, now)
+        if wait <= 0:
+            self.tokens -= tokens
+        return wait
+
+    async def acquire(self, tokens: float = 1.0):
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def penalize(self, seconds: float, now: float | None = None):
+        # Empty the bucket and push the next refill out by ``seconds``
+        # (used when Discord answers 429 with a retry_after).
+        now = time.monotonic() if now is None else now
+        self.tokens = 0.0
+        self.updated = max(self.updated, now + seconds)
+
+
+def parse_limit(text: str | None) -> Limit | None:
+    """"5/60" -> (5, 60.0); empty or "0" disables the limit."""
+    if not text or text.strip() == "0":
+        return None
+    count, sep, per = text.partition("/")
+    try:
+        limit = (int(count), float(per) if sep else 60.0)
+    except ValueError:
+        raise ValueError(f"Invalid rate limit {text!r} (expected '<count>/<seconds>')")
+    if limit[0] < 0 or limit[1] <= 0:
+        raise ValueError(f"Invalid rate limit {text!r} (expected '<count>/<seconds>')")
+    return limit if limit[0] else None
+
+
+class ScopedLimiter:
+    """Token buckets for several scopes (user, type, guild...) in one bounded LRU.
+
+    A request passes only if every scope has a token, and only then are the
+    tokens taken. Buckets are keyed by their limit too, so changing a limit
+    simply starts fresh buckets and the old ones age out of the LRU. Under a
+    raid the LRU drops the least recently used buckets first; those are the
+    ones most likely to have refilled already.
+    """
+
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[tuple, TokenBucket] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _bucket(self, scope: str, key: Hashable, limit: Limit) -> TokenBucket:
+        bucket_key = (scope, key, limit)
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            count, per = limit
+            bucket = self._buckets[bucket_key] = TokenBucket(count / per, count)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(bucket_key)
+        return bucket
+
+    def acquire(self, checks: list[tuple[str, Hashable, Limit | None]], now: float | None = None) -> tuple[str | None, float]:
+        """Take a token from every limited scope, or return (blocking scope, seconds to wait)."""
+        now = time.monotonic() if now is None else now
+        buckets = [(scope, self._bucket(scope, key, limit)) for scope, key, limit in checks if limit]
+        wait, scope = max(((bucket.wait_time(now=now), scope) for scope, bucket in buckets), default=(0.0, None))
+        if wait > 0:
+            return scope, wait
+        for _, bucket in buckets:
+            bucket.try_acquire(now=now)
+        return None, 0.0
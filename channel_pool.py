@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import secrets
+import statistics
+from collections import deque
+
+import discord
+
+from rest_scheduler import PRIORITY_LOW, RestScheduler
+
+POOL_PREFIX = "pool-"
+# Discord caps categories at 50 channels; keep room for real tickets.
+CATEGORY_CHANNEL_LIMIT = 50
+CATEGORY_HEADROOM = 5
+
+log = logging.getLogger(__name__)
+
+
+class LatencySamples:
+    def __init__(self, maxlen: int = 500):
+        self.samples: deque[float] = deque(maxlen=maxlen)
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> float | None:
+        if not self.samples:
+            return None
+        if len(self.samples) == 1:
+            return self.samples[0]
+        return statistics.quantiles(self.samples, n=100, method="inclusive")[int(pct) - 1]
+
+
+class ChannelPool:
+    """Hidden, pre-created channels per ticket category, claimed on open.
+
+    Claiming costs one channel.edit (name, topic, overwrites) instead of a
+    channel create. A background task tops each pool back up to the high
+    watermark whenever it drops below the low one and the REST queue is idle.
+    """
+
+    def __init__(self, rest: RestScheduler, low_watermark: int = 2, high_watermark: int = 5):
+        if low_watermark > high_watermark:
+            raise ValueError("Channel pool low watermark must not exceed the high watermark")
+        self.rest = rest
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self._pools: dict[int, deque[int]] = {}
+        self.latency = {"pooled": LatencySamples(), "cold": LatencySamples()}
+
+    def size(self, category_id: int) -> int:
+        return len(self._pools.get(category_id, ()))
+
+    def track(self, channel: discord.abc.GuildChannel):
+        if isinstance(channel, discord.TextChannel) and channel.category_id and channel.name.startswith(POOL_PREFIX):
+            pool = self._pools.setdefault(channel.category_id, deque())
+            if channel.id not in pool:
+                pool.append(channel.id)
+
+    def discard(self, channel_id: int):
+        for pool in self._pools.values():
+            try:
+                pool.remove(channel_id)
+            except ValueError:
+                continue
+            return
+
+    def rebuild(self, category: discord.CategoryChannel):
+        self._pools[category.id] = deque()
+        for channel in category.text_channels:
+            self.track(channel)
+
+    def claim(self, category: discord.CategoryChannel) -> discord.TextChannel | None:
+        pool = self._pools.get(category.id)
+        while pool:
+            channel = category.guild.get_channel(pool.popleft())
+            if isinstance(channel, discord.TextChannel) and channel.name.startswith(POOL_PREFIX):
+                return channel
+        return None
+
+    def record_latency(self, mode: str, seconds: float):
+        self.latency[mode].add(seconds)
+
+    async def refill(self, category: discord.CategoryChannel) -> int:
+        if self.size(category.id) >= self.low_watermark:
+            return 0
+
+        guild = category.guild
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(read_messages=False),
+            guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True),
+        }
+        created = 0
+        while self.size(category.id) < self.high_watermark:
+            if len(category.channels) >= CATEGORY_CHANNEL_LIMIT - CATEGORY_HEADROOM or not self.rest.idle:
+                break
+            channel = await self.rest.submit(
+                f"channel_create:{guild.id}",
+                lambda: category.create_text_channel(name=f"{POOL_PREFIX}{secrets.token_hex(3)}", overwrites=overwrites),
+                PRIORITY_LOW,
+            )
+            self.track(channel)
+            created += 1
+        return created
+
+    async def run(self, categories, interval: float = 30.0):
+        """Refill loop; ``categories`` is a callable returning the categories to keep warm."""
+        while True:
+            await asyncio.sleep(interval)
+            for category in categories():
+                try:
+                    await self.refill(category)
+                except Exception:
+                    log.exception("Erro ao reabastecer pool de canais", extra={"category_id": category.id})
+
@@ -0,0 +1,107 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+# A shard is reported as stale when its worker has not written a heartbeat
+# for this many heartbeat intervals.
+STALE_INTERVALS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shard_health (
+    shard_id INTEGER PRIMARY KEY,
+    cluster_id INTEGER NOT NULL,
+    pid INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    latency REAL,
+    guilds INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def shard_for(guild_id: int, shard_count: int) -> int:
+    # Discord's routing formula: https://discord.com/developers/docs/topics/gateway#sharding
+    return (guild_id >> 22) % shard_count
+
+
+def split_shards(shard_count: int, workers: int) -> list[list[int]]:
+    """Contiguous shard ranges, as even as possible, one per worker."""
+    workers = max(1, min(workers, shard_count))
+    size, extra = divmod(shard_count, workers)
+    ranges, start = [], 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+@dataclass(frozen=True)
+class ClusterInfo:
+    """Which shards this process runs; a single unsharded process when shard_count is None."""
+
+    cluster_id: int = 0
+    shard_count: int | None = None
+    shard_ids: tuple[int, ...] | None = None
+
+    @property
+    def sharded(self) -> bool:
+        return self.shard_count is not None
+
+    def owns(self, guild_id: int) -> bool:
+        if not self.sharded or self.shard_ids is None:
+            return True
+        return shard_for(guild_id, self.shard_count) in self.shard_ids
+
+
+@dataclass
+class ShardHealth:
+    shard_id: int
+    cluster_id: int
+    pid: int
+    status: str
+    latency: float | None
+    guilds: int
+    updated_at: float
+
+    def is_stale(self, interval: float, now: float | None = None) -> bool:
+        return (now or time.time()) - self.updated_at > interval * STALE_INTERVALS
+
+
+class ShardHealthStore:
+    """Per-shard heartbeats shared by every worker through one SQLite file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def _write(self, rows: list[ShardHealth]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO shard_health "
+                "(shard_id, cluster_id, pid, status, latency, guilds, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(r.shard_id, r.cluster_id, r.pid, r.status, r.latency, r.guilds, r.updated_at) for r in rows],
+            )
+
+    def _read(self) -> list[ShardHealth]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT shard_id, cluster_id, pid, status, latency, guilds, updated_at FROM shard_health ORDER BY shard_id"
+            ).fetchall()
+        return [ShardHealth(*row) for row in rows]
+
+    async def write(self, rows: list[ShardHealth]):
+        await asyncio.to_thread(self._write, rows)
+
+    async def read(self) -> list[ShardHealth]:
+        return await asyncio.to_thread(self._read)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
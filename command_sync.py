@@ -0,0 +1,41 @@
+import hashlib
+import json
+import logging
+
+from discord import app_commands
+
+from counter_store import atomic_write_json
+
+log = logging.getLogger(__name__)
+
+
+def command_tree_hash(tree: app_commands.CommandTree) -> str:
+    """Stable hash of the global commands' payloads (names, options, permissions...)."""
+    payload = sorted((command.to_dict(tree) for command in tree.get_commands()), key=lambda c: (c["type"], c["name"]))
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class CommandSyncState:
+    """The last command tree hash synced per application, kept in a JSON file."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _load(self) -> dict[str, str]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (ValueError, OSError) as e:
+            log.warning("Erro ao ler estado de sincronização", extra={"path": self.path, "error": str(e)})
+            return {}
+
+    def is_synced(self, application_id: int, tree_hash: str) -> bool:
+        return self._load().get(str(application_id)) == tree_hash
+
+    def mark_synced(self, application_id: int, tree_hash: str):
+        state = self._load()
+        state[str(application_id)] = tree_hash
+        atomic_write_json(self.path, state)
@@ -0,0 +1,217 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+
+log = logging.getLogger(__name__)
+
+
+def guild_counter(guild_id: int, name: str) -> str:
+    return f"{guild_id}:{name}"
+
+
+class CounterStore(ABC):
+    """Per-ticket-type counters with atomic increment-and-get."""
+
+    @abstractmethod
+    async def increment(self, name: str) -> int:
+        ...
+
+    @abstractmethod
+    async def migrate(self, legacy: str, name: str) -> int | None:
+        """Move counter ``legacy`` into ``name`` (keeping the higher value) and delete it.
+
+        Returns the value moved, or None once ``legacy`` is gone, so it only
+        ever carries over into the first ``name`` it is migrated to.
+        """
+
+    @abstractmethod
+    async def snapshot(self) -> dict[str, int]:
+        ...
+
+    async def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def atomic_write_json(path: str, data) -> None:
+    # Write to a temp file in the same directory and rename over the target,
+    # so a crash mid-write leaves either the old or the new file, never half.
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class JsonCounterStore(CounterStore):
+    """In-memory counters with a debounced write-behind flush to a JSON file.
+
+    Only safe for a single bot process: two processes sharing the file will
+    hand out the same numbers. Use SqliteCounterStore for that.
+    """
+
+    def __init__(self, path: str, defaults: dict[str, int], flush_delay: float = 1.0):
+        self.path = path
+        self.flush_delay = flush_delay
+        self._counters = dict(defaults)
+        self._dirty = False
+        self._flush_task: asyncio.Task | None = None
+        self._write_lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                loaded = json.load(f)
+            self._counters.update({k: int(v) for k, v in loaded.items()})
+            log.info("Contadores carregados do arquivo", extra={"path": self.path, "counters": dict(self._counters)})
+        except FileNotFoundError:
+            log.info("Arquivo de contadores não encontrado, criando novo", extra={"path": self.path})
+            self._write(dict(self._counters))
+        except (ValueError, OSError) as e:
+            # Refuse to start: carrying on would restart numbering at 1 and the
+            # first flush would overwrite the file we could not parse.
+            log.error("Erro ao carregar contadores", extra={"path": self.path, "error": str(e)})
+            raise
+
+    def _write(self, data: dict[str, int]):
+        with self._write_lock:
+            atomic_write_json(self.path, data)
+
+    def _mark_dirty(self):
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def increment(self, name: str) -> int:
+        value = self._counters.get(name, 0) + 1
+        self._counters[name] = value
+        self._mark_dirty()
+        return value
+
+    async def migrate(self, legacy: str, name: str) -> int | None:
+        value = self._counters.pop(legacy, None)
+        if value is None:
+            return None
+        self._counters[name] = max(self._counters.get(name, 0), value)
+        self._mark_dirty()
+        return value
+
+    async def snapshot(self) -> dict[str, int]:
+        return dict(self._counters)
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_delay)
+        await self.flush()
+
+    async def flush(self):
+        if not self._dirty:
+            return
+        self._dirty = False
+        data = dict(self._counters)
+        try:
+            await asyncio.to_thread(self._write, data)
+        except Exception as e:
+            self._dirty = True
+            log.error("Erro ao salvar contadores", extra={"path": self.path, "error": str(e)})
+
+    def close(self):
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        if self._dirty:
+            self._write(dict(self._counters))
+            self._dirty = False
+
+
+class SqliteCounterStore(CounterStore):
+    """Counters in an SQLite database in WAL mode, safe across processes."""
+
+    def __init__(self, path: str, defaults: dict[str, int], seed_file: str | None = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+        seed = dict(defaults)
+        if seed_file and os.path.exists(seed_file):
+            # One-time migration from the JSON counters file.
+            try:
+                with open(seed_file, "r", encoding="utf-8") as f:
+                    seed.update({k: int(v) for k, v in json.load(f).items()})
+            except (ValueError, OSError) as e:
+                log.error("Erro ao importar contadores", extra={"path": seed_file, "error": str(e)})
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO counters (name, value) VALUES (?, ?)",
+            list(seed.items()),
+        )
+
+    def _increment(self, name: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, 1) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + 1 RETURNING value",
+                (name,),
+            ).fetchone()
+        return row[0]
+
+    def _migrate(self, legacy: str, name: str) -> int | None:
+        with self._lock:
+            # One transaction, so two processes can't both move the same counter.
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("DELETE FROM counters WHERE name = ? RETURNING value", (legacy,)).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "INSERT INTO counters (name, value) VALUES (?, ?) "
+                        "ON CONFLICT(name) DO UPDATE SET value = max(value, excluded.value)",
+                        (name, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return row[0] if row else None
+
+    def _snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+
+    async def increment(self, name: str) -> int:
+        return await asyncio.to_thread(self._increment, name)
+
+    async def migrate(self, legacy: str, name: str) -> int | None:
+        return await asyncio.to_thread(self._migrate, legacy, name)
+
+    async def snapshot(self) -> dict[str, int]:
+        return await asyncio.to_thread(self._snapshot)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_counter_store(backend: str, json_path: str, db_path: str, defaults: dict[str, int]) -> CounterStore:
+    backend = backend.lower()
+    if backend == "sqlite":
+        return SqliteCounterStore(db_path, defaults, seed_file=json_path)
+    if backend == "json":
+        return JsonCounterStore(json_path, defaults)
+    raise ValueError(f"Unknown COUNTERS_BACKEND {backend!r} (expected 'json' or 'sqlite')")
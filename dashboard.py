@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Hashable, Iterable
+
+from ticket_records import TicketRecord
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class QueueSummary:
+    """Open tickets of one type: how many, the oldest one's open time, and how many nobody took yet."""
+
+    open: int = 0
+    oldest_opened_at: float | None = None
+    unclaimed: int = 0
+
+
+def summarize(records: Iterable[TicketRecord]) -> dict[str, QueueSummary]:
+    summaries: dict[str, QueueSummary] = {}
+    for record in records:
+        summary = summaries.setdefault(record.ticket_type, QueueSummary())
+        summary.open += 1
+        if summary.oldest_opened_at is None or record.opened_at < summary.oldest_opened_at:
+            summary.oldest_opened_at = record.opened_at
+        if record.claimer_id is None:
+            summary.unclaimed += 1
+    return summaries
+
+
+class CoalescedUpdater:
+    """Turns bursts of ``touch(key)`` into at most one ``render(key)`` per ``interval`` seconds.
+
+    The first touch after a quiet period renders right away; touches while a
+    render is pending are folded into it, and touches during a render
+    schedule one more, so the last state always gets drawn.
+    """
+
+    def __init__(self, render: Callable[[Hashable], Awaitable[None]], interval: float = 10.0):
+        self.render = render
+        self.interval = interval
+        self.touches = 0
+        self.renders = 0
+        self._pending: dict[Hashable, asyncio.Task] = {}
+        self._last: dict[Hashable, float] = {}
+
+    def touch(self, key: Hashable):
+        self.touches += 1
+        if key in self._pending:
+            return
+        delay = max(0.0, self._last.get(key, float("-inf")) + self.interval - time.monotonic())
+        self._pending[key] = asyncio.create_task(self._flush(key, delay))
+
+    async def _flush(self, key: Hashable, delay: float):
+        if delay:
+            await asyncio.sleep(delay)
+        # Drop the pending entry first so touches during the render queue another one.
+        del self._pending[key]
+        self._last[key] = time.monotonic()
+        self.renders += 1
+        try:
+            await self.render(key)
+        except Exception:
+            log.exception("Erro ao atualizar painel", extra={"key": key})
+
+    def close(self):
+        for task in self._pending.values():
+            task.cancel()
+        self._pending.clear()
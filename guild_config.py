@@ -0,0 +1,227 @@
+import asyncio
+import dataclasses
+import functools
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+
+from buckets import Limit, parse_limit
+from ticket_types import TicketType, TicketTypeRegistry
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS guild_settings (
+    guild_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (guild_id, name)
+);
+"""
+
+ARCHIVE_SETTING = "archive_category"
+ARCHIVE_OVERFLOW_SETTING = "archive_overflow"
+DASHBOARD_CHANNEL_SETTING = "dashboard_channel"
+DASHBOARD_MESSAGE_SETTING = "dashboard_message"
+
+
+def category_setting(key: str) -> str:
+    return f"category:{key}"
+
+
+def roles_setting(key: str) -> str:
+    return f"roles:{key}"
+
+
+def rate_limit_setting(scope: str) -> str:
+    return f"rate_limit:{scope}"
+
+
+@dataclass(frozen=True)
+class GuildConfig:
+    """A guild's ticket settings: its own overrides on top of the .env defaults."""
+
+    guild_id: int
+    ticket_types: TicketTypeRegistry = field(repr=False)
+    categories: dict[str, int] = field(default_factory=dict)
+    roles: dict[str, tuple[str, ...]] = field(default_factory=dict)
+    archive_override: int | None = None
+    default_archive_category_id: int | None = None
+    # Ticket-opening limits per scope; None means the scope is disabled here.
+    rate_limits: dict[str, Limit | None] = field(default_factory=dict)
+    # Extra archive categories created once the archive category filled up, in order.
+    archive_overflow: tuple[int, ...] = ()
+    dashboard_override: int | None = None
+    default_dashboard_channel_id: int | None = None
+    dashboard_message_id: int | None = None
+
+    def rate_limit(self, scope: str, default: Limit | None) -> Limit | None:
+        return self.rate_limits.get(scope, default)
+
+    def category_id(self, ticket_type: TicketType) -> int | None:
+        return self.categories.get(ticket_type.key, ticket_type.category_id)
+
+    def role_names(self, ticket_type: TicketType) -> tuple[str, ...]:
+        return self.roles.get(ticket_type.key, ticket_type.roles)
+
+    @property
+    def archive_category_id(self) -> int | None:
+        return self.archive_override or self.default_archive_category_id
+
+    @property
+    def dashboard_channel_id(self) -> int | None:
+        return self.dashboard_override or self.default_dashboard_channel_id
+
+    def is_custom(self, ticket_type: TicketType) -> bool:
+        return ticket_type.key in self.categories or ticket_type.key in self.roles
+
+    @functools.cached_property
+    def _by_category(self) -> dict[int, TicketType]:
+        return {
+            self.category_id(ticket_type): ticket_type
+            for ticket_type in self.ticket_types
+            if self.category_id(ticket_type)
+        }
+
+    def ticket_type_for_category(self, category_id: int | None) -> TicketType | None:
+        return self._by_category.get(category_id) if category_id else None
+
+
+class GuildConfigStore:
+    """Per-guild settings persisted in SQLite and loaded lazily per guild id.
+
+    A cached GuildConfig is never mutated: updates write the row and swap in a
+    freshly loaded config, so readers always see a consistent snapshot.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ticket_types: TicketTypeRegistry,
+        default_archive_category_id: int | None = None,
+        default_dashboard_channel_id: int | None = None,
+    ):
+        self.path = path
+        self.ticket_types = ticket_types
+        self.default_archive_category_id = default_archive_category_id
+        self.default_dashboard_channel_id = default_dashboard_channel_id
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._cache: dict[int, GuildConfig] = {}
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _load(self, guild_id: int) -> GuildConfig:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, value FROM guild_settings WHERE guild_id = ?", (guild_id,)
+            ).fetchall()
+
+        categories, roles, rate_limits, overflow = {}, {}, {}, ()
+        archive = dashboard_channel = dashboard_message = None
+        for name, value in rows:
+            kind, _, key = name.partition(":")
+            if name == ARCHIVE_SETTING:
+                archive = int(value)
+            elif name == ARCHIVE_OVERFLOW_SETTING:
+                overflow = tuple(json.loads(value))
+            elif name == DASHBOARD_CHANNEL_SETTING:
+                dashboard_channel = int(value)
+            elif name == DASHBOARD_MESSAGE_SETTING:
+                dashboard_message = int(value)
+            elif kind == "category" and self.ticket_types.get(key):
+                categories[key] = int(value)
+            elif kind == "roles" and self.ticket_types.get(key):
+                roles[key] = tuple(json.loads(value))
+            elif kind == "rate_limit":
+                rate_limits[key] = parse_limit(value)
+        return GuildConfig(
+            guild_id,
+            self.ticket_types,
+            categories,
+            roles,
+            archive_override=archive,
+            default_archive_category_id=self.default_archive_category_id,
+            rate_limits=rate_limits,
+            archive_overflow=overflow,
+            dashboard_override=dashboard_channel,
+            default_dashboard_channel_id=self.default_dashboard_channel_id,
+            dashboard_message_id=dashboard_message,
+        )
+
+    def get(self, guild_id: int) -> GuildConfig:
+        config = self._cache.get(guild_id)
+        if config is None:
+            # One indexed read per guild for the life of the process.
+            config = self._cache[guild_id] = self._load(guild_id)
+        return config
+
+    def evict(self, guild_id: int):
+        self._cache.pop(guild_id, None)
+
+    def set_defaults(
+        self,
+        ticket_types: TicketTypeRegistry,
+        default_archive_category_id: int | None,
+        default_dashboard_channel_id: int | None,
+    ):
+        """Swap in new .env-level defaults; cached guilds keep their overrides and need no reload."""
+        self.ticket_types = ticket_types
+        self.default_archive_category_id = default_archive_category_id
+        self.default_dashboard_channel_id = default_dashboard_channel_id
+        self._cache = {
+            guild_id: dataclasses.replace(
+                config,
+                ticket_types=ticket_types,
+                default_archive_category_id=default_archive_category_id,
+                default_dashboard_channel_id=default_dashboard_channel_id,
+            )
+            for guild_id, config in self._cache.items()
+        }
+
+    def _write(self, guild_id: int, name: str, value: str | None) -> GuildConfig:
+        with self._lock:
+            if value is None:
+                self._conn.execute("DELETE FROM guild_settings WHERE guild_id = ? AND name = ?", (guild_id, name))
+            else:
+                self._conn.execute(
+                    "INSERT INTO guild_settings (guild_id, name, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT(guild_id, name) DO UPDATE SET value = excluded.value",
+                    (guild_id, name, value),
+                )
+        return self._load(guild_id)
+
+    async def _set(self, guild_id: int, name: str, value: str | None) -> GuildConfig:
+        config = self._cache[guild_id] = await asyncio.to_thread(self._write, guild_id, name, value)
+        return config
+
+    async def set_category(self, guild_id: int, ticket_type: TicketType, category_id: int | None) -> GuildConfig:
+        return await self._set(guild_id, category_setting(ticket_type.key), str(category_id) if category_id else None)
+
+    async def set_roles(self, guild_id: int, ticket_type: TicketType, names: list[str] | None) -> GuildConfig:
+        value = json.dumps(names, ensure_ascii=False) if names is not None else None
+        return await self._set(guild_id, roles_setting(ticket_type.key), value)
+
+    async def set_archive_category(self, guild_id: int, category_id: int | None) -> GuildConfig:
+        return await self._set(guild_id, ARCHIVE_SETTING, str(category_id) if category_id else None)
+
+    async def set_archive_overflow(self, guild_id: int, category_ids: list[int]) -> GuildConfig:
+        return await self._set(guild_id, ARCHIVE_OVERFLOW_SETTING, json.dumps(category_ids) if category_ids else None)
+
+    async def set_dashboard_channel(self, guild_id: int, channel_id: int | None) -> GuildConfig:
+        return await self._set(guild_id, DASHBOARD_CHANNEL_SETTING, str(channel_id) if channel_id else None)
+
+    async def set_dashboard_message(self, guild_id: int, message_id: int | None) -> GuildConfig:
+        return await self._set(guild_id, DASHBOARD_MESSAGE_SETTING, str(message_id) if message_id else None)
+
+    async def set_rate_limit(self, guild_id: int, scope: str, limit: Limit | None, reset: bool = False) -> GuildConfig:
+        # ``limit=None`` disables the scope for this guild; ``reset`` goes back to the .env default.
+        value = None if reset else (f"{limit[0]}/{limit[1]:g}" if limit else "0")
+        return await self._set(guild_id, rate_limit_setting(scope), value)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
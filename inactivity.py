@@ -0,0 +1,124 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class IdleState:
+    timeout: float
+    warning: float
+    last_activity: float
+    warned: bool = False
+
+    @property
+    def due(self) -> float:
+        # Warn ``warning`` seconds before the close, then close at the timeout.
+        if self.warned:
+            return self.last_activity + self.timeout
+        return self.last_activity + self.timeout - self.warning
+
+
+class InactivityTracker:
+    """Deadlines of idle ticket channels in a min-heap, woken only for the next one.
+
+    ``touch`` is O(1): it only moves the channel's last-activity time. Heap
+    entries are not updated; when an entry comes due its deadline is
+    recomputed and, if activity pushed it back, it is re-queued instead.
+    Each entry carries the state it was queued for, so entries left behind
+    by ``discard`` or a second ``track`` of the same channel are dropped.
+    """
+
+    def __init__(self):
+        self._states: dict[int, IdleState] = {}
+        self._heap: list[tuple[float, int, int, IdleState]] = []
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, channel_id: int) -> bool:
+        return channel_id in self._states
+
+    def _push(self, channel_id: int, state: IdleState):
+        due = state.due
+        if not self._heap or due < self._heap[0][0]:
+            self._wake.set()
+        heapq.heappush(self._heap, (due, next(self._seq), channel_id, state))
+
+    def track(
+        self,
+        channel_id: int,
+        timeout: float,
+        warning: float,
+        last_activity: float | None = None,
+        last_message: float | None = None,
+    ):
+        """Start (or restart) the channel's deadline.
+
+        ``last_message`` is the channel's newest message, bots included; one
+        sent after the warning time means the warning was already posted
+        (before a restart), so only the close is left.
+        """
+        state = IdleState(timeout, min(warning, timeout / 2), last_activity or time.time())
+        state.warned = last_message is not None and last_message >= state.due
+        self._states[channel_id] = state
+        self._push(channel_id, state)
+
+    def touch(self, channel_id: int, when: float | None = None):
+        state = self._states.get(channel_id)
+        if state is None:
+            return
+        state.last_activity = max(state.last_activity, when or time.time())
+        state.warned = False
+
+    def discard(self, channel_id: int):
+        # Its heap entry is dropped lazily when it comes due.
+        self._states.pop(channel_id, None)
+
+    def _pop_due(self, now: float) -> list[tuple[int, IdleState]]:
+        fired = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, channel_id, state = heapq.heappop(self._heap)
+            if self._states.get(channel_id) is not state:
+                # Discarded or tracked again since this entry was queued.
+                continue
+            if state.due > now:
+                # Activity since this entry was queued; requeue at the new deadline.
+                heapq.heappush(self._heap, (state.due, next(self._seq), channel_id, state))
+                continue
+            fired.append((channel_id, state))
+        return fired
+
+    async def run(
+        self,
+        on_warning: Callable[[int, float], Awaitable[None]],
+        on_expired: Callable[[int], Awaitable[None]],
+    ):
+        """Call ``on_warning(channel_id, closes_at)`` and then ``on_expired(channel_id)`` as tickets go idle."""
+        while True:
+            self._wake.clear()
+            timeout = self._heap[0][0] - time.time() if self._heap else None
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+            for channel_id, state in self._pop_due(time.time()):
+                try:
+                    if state.warned:
+                        self.discard(channel_id)
+                        await on_expired(channel_id)
+                    else:
+                        state.warned = True
+                        self._push(channel_id, state)
+                        await on_warning(channel_id, state.due)
+                except Exception:
+                    log.exception("Erro no fechamento por inatividade", extra={"channel_id": channel_id})
@@ -0,0 +1,187 @@
+"""Runs the bot as several worker processes, each owning a range of shards.
+
+Every worker is `python main.py` with SHARD_COUNT, SHARD_IDS and CLUSTER_ID
+set. Workers share counters (SQLite), ticket records, per-guild config and
+shard heartbeats through the local database files, so ticket numbers stay
+unique across processes. Crashed workers are restarted with backoff.
+
+    python launcher.py --workers 4            # shard count recommended by Discord
+    python launcher.py --workers 4 --shards 16
+    python launcher.py --status               # per-shard health and latency
+"""
+import argparse
+import asyncio
+import datetime
+import logging
+import os
+import signal
+import sys
+import time
+
+import aiohttp
+from dotenv import load_dotenv
+
+from cluster import ShardHealthStore, split_shards
+from metrics import setup_logging
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+GATEWAY_BOT_URL = "https://discord.com/api/v10/gateway/bot"
+# Discord allows one IDENTIFY per 5 seconds (per max_concurrency bucket).
+IDENTIFY_INTERVAL = 5.0
+
+log = logging.getLogger("launcher")
+
+
+async def recommended_shards(token: str) -> tuple[int, int]:
+    """Shard count and identify concurrency Discord recommends for this bot."""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(GATEWAY_BOT_URL, headers={"Authorization": f"Bot {token}"}) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+    return data["shards"], data.get("session_start_limit", {}).get("max_concurrency", 1)
+
+
+class Worker:
+    def __init__(
+        self, cluster_id: int, shard_count: int, shard_ids: list[int], metrics_port: int | None, args: list[str] = ()
+    ):
+        self.cluster_id = cluster_id
+        self.shard_count = shard_count
+        self.shard_ids = shard_ids
+        self.metrics_port = metrics_port
+        self.args = list(args)
+        self.process: asyncio.subprocess.Process | None = None
+        self.restarts = 0
+
+    def env(self) -> dict[str, str]:
+        env = dict(
+            os.environ,
+            CLUSTER_ID=str(self.cluster_id),
+            SHARD_COUNT=str(self.shard_count),
+            SHARD_IDS=",".join(map(str, self.shard_ids)),
+            COUNTERS_BACKEND="sqlite",
+        )
+        if self.metrics_port is not None:
+            env["METRICS_PORT"] = str(self.metrics_port)
+        return env
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.join(ROOT, "main.py"), *self.args, cwd=ROOT, env=self.env()
+        )
+        # Only the first start honours --force-sync; restarts sync on change only.
+        self.args = [arg for arg in self.args if arg != "--force-sync"]
+        log.info(
+            "Worker iniciado",
+            extra={"cluster_id": self.cluster_id, "shard_ids": self.shard_ids, "pid": self.process.pid},
+        )
+
+    async def supervise(self, stopping: asyncio.Event):
+        backoff = 1.0
+        while not stopping.is_set():
+            await self.start()
+            started = time.monotonic()
+            code = await self.process.wait()
+            if stopping.is_set():
+                return
+            # A worker that stayed up for a while earns a fresh backoff.
+            if time.monotonic() - started > 300:
+                backoff = 1.0
+            self.restarts += 1
+            log.warning(
+                "Worker saiu; reiniciando",
+                extra={"cluster_id": self.cluster_id, "exit_code": code, "backoff": backoff},
+            )
+            try:
+                await asyncio.wait_for(stopping.wait(), backoff)
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, 60.0)
+
+    def stop(self):
+        # SIGINT lets bot.run close the gateway and the stores cleanly.
+        if self.process and self.process.returncode is None:
+            self.process.send_signal(signal.SIGINT)
+
+
+async def run(args):
+    token = os.getenv("DISCORD_TOKEN")
+    if not token:
+        sys.exit("Missing DISCORD_TOKEN in .env")
+
+    shard_count, max_concurrency = args.shards, 1
+    if not shard_count:
+        shard_count, max_concurrency = await recommended_shards(token)
+    ranges = split_shards(shard_count, args.workers)
+
+    metrics_enabled = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+    base_port = int(os.getenv("METRICS_PORT", "9108"))
+    workers = [
+        Worker(
+            i, shard_count, shard_ids, base_port + i if metrics_enabled else None,
+            ["--force-sync"] if args.force_sync and i == 0 else [],
+        )
+        for i, shard_ids in enumerate(ranges)
+    ]
+    log.info("Distribuindo shards", extra={"shard_count": shard_count, "workers": len(workers), "ranges": ranges})
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    tasks = []
+    for worker in workers:
+        tasks.append(asyncio.create_task(worker.supervise(stopping)))
+        # Stagger workers so their shards' IDENTIFYs don't collide.
+        delay = IDENTIFY_INTERVAL * len(worker.shard_ids) / max_concurrency
+        try:
+            await asyncio.wait_for(stopping.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    await stopping.wait()
+    log.info("Encerrando workers")
+    for worker in workers:
+        worker.stop()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def status(db_path: str):
+    store = ShardHealthStore(db_path)
+    try:
+        rows = await store.read()
+    finally:
+        store.close()
+    if not rows:
+        print("Nenhum shard registrado.")
+        return
+    interval = int(os.getenv("SHARD_HEARTBEAT_SECONDS", "15"))
+    now = time.time()
+    print(f"{'shard':>5} {'cluster':>7} {'pid':>7} {'status':<6} {'latency':>9} {'guilds':>7}  last seen")
+    for row in rows:
+        state = "stale" if row.is_stale(interval, now) else row.status
+        latency = f"{row.latency * 1000:.0f} ms" if row.latency is not None else "-"
+        seen = datetime.datetime.fromtimestamp(row.updated_at).strftime("%H:%M:%S")
+        print(f"{row.shard_id:>5} {row.cluster_id:>7} {row.pid:>7} {state:<6} {latency:>9} {row.guilds:>7}  {seen}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2, help="worker processes")
+    parser.add_argument("--shards", type=int, default=None, help="total shards (default: Discord's recommendation)")
+    parser.add_argument("--status", action="store_true", help="print per-shard health and exit")
+    parser.add_argument("--force-sync", action="store_true", help="sync slash commands even if unchanged")
+    args = parser.parse_args()
+
+    load_dotenv(os.path.join(ROOT, ".env"))
+    setup_logging(os.getenv("LOG_FORMAT") or "json", os.getenv("LOG_LEVEL") or "INFO")
+
+    if args.status:
+        asyncio.run(status(os.path.join(ROOT, os.getenv("CLUSTER_DB") or "cluster.db")))
+    else:
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
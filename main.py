@@ -1,12 +1,59 @@
+import time
+
+# Taken before the heavy imports so the startup breakdown includes them.
+_process_started = time.perf_counter()
+
 import discord
 from discord import app_commands
 from discord.ext import commands
+import argparse
+import asyncio
+import contextlib
 import datetime
-import json
+import logging
+import math
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
+import re
+import sqlite3
+from collections import Counter
+from dotenv import dotenv_values, find_dotenv, load_dotenv
+
+from archive import ARCHIVED_PREFIX, ArchiveRotation, ArchiveStats, overflow_category_name, plan_archive
+from assignment import StaffAssigner
+from background import BackgroundWorkers
+from bot_config import BotConfig, FileWatcher, check_reloadable, config_changes, load_bot_config
+from buckets import Limit, ScopedLimiter, parse_limit
+from channel_pool import ChannelPool
+from cluster import ClusterInfo, ShardHealth, ShardHealthStore
+from command_sync import CommandSyncState, command_tree_hash
+from counter_store import guild_counter, open_counter_store
+from dashboard import CoalescedUpdater, summarize
+from guild_config import GuildConfigStore
+from idempotency import KeyedLocks, TTLCache
+from inactivity import InactivityTracker
+from member_cache import MemberCache, lean_intents
+from metrics import (
+    RateLimitLogCounter,
+    instrument,
+    interaction_age,
+    interaction_e2e_latency,
+    registry,
+    setup_logging,
+    start_metrics_server,
+)
+from rest_scheduler import PRIORITY_HIGH, PRIORITY_LOW, QueueFull, RestScheduler
+from retention import RetentionPurger
+from search_index import SearchHit, SearchIndex, indexed_message
+from sla import ALL, BY_STAFF, BY_TYPE, FIRST_RESPONSE, RESOLUTION, SlaStats, SlaSummary
+from ticket_records import STATUS_CLOSED, STATUS_OPEN, STATUS_PURGED, TicketRecord, TicketRecordStore
+from ticket_types import TicketType
+from transcripts import TRANSCRIPT_FORMATS, TranscriptExporter
+
+# The process environment wins over .env, at startup and on /reload.
+_PROCESS_ENV = frozenset(os.environ)
+DOTENV_PATH = find_dotenv()
+load_dotenv(DOTENV_PATH or None)
+_dotenv_names = set(dotenv_values(DOTENV_PATH)) if DOTENV_PATH else set()
 
 # =========================
 # Config via .env
@@ -33,71 +80,514 @@ def _env_list(name: str, default: list[str] | None = None) -> list[str]:
     # comma-separated list
     return [x.strip() for x in v.split(",") if x.strip()]
 
+# Logging: one JSON object per line by default (LOG_FORMAT=text for humans)
+setup_logging(_env("LOG_FORMAT", "json"), _env("LOG_LEVEL", "INFO"))
+log = logging.getLogger("ticketbot")
+
 TOKEN = _env("DISCORD_TOKEN")
 if not TOKEN:
     raise RuntimeError("Missing DISCORD_TOKEN in .env")
 
-SERVER_NAME = _env("SERVER_NAME", "Your Discord Server")
-BRAND_ICON_URL = _env("BRAND_ICON_URL", "")  # optional
-BRAND_THUMB_URL = _env("BRAND_THUMB_URL", BRAND_ICON_URL)  # optional
+# Prometheus endpoint (optional), served on METRICS_HOST:METRICS_PORT/metrics
+METRICS_ENABLED = _env("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+METRICS_HOST = _env("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = _env_int("METRICS_PORT", 9108)
+
+# Reloadable settings: branding, ticket types (category + role names per type),
+# archive category and dashboard channel. The four built-in types read
+# CATEGORY_<TYPE>_ID and <TYPE>_ROLES; TICKET_TYPES_FILE can define any others.
+# CONFIG_FILE (JSON) can hold all of them; env vars win over it. .env and both
+# files are re-read by /reload and whenever they change (checked every
+# CONFIG_WATCH_SECONDS; 0 turns the watcher off).
+TICKET_TYPES_FILE = _env("TICKET_TYPES_FILE")
+CONFIG_FILE = _env("CONFIG_FILE")
+CONFIG_WATCH_SECONDS = _env_int("CONFIG_WATCH_SECONDS", 5)
+
+
+def load_config() -> BotConfig:
+    return load_bot_config(CONFIG_FILE, TICKET_TYPES_FILE, _env, _env_int, _env_list)
+
+
+BOT_CONFIG = load_config()
+SERVER_NAME = BOT_CONFIG.server_name
+BRAND_ICON_URL = BOT_CONFIG.brand_icon_url  # optional
+BRAND_THUMB_URL = BOT_CONFIG.brand_thumb_url  # optional
+TICKET_TYPES = BOT_CONFIG.ticket_types
+ARCHIVE_CATEGORY_ID = BOT_CONFIG.archive_category_id
+
+# Lean mode: no member/presence intents, no chunking; the members a ticket
+# needs (opener, closer) are fetched on demand into an LRU instead.
+LEAN_INTENTS = _env("LEAN_INTENTS", "false").lower() in ("1", "true", "yes")
+member_cache = MemberCache(capacity=_env_int("MEMBER_CACHE_SIZE", 5000))
+
+# Presence is sent with every IDENTIFY, so reconnects need no change_presence.
+bot_options = {
+    "activity": discord.Activity(type=discord.ActivityType.watching, name=_env("PRESENCE_TEXT", "seus tickets 👀")),
+    "status": discord.Status.online,
+}
+if LEAN_INTENTS:
+    intents = lean_intents()
+    bot_options.update(chunk_guilds_at_startup=False, member_cache_flags=discord.MemberCacheFlags.none())
+else:
+    intents = discord.Intents.all()
+
+# Sharding: SHARD_COUNT switches to AutoShardedBot; SHARD_IDS restricts this
+# process to some of the shards (launcher.py sets both, plus CLUSTER_ID).
+cluster = ClusterInfo(
+    cluster_id=_env_int("CLUSTER_ID", 0),
+    shard_count=_env_int("SHARD_COUNT"),
+    shard_ids=tuple(int(x) for x in _env_list("SHARD_IDS")) or None,
+)
+if cluster.sharded:
+    bot = commands.AutoShardedBot(
+        command_prefix="!",
+        intents=intents,
+        help_command=None,
+        shard_count=cluster.shard_count,
+        shard_ids=list(cluster.shard_ids) if cluster.shard_ids else None,
+        **bot_options,
+    )
+else:
+    bot = commands.Bot(command_prefix="!", intents=intents, help_command=None, **bot_options)
 
-# Category IDs for each ticket type
-CATEGORY_IDS = {
-    "suporte": _env_int("CATEGORY_SUPORTE_ID"),
-    "denúncia": _env_int("CATEGORY_DENUNCIA_ID"),
-    "financeiro": _env_int("CATEGORY_FINANCEIRO_ID"),
-    "roleplay": _env_int("CATEGORY_ROLEPLAY_ID"),
+COUNTERS_FILE = _env("COUNTERS_FILE", "ticket_counters.json")
+COUNTERS_BACKEND = _env("COUNTERS_BACKEND", "json")  # json | sqlite
+COUNTERS_DB = _env("COUNTERS_DB", "ticket_counters.db")
+if cluster.shard_ids and COUNTERS_BACKEND.lower() != "sqlite":
+    # Several workers share the counters; only the SQLite store is process-safe.
+    raise ValueError("SHARD_IDS requires COUNTERS_BACKEND=sqlite")
+
+# Counters are per guild ("<guild_id>:<type>"); the old per-type ones are
+# moved into their guild once by migrate_legacy_counters.
+counter_store = open_counter_store(COUNTERS_BACKEND, COUNTERS_FILE, COUNTERS_DB, {})
+
+
+# Transcripts (gzip files written under TRANSCRIPTS_DIR)
+TRANSCRIPTS_DIR = _env("TRANSCRIPTS_DIR", "transcripts")
+TRANSCRIPT_FORMAT = _env("TRANSCRIPT_FORMAT", "html")  # txt | html | jsonl
+if TRANSCRIPT_FORMAT not in TRANSCRIPT_FORMATS:
+    raise ValueError(f"TRANSCRIPT_FORMAT must be one of {TRANSCRIPT_FORMATS} (got {TRANSCRIPT_FORMAT!r})")
+
+transcript_exporter = TranscriptExporter(
+    TRANSCRIPTS_DIR,
+    max_concurrent=_env_int("TRANSCRIPT_MAX_CONCURRENT", 2),
+    max_buffer_bytes=_env_int("TRANSCRIPT_MEMORY_MB", 8) * 1024 * 1024,
+)
+
+
+# REST job scheduler: every ticket mutation goes through its priority queue
+rest = RestScheduler(
+    workers=_env_int("REST_WORKERS", 4),
+    max_queue=_env_int("REST_QUEUE_SIZE", 500),
+    max_retries=_env_int("REST_MAX_RETRIES", 3),
+)
+BUSY_MESSAGE = "⏳ O sistema está sobrecarregado no momento. Tente novamente em instantes."
+
+# Handlers acknowledge first and leave the slow part (creating or archiving a
+# ticket) to this bounded worker pool; transcripts get their own pool sized to
+# TRANSCRIPT_MAX_CONCURRENT so long exports never hold up ticket work
+background = BackgroundWorkers(
+    workers=_env_int("BACKGROUND_WORKERS", 4),
+    max_queue=_env_int("BACKGROUND_QUEUE_SIZE", 200),
+)
+transcript_jobs = BackgroundWorkers(
+    workers=_env_int("TRANSCRIPT_MAX_CONCURRENT", 2),
+    max_queue=_env_int("BACKGROUND_QUEUE_SIZE", 200),
+)
+
+# Double-click protection: one creation at a time per (guild, user, type), and
+# the created channel remembered for TICKET_IDEMPOTENCY_SECONDS
+ticket_locks = KeyedLocks()
+recent_tickets = TTLCache(ttl=_env_int("TICKET_IDEMPOTENCY_SECONDS", 60))
+
+# Ticket-opening limits as "<tickets>/<seconds>" per user, per ticket type and
+# per guild ("0" disables one). Guilds can override them live with /limites.
+RATE_LIMIT_SCOPES = {"user": "usuário", "type": "tipo", "guild": "servidor"}
+DEFAULT_RATE_LIMITS: dict[str, Limit | None] = {
+    "user": parse_limit(_env("TICKET_LIMIT_USER", "3/600")),
+    "type": parse_limit(_env("TICKET_LIMIT_TYPE", "20/60")),
+    "guild": parse_limit(_env("TICKET_LIMIT_GUILD", "40/60")),
 }
+# Buckets live in one LRU, so a raid of distinct users can't grow memory unbounded
+open_limiter = ScopedLimiter(maxsize=_env_int("TICKET_LIMIT_MAX_BUCKETS", 10_000))
+rate_limited_opens = Counter()
+
+# Optional pool of hidden pre-created channels per ticket category
+CHANNEL_POOL_ENABLED = _env("CHANNEL_POOL_ENABLED", "false").lower() in ("1", "true", "yes")
+CHANNEL_POOL_REFILL_SECONDS = _env_int("CHANNEL_POOL_REFILL_SECONDS", 30)
+channel_pool = ChannelPool(
+    rest,
+    low_watermark=_env_int("CHANNEL_POOL_LOW", 2),
+    high_watermark=_env_int("CHANNEL_POOL_HIGH", 5),
+)
+
+# Ticket lifecycle records (opener, type, number, timestamps, status, closer)
+TICKETS_DB = _env("TICKETS_DB", "tickets.db")
+ticket_records = TicketRecordStore(TICKETS_DB, owns=cluster.owns)
+
+# Full-text search over ticket conversations (/search). Ticket channel messages
+# are indexed as they arrive; on startup each ticket channel is caught up from
+# its last indexed message (SEARCH_BACKFILL=false skips the catch-up)
+SEARCH_DB = _env("SEARCH_DB", "search.db")
+SEARCH_BACKFILL = _env("SEARCH_BACKFILL", "true").lower() in ("1", "true", "yes")
+search_index = SearchIndex(SEARCH_DB)
+
+# First-response and resolution time percentiles (/stats), kept as streaming
+# sketches in memory and checkpointed to SLA_STATS_FILE every
+# SLA_CHECKPOINT_SECONDS; each worker of a cluster keeps its own file
+SLA_STATS_FILE = _env("SLA_STATS_FILE", "sla_stats.json")
+if cluster.shard_ids:
+    root, ext = os.path.splitext(SLA_STATS_FILE)
+    SLA_STATS_FILE = f"{root}-{cluster.cluster_id}{ext}"
+sla_stats = SlaStats(SLA_STATS_FILE, flush_delay=_env_int("SLA_CHECKPOINT_SECONDS", 60))
+
+# Per-guild overrides of the categories, role names and archive category
+# above, edited with /config and loaded lazily per guild
+GUILD_CONFIG_DB = _env("GUILD_CONFIG_DB", "guild_config.db")
+# Live staff dashboard (open tickets per type, oldest, unclaimed) posted in
+# DASHBOARD_CHANNEL_ID or the channel chosen with /painel; edits are coalesced
+# to at most one per DASHBOARD_INTERVAL_SECONDS per guild
+DASHBOARD_CHANNEL_ID = BOT_CONFIG.dashboard_channel_id
+DASHBOARD_INTERVAL_SECONDS = _env_int("DASHBOARD_INTERVAL_SECONDS", 10)
+
+guild_configs = GuildConfigStore(GUILD_CONFIG_DB, TICKET_TYPES, ARCHIVE_CATEGORY_ID, DASHBOARD_CHANNEL_ID)
+
+# Auto-assignment: each new ticket goes to the type's staff member holding the
+# fewest open tickets (online members first with PREFER_ONLINE), who is pinged
+# instead of the whole staff roles. Needs the member cache (not LEAN_INTENTS)
+AUTO_ASSIGN = _env("AUTO_ASSIGN", "false").lower() in ("1", "true", "yes")
+AUTO_ASSIGN_PREFER_ONLINE = _env("AUTO_ASSIGN_PREFER_ONLINE", "true").lower() in ("1", "true", "yes")
+staff_assigner = StaffAssigner(prefer_online=AUTO_ASSIGN_PREFER_ONLINE)
+
+# Archived tickets spill into overflow categories once the archive category
+# holds 50 channels. With a retention period, archived tickets older than it
+# are exported (transcript) and deleted in the background, in batches, with
+# at most CONCURRENCY in flight and deletions paced by RATE ("<count>/<seconds>").
+archive_rotation = ArchiveRotation()
+ARCHIVE_RETENTION_DAYS = _env_int("ARCHIVE_RETENTION_DAYS", 0)
+ARCHIVE_PURGE_INTERVAL_MINUTES = _env_int("ARCHIVE_PURGE_INTERVAL_MINUTES", 60)
+retention = RetentionPurger(
+    ARCHIVE_RETENTION_DAYS * 86400,
+    batch_size=_env_int("ARCHIVE_PURGE_BATCH", 25),
+    concurrency=_env_int("ARCHIVE_PURGE_CONCURRENCY", 1),
+    budget=parse_limit(_env("ARCHIVE_PURGE_RATE", "10/60")) or (10, 60.0),
+)
+
+# Shard heartbeats shared by every worker, shown by /shards; the store is
+# opened in setup_hook, so importing main (benchmarks) creates no database.
+CLUSTER_DB = _env("CLUSTER_DB", "cluster.db")
+SHARD_HEARTBEAT_SECONDS = _env_int("SHARD_HEARTBEAT_SECONDS", 15)
+shard_health: ShardHealthStore | None = None
+
+# Auto-close of idle tickets: a type's inactivity_minutes (or <TYPE>_INACTIVITY_MINUTES),
+# else this default; 0 disables it. A warning is posted WARNING minutes before.
+TICKET_INACTIVITY_MINUTES = _env_int("TICKET_INACTIVITY_MINUTES", 0)
+TICKET_INACTIVITY_WARNING_MINUTES = _env_int("TICKET_INACTIVITY_WARNING_MINUTES", 60)
+inactivity = InactivityTracker()
+
+# Slash commands are only synced when the tree's hash differs from the last
+# synced one (or with --force-sync)
+COMMAND_SYNC_FILE = _env("COMMAND_SYNC_FILE", "command_sync.json")
+command_sync = CommandSyncState(COMMAND_SYNC_FILE)
+FORCE_SYNC = False
 
-ARCHIVE_CATEGORY_ID = _env_int("ARCHIVE_CATEGORY_ID")
 
-# Role names that can view each ticket type (comma-separated in .env)
-SUPORTE_ROLES = _env_list("SUPORTE_ROLES", ["Support", "Moderator", "Admin"])
-DENUNCIA_ROLES = _env_list("DENUNCIA_ROLES", ["Moderator", "Admin"])
-FINANCEIRO_ROLES = _env_list("FINANCEIRO_ROLES", ["Admin"])
-ROLEPLAY_ROLES = _env_list("ROLEPLAY_ROLES", ["Roleplay Team", "Admin"])
+# =========================
+# Role cache
+# =========================
+class RoleCache:
+    """Per-guild ticket type -> role ids, resolved once from the guild's configured names."""
 
-intents = discord.Intents.all()
-bot = commands.Bot(command_prefix="!", intents=intents, help_command=None)
+    def __init__(self):
+        self._ordered: dict[int, dict[str, tuple[int, ...]]] = {}
+        self._by_type: dict[int, dict[str, frozenset[int]]] = {}
+        self._staff: dict[int, frozenset[int]] = {}
+
+    def _resolve(self, guild: discord.Guild):
+        # Same precedence as discord.utils.get: first role with the name wins.
+        ids_by_name: dict[str, int] = {}
+        for role in guild.roles:
+            ids_by_name.setdefault(role.name, role.id)
+
+        config = guild_configs.get(guild.id)
+        ordered = {
+            ticket_type.key: tuple(
+                dict.fromkeys(ids_by_name[name] for name in config.role_names(ticket_type) if name in ids_by_name)
+            )
+            for ticket_type in TICKET_TYPES
+        }
+        self._ordered[guild.id] = ordered
+        self._by_type[guild.id] = {ticket_type: frozenset(ids) for ticket_type, ids in ordered.items()}
+        self._staff[guild.id] = frozenset().union(*ordered.values())
 
-ticket_counters = {"suporte": 0, "denúncia": 0, "financeiro": 0, "roleplay": 0}
+    def role_ids(self, guild: discord.Guild, ticket_type: str) -> frozenset[int]:
+        if guild.id not in self._by_type:
+            self._resolve(guild)
+        return self._by_type[guild.id].get(ticket_type.lower(), frozenset())
 
-COUNTERS_FILE = _env("COUNTERS_FILE", "ticket_counters.json")
+    def staff_role_ids(self, guild: discord.Guild) -> frozenset[int]:
+        if guild.id not in self._staff:
+            self._resolve(guild)
+        return self._staff[guild.id]
 
+    def roles(self, guild: discord.Guild, ticket_type: str) -> list[discord.Role]:
+        if guild.id not in self._ordered:
+            self._resolve(guild)
+        role_ids = self._ordered[guild.id].get(ticket_type.lower(), ())
+        return [role for role in map(guild.get_role, role_ids) if role]
 
-def save_ticket_counters():
-    try:
-        with open(COUNTERS_FILE, "w", encoding="utf-8") as f:
-            json.dump(ticket_counters, f, indent=4, ensure_ascii=False)
-        print(f"Contadores salvos: {ticket_counters}")
-    except Exception as e:
-        print(f"Erro ao salvar contadores: {e}")
+    def invalidate(self, guild_id: int):
+        self._ordered.pop(guild_id, None)
+        self._by_type.pop(guild_id, None)
+        self._staff.pop(guild_id, None)
 
+    def clear(self):
+        self._ordered, self._by_type, self._staff = {}, {}, {}
 
-def load_ticket_counters():
-    global ticket_counters
-    try:
-        if os.path.exists(COUNTERS_FILE):
-            with open(COUNTERS_FILE, "r", encoding="utf-8") as f:
-                loaded_counters = json.load(f)
-                print(f"Contadores carregados do arquivo: {loaded_counters}")
-                ticket_counters.update(loaded_counters)
-                print(f"Contadores atualizados: {ticket_counters}")
-        else:
-            print("Arquivo de contadores não encontrado, criando novo...")
-            save_ticket_counters()
-    except Exception as e:
-        print(f"Erro ao carregar contadores: {e}")
-        save_ticket_counters()
+
+role_cache = RoleCache()
+
+
+def has_any_role(member: discord.Member, role_ids: frozenset[int]) -> bool:
+    return not role_ids.isdisjoint(role.id for role in member.roles)
+
+
+# =========================
+# Open-ticket index
+# =========================
+# Channel topics end with "(<user id>)" so the opener survives restarts.
+TOPIC_OPENER_RE = re.compile(r"\((\d{15,21})\)\s*$")
+
+
+class OpenTicketIndex:
+    """Maps (guild_id, user_id, ticket_type) to the open ticket channel id."""
+
+    def __init__(self):
+        self._by_key: dict[tuple[int, int, str], int] = {}
+        self._by_channel: dict[int, list[tuple[int, int, str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_channel)
+
+    def get(self, guild_id: int, user_id: int, ticket_type: str) -> int | None:
+        return self._by_key.get((guild_id, user_id, ticket_type.lower()))
+
+    def add(self, guild_id: int, user_id: int, ticket_type: str, channel_id: int):
+        key = (guild_id, user_id, ticket_type.lower())
+        self._by_key[key] = channel_id
+        keys = self._by_channel.setdefault(channel_id, [])
+        if key not in keys:
+            keys.append(key)
+
+    def discard_channel(self, channel_id: int):
+        for key in self._by_channel.pop(channel_id, []):
+            if self._by_key.get(key) == channel_id:
+                del self._by_key[key]
+
+    def track(self, channel: discord.abc.GuildChannel):
+        """(Re)index a single channel from its category, name and topic."""
+        self.discard_channel(channel.id)
+        if not isinstance(channel, discord.TextChannel):
+            return
+
+        ticket_type = guild_configs.get(channel.guild.id).ticket_type_for_category(channel.category_id)
+        if not ticket_type or not channel.name.startswith(ticket_type.prefix):
+            return
+
+        for user_id in self._openers(channel):
+            self.add(channel.guild.id, user_id, ticket_type.key, channel.id)
+
+    def rebuild(self, guild: discord.Guild):
+        for channel_id, keys in list(self._by_channel.items()):
+            if keys and keys[0][0] == guild.id:
+                self.discard_channel(channel_id)
+
+        config = guild_configs.get(guild.id)
+        for ticket_type in TICKET_TYPES:
+            category_id = config.category_id(ticket_type)
+            category = guild.get_channel(category_id) if category_id else None
+            if isinstance(category, discord.CategoryChannel):
+                for channel in category.text_channels:
+                    self.track(channel)
+
+    @staticmethod
+    def _openers(channel: discord.TextChannel) -> list[int]:
+        match = TOPIC_OPENER_RE.search(channel.topic or "")
+        if match:
+            return [int(match.group(1))]
+
+        # Tickets created before the topic carried the opener id: fall back to
+        # every non-bot member that was explicitly given access to the channel.
+        me_id = channel.guild.me.id if channel.guild.me else None
+        openers = []
+        for target, overwrite in channel.overwrites.items():
+            if isinstance(target, discord.Role) or target.id == me_id:
+                continue
+            if isinstance(target, discord.Object) and target.type is not discord.Member:
+                continue
+            if getattr(target, "bot", False) or not overwrite.read_messages:
+                continue
+            openers.append(target.id)
+        return openers
+
+
+open_tickets = OpenTicketIndex()
+archive_stats = ArchiveStats()
 
 
-async def get_roles_by_names(guild: discord.Guild, role_names: list[str]):
-    roles = []
-    for role_name in role_names:
-        role = discord.utils.get(guild.roles, name=role_name)
-        if role:
-            roles.append(role)
-    return roles
+# =========================
+# Metrics
+# =========================
+tickets_opened = registry.counter("ticketbot_tickets_opened_total", "Tickets opened.", ("type",))
+duplicate_tickets_prevented = registry.counter(
+    "ticketbot_duplicate_tickets_prevented_total",
+    "Ticket creations refused because the same user's ticket of that type was in flight or just created.",
+    ("stage",),
+)
+tickets_rate_limited = registry.counter(
+    "ticketbot_tickets_rate_limited_total", "Ticket openings refused by the per-scope rate limits.", ("scope",)
+)
+tickets_assigned = registry.counter(
+    "ticketbot_tickets_assigned_total", "Tickets given to a staff member, by how (reply, claim, transfer, auto).", ("mode",)
+)
+config_reloads = registry.counter(
+    "ticketbot_config_reloads_total", "Config reloads by result (applied, unchanged, invalid).", ("result",)
+)
+tickets_auto_closed = registry.counter(
+    "ticketbot_tickets_auto_closed_total", "Tickets archived automatically after going idle.", ("type",)
+)
+tickets_closed = registry.counter("ticketbot_tickets_closed_total", "Tickets closed.", ("type",))
+ticket_open_latency = registry.histogram(
+    "ticketbot_ticket_open_seconds", "Time to get a ticket channel ready, by pooled or cold creation.", ("mode",)
+)
+discord_rate_limits = registry.counter(
+    "ticketbot_discord_rate_limit_warnings_total", "Rate-limit warnings logged by discord.py."
+)
+logging.getLogger("discord.http").addHandler(RateLimitLogCounter(discord_rate_limits))
+
+
+def _open_tickets_by_type() -> dict:
+    counts = {ticket_type.key: 0 for ticket_type in TICKET_TYPES}
+    for record in ticket_records.open_records():
+        counts[record.ticket_type] = counts.get(record.ticket_type, 0) + 1
+    return counts
+
+
+registry.callback("ticketbot_open_tickets", "Open tickets per type.", ("type",), _open_tickets_by_type)
+registry.callback(
+    "ticketbot_rest_calls_total", "REST calls issued by the scheduler per route.", ("route",),
+    lambda: dict(rest.stats.calls_by_route), kind="counter",
+)
+registry.callback(
+    "ticketbot_rest_rate_limited_total", "429 responses seen by the scheduler.", (),
+    lambda: {(): rest.stats.rate_limited}, kind="counter",
+)
+registry.callback(
+    "ticketbot_rest_errors_total", "Scheduler jobs by failure outcome.", ("outcome",),
+    lambda: {"failed": rest.stats.failed, "rejected": rest.stats.rejected, "retried": rest.stats.retries},
+    kind="counter",
+)
+registry.callback("ticketbot_rest_queue_depth", "Jobs waiting in the REST scheduler.", (), lambda: {(): rest.depth})
+registry.callback(
+    "ticketbot_rest_queue_wait_seconds_mean", "Mean queue wait per priority class.", ("priority",),
+    lambda: {str(p): rest.stats.mean_wait(p) for p in list(rest.stats.wait_count)},
+)
+registry.callback(
+    "ticketbot_rest_queue_wait_seconds_max", "Max queue wait per priority class.", ("priority",),
+    lambda: {str(p): value for p, value in rest.stats.wait_max.items()},
+)
+registry.callback(
+    "ticketbot_archive_rest_calls_total", "REST calls made by archive_ticket, and what the old flow would have made.",
+    ("flow",), lambda: {"planned": archive_stats.calls, "legacy": archive_stats.legacy_calls}, kind="counter",
+)
+archive_failures = registry.counter("ticketbot_archive_failures_total", "Tickets that could not be archived.")
+registry.callback(
+    "ticketbot_archive_overflow_created_total", "Overflow archive categories created because the others were full.",
+    (), lambda: {(): archive_rotation.overflows_created}, kind="counter",
+)
+registry.callback(
+    "ticketbot_tickets_purged_total", "Archived tickets exported and deleted by the retention purge.",
+    (), lambda: {(): retention.purged}, kind="counter",
+)
+registry.callback(
+    "ticketbot_idle_tracked_tickets", "Open tickets with an inactivity deadline.", (), lambda: {(): len(inactivity)},
+)
+registry.callback(
+    "ticketbot_member_cache_size", "Members held in the on-demand LRU (lean mode).", (), lambda: {(): len(member_cache)},
+)
+registry.callback(
+    "ticketbot_member_cache_lookups_total", "On-demand member lookups by outcome.", ("outcome",),
+    lambda: {"hit": member_cache.hits, "fetch": member_cache.fetches, "evicted": member_cache.evictions},
+    kind="counter",
+)
+
+
+def run_in_background(
+    interaction: discord.Interaction, handler: str, factory, pool: BackgroundWorkers = background
+):
+    """Queue the rest of an acknowledged handler; its end-to-end latency is recorded when the job ends."""
+    interaction.extras["background"] = True
+    pool.submit(
+        handler, factory, on_done=lambda _: interaction_e2e_latency.observe(interaction_age(interaction), handler=handler)
+    )
+
+
+registry.callback(
+    "ticketbot_background_jobs", "Background jobs waiting or running, per pool.", ("pool", "state"),
+    lambda: {
+        (name, state): value
+        for name, pool in (("tickets", background), ("transcripts", transcript_jobs))
+        for state, value in (("queued", pool.depth), ("running", pool.active))
+    },
+)
+registry.callback(
+    "ticketbot_background_jobs_total", "Background jobs finished or refused, per pool.", ("pool", "outcome"),
+    lambda: {
+        (name, outcome): value
+        for name, pool in (("tickets", background), ("transcripts", transcript_jobs))
+        for outcome, value in (("completed", pool.completed), ("failed", pool.failed), ("rejected", pool.rejected))
+    },
+    kind="counter",
+)
+
+
+# =========================
+# Shards
+# =========================
+def shard_rows() -> list[ShardHealth]:
+    """Health of the shards this process runs (shard 0 when unsharded)."""
+    now = time.time()
+    guilds = Counter(guild.shard_id for guild in bot.guilds)
+    if isinstance(bot, commands.AutoShardedBot):
+        shards = [(shard_id, info.is_closed(), info.latency) for shard_id, info in bot.shards.items()]
+    else:
+        shards = [(0, bot.is_closed() or not bot.is_ready(), bot.latency)]
+    return [
+        ShardHealth(
+            shard_id, cluster.cluster_id, os.getpid(), "down" if closed else "up",
+            latency if math.isfinite(latency) else None, guilds.get(shard_id, 0), now,
+        )
+        for shard_id, closed, latency in shards
+    ]
+
+
+async def shard_heartbeat():
+    while True:
+        try:
+            await shard_health.write(shard_rows())
+        except Exception:
+            log.exception("Erro ao registrar saúde dos shards")
+        await asyncio.sleep(SHARD_HEARTBEAT_SECONDS)
+
+
+registry.callback(
+    "ticketbot_shard_latency_seconds", "Gateway heartbeat latency per shard run by this process.", ("shard",),
+    lambda: {str(row.shard_id): row.latency for row in shard_rows() if row.latency is not None},
+)
+registry.callback(
+    "ticketbot_shard_up", "1 if the shard's gateway connection is up.", ("shard",),
+    lambda: {str(row.shard_id): int(row.status == "up") for row in shard_rows()},
+)
 
 
 def brand_footer(text: str) -> dict:
@@ -112,10 +602,10 @@ def brand_thumbnail(embed: discord.Embed):
         embed.set_thumbnail(url=BRAND_THUMB_URL)
 
 
-async def create_ticket_channel(interaction: discord.Interaction, ticket_type: str, user: discord.Member):
+async def create_ticket_channel(interaction: discord.Interaction, ticket_type: TicketType, user: discord.Member):
     guild = interaction.guild
+    category_id = guild_configs.get(guild.id).category_id(ticket_type)
 
-    category_id = CATEGORY_IDS.get(ticket_type.lower())
     if not category_id:
         return None
 
@@ -123,65 +613,65 @@ async def create_ticket_channel(interaction: discord.Interaction, ticket_type: s
     if not category:
         return None
 
-    ticket_counters[ticket_type.lower()] += 1
-    ticket_number = ticket_counters[ticket_type.lower()]
-
-    save_ticket_counters()
+    if rest.saturated:
+        raise QueueFull("REST queue saturated")
 
-    print(f"Criando ticket {ticket_type} #{ticket_number}")
-
-    channel_name = f"{ticket_type.lower()}-{ticket_number}"
-    overwrites = {
-        guild.default_role: discord.PermissionOverwrite(read_messages=False),
-        user: discord.PermissionOverwrite(read_messages=True, send_messages=True),
-    }
+    ticket_number = await counter_store.increment(guild_counter(guild.id, ticket_type.key))
 
-    if ticket_type.lower() == "suporte":
-        roles_with_access = await get_roles_by_names(guild, SUPORTE_ROLES)
-    elif ticket_type.lower() == "denúncia":
-        roles_with_access = await get_roles_by_names(guild, DENUNCIA_ROLES)
-    elif ticket_type.lower() == "roleplay":
-        roles_with_access = await get_roles_by_names(guild, ROLEPLAY_ROLES)
-    elif ticket_type.lower() == "financeiro":
-        roles_with_access = await get_roles_by_names(guild, FINANCEIRO_ROLES)
-    else:
-        roles_with_access = []
+    log.info("Criando ticket", extra={"ticket_type": ticket_type.key, "number": ticket_number, "guild_id": guild.id})
 
-    for role in roles_with_access:
-        overwrites[role] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
+    channel_name = f"{ticket_type.prefix}{ticket_number}"
+    overwrites = ticket_type.build_overwrites(
+        guild, user, role_cache.roles(guild, ticket_type.key), guild.me
+    )
 
-    bot_member = guild.get_member(bot.user.id)
-    if bot_member:
-        overwrites[bot_member] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
+    topic = f"Ticket de {ticket_type.label} - {user.display_name} ({user.id})"
 
-    ticket_channel = await category.create_text_channel(
-        name=channel_name,
-        overwrites=overwrites,
-        topic=f"Ticket de {ticket_type} - {user.display_name}",
+    started = time.perf_counter()
+    pooled = channel_pool.claim(category) if CHANNEL_POOL_ENABLED else None
+    if pooled:
+        try:
+            ticket_channel = await rest.submit(
+                f"channel_edit:{pooled.id}",
+                lambda: pooled.edit(name=channel_name, topic=topic, overwrites=overwrites),
+                ticket_type.rest_priority,
+            )
+        except Exception:
+            # The edit never applied: the channel is still a hidden pool-*
+            # channel, so it goes back to the pool instead of being orphaned.
+            channel_pool.track(pooled)
+            raise
+        ticket_channel = ticket_channel or pooled
+    else:
+        ticket_channel = await rest.submit(
+            f"channel_create:{guild.id}",
+            lambda: category.create_text_channel(name=channel_name, overwrites=overwrites, topic=topic),
+            ticket_type.rest_priority,
+        )
+    elapsed = time.perf_counter() - started
+    channel_pool.record_latency("pooled" if pooled else "cold", elapsed)
+    ticket_open_latency.observe(elapsed, mode="pooled" if pooled else "cold")
+    tickets_opened.inc(type=ticket_type.key)
+
+    open_tickets.add(guild.id, user.id, ticket_type.key, ticket_channel.id)
+    member_cache.put(user)
+    await ticket_records.record_open(ticket_channel.id, guild.id, user.id, ticket_type.key, ticket_number)
+    await search_index.upsert_ticket(
+        ticket_channel.id, guild.id, channel_name, ticket_type.key, user.id, ticket_number
     )
+    track_inactivity(ticket_channel.id, ticket_type)
+    refresh_dashboard(guild.id)
 
     return ticket_channel
 
 
-async def create_ticket_embed(ticket_type: str, user: discord.Member, description: str | None = None):
-    colors = {
-        "Suporte": 0x3498DB,
-        "Denúncia": 0xE74C3C,
-        "Financeiro": 0x2ECC71,
-        "Roleplay": 0x9B59B6,
-    }
-
-    descriptions = {
-        "Suporte": "🔧 **Atendimento de Suporte**\nNossa equipe irá ajudar com dúvidas e problemas técnicos.",
-        "Denúncia": "🚨 **Central de Denúncias**\nRelate situações que violem regras e diretrizes.",
-        "Financeiro": "💰 **Departamento Financeiro**\nAtendimento sobre pagamentos, reembolsos e doações.",
-        "Roleplay": "🎭 **Equipe Roleplay**\nSolicitações, histórias, personagens e assuntos de RP.",
-    }
-
+async def create_ticket_embed(
+    ticket_type: TicketType, user: discord.Member, description: str | None = None, ticket_number: int | None = None
+):
     embed = discord.Embed(
-        title=f"🎫 {ticket_type.upper()} - {SERVER_NAME}",
-        description=descriptions.get(ticket_type, ""),
-        color=colors.get(ticket_type, 0x3498DB),
+        title=f"🎫 {ticket_type.label.upper()} - {SERVER_NAME}",
+        description=ticket_type.description,
+        color=ticket_type.color,
         timestamp=datetime.datetime.utcnow(),
     )
 
@@ -198,21 +688,19 @@ async def create_ticket_embed(ticket_type: str, user: discord.Member, descriptio
     embed.add_field(
         name="📋 **DETALHES DO TICKET**",
         value=(
-            f"• **Tipo:** {ticket_type}\n"
+            f"• **Tipo:** {ticket_type.label}\n"
             f"• **Status:** 🟢 **Aberto**\n"
             f"• **Criado em:** {discord.utils.format_dt(datetime.datetime.now(), 'F')}"
         ),
         inline=True,
     )
 
-    priorities = {"Suporte": "🟡 Média", "Denúncia": "🔴 Alta", "Financeiro": "🟢 Normal", "Roleplay": "🟣 Especial"}
-
     embed.add_field(
         name="⚡ **INFORMAÇÕES DO ATENDIMENTO**",
         value=(
-            f"• **Prioridade:** {priorities.get(ticket_type, '🟡 Média')}\n"
-            f"• **Setor:** {ticket_type}\n"
-            f"• **Ticket ID:** `{ticket_counters[ticket_type.lower()]}`"
+            f"• **Prioridade:** {ticket_type.priority}\n"
+            f"• **Setor:** {ticket_type.label}\n"
+            f"• **Ticket ID:** `{ticket_number}`"
         ),
         inline=True,
     )
@@ -238,33 +726,45 @@ async def create_ticket_embed(ticket_type: str, user: discord.Member, descriptio
     return embed
 
 
-class TicketMenuView(discord.ui.View):
-    def __init__(self):
-        super().__init__(timeout=None)
+def find_open_ticket(guild: discord.Guild, user_id: int, ticket_type: TicketType) -> discord.abc.GuildChannel | None:
+    key = (guild.id, user_id, ticket_type.key)
+    channel_id = recent_tickets.get(key) or open_tickets.get(*key)
+    channel = guild.get_channel(channel_id) if channel_id else None
+    if channel_id and not channel:
+        open_tickets.discard_channel(channel_id)
+        recent_tickets.pop(key)
+    return channel
+
 
-    @discord.ui.button(label="📋 Suporte", style=discord.ButtonStyle.primary, custom_id="persistent:ticket_support")
-    async def support_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.handle_ticket_creation(interaction, "Suporte")
+class TicketTypeButton(discord.ui.Button):
+    def __init__(self, ticket_type: TicketType):
+        super().__init__(label=ticket_type.button_label, style=ticket_type.style, custom_id=ticket_type.custom_id)
+        self.ticket_type = ticket_type
+
+    async def callback(self, interaction: discord.Interaction):
+        await self.view.handle_ticket_creation(interaction, self.ticket_type)
 
-    @discord.ui.button(label="🚨 Denúncia", style=discord.ButtonStyle.danger, custom_id="persistent:ticket_report")
-    async def report_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.handle_ticket_creation(interaction, "Denúncia")
 
-    @discord.ui.button(label="🎭 Roleplay", style=discord.ButtonStyle.secondary, custom_id="persistent:ticket_roleplay")
-    async def roleplay_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.handle_ticket_creation(interaction, "Roleplay")
+def rate_limit_checks(guild: discord.Guild, user_id: int, ticket_type: TicketType) -> list:
+    guild_config = guild_configs.get(guild.id)
+    keys = {"user": (guild.id, user_id), "type": (guild.id, ticket_type.key), "guild": guild.id}
+    return [(scope, key, guild_config.rate_limit(scope, DEFAULT_RATE_LIMITS[scope])) for scope, key in keys.items()]
 
-    @discord.ui.button(label="💰 Financeiro", style=discord.ButtonStyle.success, custom_id="persistent:ticket_financial")
-    async def financial_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.handle_ticket_creation(interaction, "Financeiro")
 
-    async def handle_ticket_creation(self, interaction: discord.Interaction, ticket_type: str):
+class TicketMenuView(discord.ui.View):
+    def __init__(self):
+        super().__init__(timeout=None)
+        for ticket_type in TICKET_TYPES:
+            self.add_item(TicketTypeButton(ticket_type))
+
+    @instrument("handle_ticket_creation")
+    async def handle_ticket_creation(self, interaction: discord.Interaction, ticket_type: TicketType):
         guild = interaction.guild
         user = interaction.user
+        category_id = guild_configs.get(guild.id).category_id(ticket_type)
 
-        category_id = CATEGORY_IDS.get(ticket_type.lower())
         if not category_id:
-            await interaction.response.send_message("❌ Categoria não configurada (env).", ephemeral=True)
+            await interaction.response.send_message("❌ Categoria não configurada (`/config`).", ephemeral=True)
             return
 
         category = guild.get_channel(category_id)
@@ -272,35 +772,62 @@ class TicketMenuView(discord.ui.View):
             await interaction.response.send_message("❌ Categoria não encontrada.", ephemeral=True)
             return
 
-        for channel in category.channels:
-            if user in channel.members:
-                embed = discord.Embed(
-                    title=f"🎫 **TICKET JÁ ABERTO - {SERVER_NAME}**",
-                    description=f"Olá {user.mention}, você já possui um ticket deste tipo em andamento.",
-                    color=0xF39C12,
-                    timestamp=datetime.datetime.utcnow(),
-                )
-                embed.add_field(
-                    name="📋 **TICKET ATUAL**",
-                    value=(
-                        f"• **Canal:** {channel.mention}\n"
-                        f"• **Tipo:** {ticket_type}\n"
-                        f"• **Status:** 🟡 **Em Andamento**\n"
-                        f"• **Aberto há:** {discord.utils.format_dt(channel.created_at, 'R')}"
-                    ),
-                    inline=False,
-                )
-                embed.set_footer(**brand_footer(f"{SERVER_NAME} | Sistema de Tickets"))
-                brand_thumbnail(embed)
-                await interaction.response.send_message(embed=embed, ephemeral=True)
-                return
+        if ticket_locks.locked((guild.id, user.id, ticket_type.key)):
+            duplicate_tickets_prevented.inc(stage="button")
+            await interaction.response.send_message("⏳ Seu ticket já está sendo criado, aguarde um instante.", ephemeral=True)
+            return
+
+        channel = find_open_ticket(guild, user.id, ticket_type)
+
+        if channel:
+            # A pooled channel was created long before its ticket was opened.
+            record = ticket_records.get_open(channel.id)
+            opened_at = record.opened_datetime if record else channel.created_at
+            embed = discord.Embed(
+                title=f"🎫 **TICKET JÁ ABERTO - {SERVER_NAME}**",
+                description=f"Olá {user.mention}, você já possui um ticket deste tipo em andamento.",
+                color=0xF39C12,
+                timestamp=datetime.datetime.utcnow(),
+            )
+            embed.add_field(
+                name="📋 **TICKET ATUAL**",
+                value=(
+                    f"• **Canal:** {channel.mention}\n"
+                    f"• **Tipo:** {ticket_type.label}\n"
+                    f"• **Status:** 🟡 **Em Andamento**\n"
+                    f"• **Aberto há:** {discord.utils.format_dt(opened_at, 'R')}"
+                ),
+                inline=False,
+            )
+            embed.set_footer(**brand_footer(f"{SERVER_NAME} | Sistema de Tickets"))
+            brand_thumbnail(embed)
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+
+        # After the existing-ticket reply, which needs no REST call: under load
+        # a user with an open ticket still gets the link to it.
+        if rest.saturated:
+            await interaction.response.send_message(BUSY_MESSAGE, ephemeral=True)
+            return
+
+        scope, retry_after = open_limiter.acquire(rate_limit_checks(guild, user.id, ticket_type))
+        if scope:
+            tickets_rate_limited.inc(scope=scope)
+            rate_limited_opens[(guild.id, scope)] += 1
+            retry_at = discord.utils.utcnow() + datetime.timedelta(seconds=retry_after)
+            await interaction.response.send_message(
+                f"⏳ Muitos tickets abertos ({RATE_LIMIT_SCOPES[scope]}). "
+                f"Tente novamente {discord.utils.format_dt(retry_at, 'R')}.",
+                ephemeral=True,
+            )
+            return
 
         modal = TicketModal(ticket_type)
         await interaction.response.send_modal(modal)
 
 
 class TicketModal(discord.ui.Modal, title="Abrir Ticket"):
-    def __init__(self, ticket_type: str):
+    def __init__(self, ticket_type: TicketType):
         super().__init__()
         self.ticket_type = ticket_type
         self.description = discord.ui.TextInput(
@@ -312,35 +839,74 @@ class TicketModal(discord.ui.Modal, title="Abrir Ticket"):
         )
         self.add_item(self.description)
 
+    @instrument("on_submit")
     async def on_submit(self, interaction: discord.Interaction):
         await interaction.response.defer(thinking=True, ephemeral=True)
+        queued = background.backlogged
+        try:
+            run_in_background(interaction, "on_submit", lambda: self.create_ticket(interaction))
+        except QueueFull:
+            await interaction.followup.send(BUSY_MESSAGE, ephemeral=True)
+            return
+        if queued:
+            await interaction.followup.send("⏳ Muitos pedidos agora; seu ticket está na fila e será criado em instantes.", ephemeral=True)
+
+    async def create_ticket(self, interaction: discord.Interaction):
+        try:
+            await self._create_ticket(interaction)
+        except Exception:
+            log.exception(
+                "Erro ao criar ticket",
+                extra={"ticket_type": self.ticket_type.key, "guild_id": interaction.guild.id, "user_id": interaction.user.id},
+            )
+            await interaction.followup.send("❌ Erro ao criar ticket.", ephemeral=True)
+
+    async def _create_ticket(self, interaction: discord.Interaction):
+        key = (interaction.guild.id, interaction.user.id, self.ticket_type.key)
+        async with ticket_locks.hold(key):
+            # Re-check under the lock: a second modal from a double-click may
+            # have been submitted while the first one was creating the channel.
+            existing = find_open_ticket(interaction.guild, interaction.user.id, self.ticket_type)
+            if existing:
+                duplicate_tickets_prevented.inc(stage="submit")
+                await interaction.followup.send(
+                    f"🎫 Você já possui um ticket de **{self.ticket_type.label}** aberto: {existing.mention}",
+                    ephemeral=True,
+                )
+                return
+            try:
+                ticket_channel = await create_ticket_channel(interaction, self.ticket_type, interaction.user)
+            except QueueFull:
+                await interaction.followup.send(BUSY_MESSAGE, ephemeral=True)
+                return
+            if ticket_channel:
+                recent_tickets.put(key, ticket_channel.id)
 
-        ticket_channel = await create_ticket_channel(interaction, self.ticket_type, interaction.user)
         if not ticket_channel:
             await interaction.followup.send("❌ Erro ao criar ticket.", ephemeral=True)
             return
 
-        embed = await create_ticket_embed(self.ticket_type, interaction.user, self.description.value)
+        ticket_number = ticket_records.get_open(ticket_channel.id).number
+        embed = await create_ticket_embed(self.ticket_type, interaction.user, self.description.value, ticket_number)
         view = TicketControlView()
 
-        if self.ticket_type.lower() == "suporte":
-            roles = await get_roles_by_names(interaction.guild, SUPORTE_ROLES)
-        elif self.ticket_type.lower() == "denúncia":
-            roles = await get_roles_by_names(interaction.guild, DENUNCIA_ROLES)
-        elif self.ticket_type.lower() == "roleplay":
-            roles = await get_roles_by_names(interaction.guild, ROLEPLAY_ROLES)
-        elif self.ticket_type.lower() == "financeiro":
-            roles = await get_roles_by_names(interaction.guild, FINANCEIRO_ROLES)
+        assignee = await auto_assign(interaction.guild, self.ticket_type, ticket_channel.id)
+        if assignee:
+            embed.add_field(name="🙋 **RESPONSÁVEL**", value=assignee.mention, inline=False)
+            mention = assignee.mention
         else:
-            roles = []
+            roles = role_cache.roles(interaction.guild, self.ticket_type.key)
+            mention = " ".join(role.mention for role in roles)
 
-        mention = " ".join(role.mention for role in roles if role)
-
-        await ticket_channel.send(content=f"{interaction.user.mention} {mention}".strip(), embed=embed, view=view)
+        await rest.submit(
+            f"message:{ticket_channel.id}",
+            lambda: ticket_channel.send(content=f"{interaction.user.mention} {mention}".strip(), embed=embed, view=view),
+            self.ticket_type.rest_priority,
+        )
 
         confirm_embed = discord.Embed(
             title="✅ **TICKET CRIADO!**",
-            description=f"Seu ticket de **{self.ticket_type}** foi criado e a equipe foi notificada.",
+            description=f"Seu ticket de **{self.ticket_type.label}** foi criado e a equipe foi notificada.",
             color=0x2ECC71,
             timestamp=datetime.datetime.utcnow(),
         )
@@ -349,8 +915,8 @@ class TicketModal(discord.ui.Modal, title="Abrir Ticket"):
             name="📋 **DETALHES**",
             value=(
                 f"• **Canal:** {ticket_channel.mention}\n"
-                f"• **Tipo:** {self.ticket_type}\n"
-                f"• **Número:** `{ticket_counters[self.ticket_type.lower()]}`"
+                f"• **Tipo:** {self.ticket_type.label}\n"
+                f"• **Número:** `{ticket_number}`"
             ),
             inline=False,
         )
@@ -366,6 +932,7 @@ class TicketControlView(discord.ui.View):
         super().__init__(timeout=None)
 
     @discord.ui.button(label="🔒 Fechar", style=discord.ButtonStyle.danger, custom_id="persistent:close_ticket")
+    @instrument("close_ticket")
     async def close_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
         if not await self.has_permission(interaction):
             embed = discord.Embed(
@@ -391,17 +958,87 @@ class TicketControlView(discord.ui.View):
         view = ConfirmCloseView()
         await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
 
+    @discord.ui.button(label="🙋 Assumir", style=discord.ButtonStyle.success, custom_id="persistent:claim_ticket")
+    @instrument("claim_ticket")
+    async def claim_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if not await self.has_permission(interaction):
+            await interaction.response.send_message("❌ Você não possui permissão para assumir este ticket.", ephemeral=True)
+            return
+        channel = interaction.channel
+        record = ticket_records.get_open(channel.id)
+        if record is None:
+            await interaction.response.send_message("❌ Este ticket não está registrado.", ephemeral=True)
+            return
+
+        user = interaction.user
+        previous = record.claimer_id
+        if previous == user.id and record.claimed_at is not None:
+            await interaction.response.send_message("🙋 Este ticket já está com você.", ephemeral=True)
+            return
+
+        # record_assign updates the in-memory record before its first await.
+        track_claimer(record.guild_id, previous, user.id, "transfer" if previous else "claim")
+        await ticket_records.record_assign(channel.id, user.id)
+        if await ticket_records.record_claim(channel.id, user.id):
+            # Claiming is the first staff response when nobody replied yet.
+            sla_stats.record_first_response(record)
+
+        description = f"{user.mention} assumiu este ticket."
+        if previous and previous != user.id:
+            description = f"{user.mention} assumiu este ticket (antes com <@{previous}>)."
+        embed = discord.Embed(
+            title="🙋 **TICKET ASSUMIDO**",
+            description=description,
+            color=0x2ECC71,
+            timestamp=datetime.datetime.utcnow(),
+        )
+        embed.set_footer(**brand_footer(SERVER_NAME))
+        await interaction.response.send_message(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+
     @discord.ui.button(label="📋 Transcript", style=discord.ButtonStyle.secondary, custom_id="persistent:transcript")
+    @instrument("transcript")
     async def transcript(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if not await self.has_permission(interaction):
+            await interaction.response.send_message("❌ Você não possui permissão para gerar o transcript.", ephemeral=True)
+            return
+
+        await interaction.response.defer(thinking=True, ephemeral=True)
+        queued = transcript_jobs.backlogged
+        try:
+            run_in_background(interaction, "transcript", lambda: self.send_transcript(interaction), transcript_jobs)
+        except QueueFull:
+            await interaction.followup.send(BUSY_MESSAGE, ephemeral=True)
+            return
+        if queued:
+            await interaction.followup.send("⏳ Outros transcripts estão sendo gerados, o seu está na fila...", ephemeral=True)
+
+    async def send_transcript(self, interaction: discord.Interaction):
+        channel = interaction.channel
+        try:
+            result = await transcript_exporter.export(channel, TRANSCRIPT_FORMAT)
+        except Exception:
+            log.exception("Erro ao gerar transcript", extra={"channel_id": channel.id})
+            await interaction.followup.send("❌ Erro ao gerar o transcript.", ephemeral=True)
+            return
+
         embed = discord.Embed(
-            title="📋 **TRANSCRIPT SOLICITADO**",
-            description="(Placeholder) Aqui você pode implementar geração de transcript (TXT/PDF).",
+            title="📋 **TRANSCRIPT GERADO**",
+            description=(
+                f"• **Canal:** {channel.mention}\n"
+                f"• **Mensagens:** `{result.message_count}`\n"
+                f"• **Tamanho:** `{result.size_bytes / 1024:.1f} KB`"
+            ),
             color=0x3498DB,
             timestamp=datetime.datetime.utcnow(),
         )
         embed.set_footer(**brand_footer(SERVER_NAME))
         brand_thumbnail(embed)
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+        if result.size_bytes <= interaction.guild.filesize_limit:
+            await interaction.followup.send(embed=embed, file=discord.File(result.path), ephemeral=True)
+        else:
+            embed.add_field(name="📁 **ARQUIVO**", value=f"Grande demais para enviar; salvo em `{result.path}`.")
+            await interaction.followup.send(embed=embed, ephemeral=True)
 
     async def has_permission(self, interaction: discord.Interaction) -> bool:
         user = interaction.user
@@ -410,19 +1047,227 @@ class TicketControlView(discord.ui.View):
         if user.guild_permissions.administrator:
             return True
 
-        user_roles = [role.name for role in user.roles]
-        channel_name = channel.name.lower()
+        ticket_type = TICKET_TYPES.from_channel_name(channel.name)
+        if not ticket_type:
+            return False
 
-        if channel_name.startswith("suporte-"):
-            return any(role in user_roles for role in SUPORTE_ROLES)
-        elif channel_name.startswith("denúncia-"):
-            return any(role in user_roles for role in DENUNCIA_ROLES)
-        elif channel_name.startswith("roleplay-"):
-            return any(role in user_roles for role in ROLEPLAY_ROLES)
-        elif channel_name.startswith("financeiro-"):
-            return any(role in user_roles for role in FINANCEIRO_ROLES)
+        return has_any_role(user, role_cache.role_ids(interaction.guild, ticket_type.key))
 
-        return False
+
+# =========================
+# Staff dashboard
+# =========================
+def dashboard_embed(guild: discord.Guild) -> discord.Embed:
+    # Built from the in-memory open records only; no channel scans.
+    summaries = summarize(ticket_records.open_records(guild.id))
+    total = sum(summary.open for summary in summaries.values())
+    unclaimed = sum(summary.unclaimed for summary in summaries.values())
+    embed = discord.Embed(
+        title=f"📊 **FILA DE ATENDIMENTO - {SERVER_NAME}**",
+        description=f"🟢 `{total}` tickets abertos • 🙋 `{unclaimed}` sem responsável",
+        color=0x3498DB,
+        timestamp=datetime.datetime.utcnow(),
+    )
+    lines = []
+    for ticket_type in TICKET_TYPES:
+        summary = summaries.get(ticket_type.key)
+        if not summary:
+            lines.append(f"• **{ticket_type.label}:** ✅ nenhum aberto")
+            continue
+        oldest = datetime.datetime.fromtimestamp(summary.oldest_opened_at, datetime.timezone.utc)
+        lines.append(
+            f"• **{ticket_type.label}:** 🟢 `{summary.open}` | 🙋 `{summary.unclaimed}` sem responsável | "
+            f"⏳ mais antigo {discord.utils.format_dt(oldest, 'R')}"
+        )
+    embed.add_field(name="🎫 **POR TIPO**", value="\n".join(lines), inline=False)
+    embed.set_footer(**brand_footer(f"{SERVER_NAME} | Atualizado automaticamente"))
+    return embed
+
+
+async def render_dashboard(guild_id: int):
+    guild = bot.get_guild(guild_id)
+    guild_config = guild_configs.get(guild_id)
+    channel = guild.get_channel(guild_config.dashboard_channel_id) if guild and guild_config.dashboard_channel_id else None
+    if channel is None:
+        return
+    embed = dashboard_embed(guild)
+    if guild_config.dashboard_message_id:
+        message = channel.get_partial_message(guild_config.dashboard_message_id)
+        try:
+            await rest.submit(f"message:{channel.id}", lambda: message.edit(embed=embed), PRIORITY_LOW)
+            return
+        except discord.NotFound:
+            pass
+    message = await rest.submit(f"message:{channel.id}", lambda: channel.send(embed=embed), PRIORITY_LOW)
+    await guild_configs.set_dashboard_message(guild_id, message.id)
+
+
+dashboard_updates = CoalescedUpdater(render_dashboard, DASHBOARD_INTERVAL_SECONDS)
+registry.callback(
+    "ticketbot_dashboard_events_total", "Ticket events that asked for a dashboard update, and edits actually made.",
+    ("kind",), lambda: {"events": dashboard_updates.touches, "edits": dashboard_updates.renders}, kind="counter",
+)
+
+
+def refresh_dashboard(guild_id: int):
+    if guild_configs.get(guild_id).dashboard_channel_id:
+        dashboard_updates.touch(guild_id)
+
+
+# =========================
+# Claims and assignment
+# =========================
+def eligible_staff(guild: discord.Guild, ticket_type: TicketType) -> list[tuple[int, bool]]:
+    """(member id, online) of everyone holding one of the type's staff roles."""
+    members = {
+        member.id: member
+        for role in role_cache.roles(guild, ticket_type.key)
+        for member in role.members
+        if not member.bot
+    }
+    return [(member.id, member.status == discord.Status.online) for member in members.values()]
+
+
+def track_claimer(guild_id: int, previous: int | None, current: int | None, mode: str):
+    """Move one open ticket of load from ``previous`` to ``current``."""
+    if previous == current:
+        return
+    if previous is not None:
+        staff_assigner.add_load(guild_id, previous, -1)
+    if current is not None:
+        staff_assigner.add_load(guild_id, current, 1)
+        tickets_assigned.inc(mode=mode)
+    refresh_dashboard(guild_id)
+
+
+async def auto_assign(guild: discord.Guild, ticket_type: TicketType, channel_id: int) -> discord.Member | None:
+    record = ticket_records.get_open(channel_id)
+    if not AUTO_ASSIGN or record is None or record.claimer_id is not None:
+        return None
+    if not staff_assigner.has_pool(guild.id, ticket_type.key):
+        # Built on first use and after any role change, from the member cache.
+        staff_assigner.set_pool(guild.id, ticket_type.key, eligible_staff(guild, ticket_type))
+    while (member_id := staff_assigner.pick(guild.id, ticket_type.key)) is not None:
+        member = guild.get_member(member_id)
+        if member is not None:
+            break
+        staff_assigner.remove_member(guild.id, member_id)
+    else:
+        return None
+    # Count the load before awaiting, so a concurrent pick sees it.
+    track_claimer(guild.id, None, member.id, "auto")
+    await ticket_records.record_assign(channel_id, member.id)
+    return member
+
+
+# =========================
+# Archive rotation and retention
+# =========================
+def archive_categories(guild: discord.Guild) -> list[discord.CategoryChannel]:
+    """The guild's archive category followed by its overflow categories that still exist."""
+    guild_config = guild_configs.get(guild.id)
+    primary = guild.get_channel(guild_config.archive_category_id) if guild_config.archive_category_id else None
+    if primary is None:
+        return []
+    overflow = (guild.get_channel(category_id) for category_id in guild_config.archive_overflow)
+    return [primary, *(category for category in overflow if category is not None)]
+
+
+async def create_archive_overflow(guild: discord.Guild, index: int):
+    primary = archive_categories(guild)[0]
+    name = overflow_category_name(primary.name, index)
+    try:
+        category = await rest.submit(
+            f"channel_create:{guild.id}",
+            lambda: guild.create_category(
+                name, overwrites=primary.overwrites, position=primary.position + index + 1,
+                reason="Categoria de arquivo cheia",
+            ),
+            PRIORITY_HIGH,
+        )
+    except Exception:
+        log.exception("Erro ao criar categoria de arquivo extra, arquivando no lugar", extra={"guild_id": guild.id})
+        return None
+    if guild.get_channel(category.id) is None:
+        # Wait for the gateway to cache it, so the next close sees it in archive_categories().
+        with contextlib.suppress(asyncio.TimeoutError):
+            await bot.wait_for("guild_channel_create", check=lambda c: c.id == category.id, timeout=5)
+    overflow = [c.id for c in archive_categories(guild)[1:]]
+    await guild_configs.set_archive_overflow(guild.id, [*overflow, category.id])
+    log.info("Categoria de arquivo extra criada", extra={"guild_id": guild.id, "category_id": category.id, "name": name})
+    return category
+
+
+@contextlib.asynccontextmanager
+async def archive_slot(guild: discord.Guild, channel: discord.TextChannel):
+    """The archive category to move ``channel`` into (None archives in place), with a slot held for it."""
+    categories = archive_categories(guild)
+    archive_category_id = guild_configs.get(guild.id).archive_category_id
+    if archive_category_id and not categories:
+        log.warning("Categoria de arquivo não encontrada, arquivando no lugar", extra={"category_id": archive_category_id})
+    current = next((c for c in categories if c.id == channel.category_id), None)
+    if not categories or current:
+        yield current
+        return
+    async with archive_rotation.reserve(
+        guild.id, lambda: archive_categories(guild), lambda index: create_archive_overflow(guild, index)
+    ) as category:
+        yield category
+
+
+async def purge_ticket(record: TicketRecord) -> bool:
+    guild = bot.get_guild(record.guild_id)
+    if guild is not None and guild.unavailable:
+        return False  # Outage: its channels come back with it.
+    # The bot left the guild: its channel is out of reach, so only the record goes.
+    channel = guild.get_channel(record.channel_id) if guild is not None else None
+    if channel is not None:
+        if not channel.name.startswith(ARCHIVED_PREFIX):
+            # Renamed or reopened by hand since it was closed; leave it alone.
+            log.warning("Ticket fechado não está arquivado, ignorando expurgo", extra={"channel_id": channel.id})
+            return False
+        result = await transcript_exporter.export(channel, TRANSCRIPT_FORMAT)
+        await rest.submit(
+            f"channel_delete:{guild.id}", lambda: channel.delete(reason="Retenção de tickets arquivados"), PRIORITY_LOW
+        )
+        log.info(
+            "Ticket arquivado expurgado",
+            extra={"channel_id": channel.id, "guild_id": guild.id, "transcript": result.path},
+        )
+    await ticket_records.record_purge(record.channel_id)
+    return True
+
+
+async def prune_archive_overflow():
+    for guild in bot.guilds:
+        if len(archive_categories(guild)) < 2:
+            continue
+
+        async def delete(category: discord.CategoryChannel):
+            await rest.submit(
+                f"channel_delete:{guild.id}", lambda: category.delete(reason="Categoria de arquivo vazia"), PRIORITY_LOW
+            )
+            overflow = guild_configs.get(guild.id).archive_overflow
+            await guild_configs.set_archive_overflow(guild.id, [c for c in overflow if c != category.id])
+
+        removed = await archive_rotation.prune(guild.id, lambda: archive_categories(guild), delete)
+        if removed:
+            log.info("Categorias de arquivo vazias removidas", extra={"guild_id": guild.id, "removed": removed})
+
+
+async def retention_loop():
+    shards = (cluster.shard_count, list(cluster.shard_ids)) if cluster.sharded and cluster.shard_ids else None
+
+    def fetch(cutoff: float, limit: int, offset: int):
+        return ticket_records.closed_before(cutoff, limit, offset, shards)
+
+    while True:
+        try:
+            await retention.run_once(fetch, purge_ticket, busy=lambda: not rest.idle)
+            await prune_archive_overflow()
+        except Exception:
+            log.exception("Erro no expurgo de tickets arquivados")
+        await asyncio.sleep(ARCHIVE_PURGE_INTERVAL_MINUTES * 60)
 
 
 class ConfirmCloseView(discord.ui.View):
@@ -430,46 +1275,48 @@ class ConfirmCloseView(discord.ui.View):
         super().__init__(timeout=30)
 
     def get_ticket_type(self, channel_name: str) -> str:
-        if channel_name.startswith("suporte-"):
-            return "Suporte"
-        elif channel_name.startswith("denúncia-"):
-            return "Denúncia"
-        elif channel_name.startswith("financeiro-"):
-            return "Financeiro"
-        elif channel_name.startswith("roleplay-"):
-            return "Roleplay"
-        elif channel_name.startswith("arquivado-"):
+        ticket_type = TICKET_TYPES.from_channel_name(channel_name)
+        if ticket_type:
+            return ticket_type.label
+        if channel_name.startswith("arquivado-"):
             return "Arquivado"
         return "Desconhecido"
 
     async def get_ticket_opener(self, channel: discord.TextChannel):
-        async for message in channel.history(limit=10, oldest_first=True):
-            if message.author.bot and message.mentions:
-                return message.mentions[0]
-        return None
+        record = await ticket_records.get(channel.id)
+        if record:
+            opener_id = record.opener_id
+        else:
+            # Tickets opened before records existed carry the opener in the topic.
+            match = TOPIC_OPENER_RE.search(channel.topic or "")
+            if not match:
+                return None
+            opener_id = int(match.group(1))
+        member = await member_cache.get(channel.guild, opener_id)
+        return member or discord.Object(opener_id, type=discord.Member)
 
     async def get_ticket_duration(self, channel: discord.TextChannel) -> str:
         try:
-            creation_time = channel.created_at
+            record = await ticket_records.get(channel.id)
+            creation_time = record.opened_datetime if record else channel.created_at
             now = datetime.datetime.utcnow().replace(tzinfo=datetime.timezone.utc)
-            duration = now - creation_time
-
-            days = duration.days
-            hours = duration.seconds // 3600
-            minutes = (duration.seconds % 3600) // 60
-
-            if days > 0:
-                return f"{days}d {hours}h {minutes}m"
-            if hours > 0:
-                return f"{hours}h {minutes}m"
-            return f"{minutes}m"
+            return _fmt_duration((now - creation_time).total_seconds())
         except Exception:
             return "Não calculada"
 
     @discord.ui.button(label="✅ Confirmar Fechamento", style=discord.ButtonStyle.danger)
+    @instrument("confirm")
     async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
-        channel = interaction.channel
-        guild = interaction.guild
+        # Queued before anything is posted, so a full queue can't leave a
+        # "closed" message behind, and stopped before the first await, so a
+        # second click can't queue a second archive.
+        posted = asyncio.Event()
+        try:
+            run_in_background(interaction, "confirm", lambda: self.finish_close(interaction, posted))
+        except QueueFull:
+            await interaction.response.send_message(BUSY_MESSAGE, ephemeral=True)
+            return
+        self.stop()
 
         close_embed = discord.Embed(
             title=f"🔒 **TICKET FECHADO - {SERVER_NAME}**",
@@ -479,13 +1326,20 @@ class ConfirmCloseView(discord.ui.View):
         )
         close_embed.set_footer(**brand_footer(SERVER_NAME))
         brand_thumbnail(close_embed)
-        await interaction.response.send_message(embed=close_embed)
+        try:
+            await interaction.response.send_message(embed=close_embed)
+        finally:
+            posted.set()
 
+    async def finish_close(self, interaction: discord.Interaction, posted: asyncio.Event):
+        # Followups need the initial response to exist.
+        await posted.wait()
+        channel = interaction.channel
         opener = await self.get_ticket_opener(channel)
-        closer = interaction.user
         duration = await self.get_ticket_duration(channel)
 
-        await self.archive_ticket(channel, guild, opener, closer, duration)
+        if not await self.archive_ticket(channel, interaction.guild, opener, interaction.user, duration):
+            await interaction.followup.send("❌ Erro ao arquivar o ticket; tente fechar novamente.", ephemeral=True)
 
         try:
             for item in self.children:
@@ -494,9 +1348,8 @@ class ConfirmCloseView(discord.ui.View):
         except discord.errors.NotFound:
             pass
 
-        self.stop()
-
     @discord.ui.button(label="❌ Cancelar", style=discord.ButtonStyle.secondary)
+    @instrument("cancel")
     async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
         embed = discord.Embed(
             title="❌ **AÇÃO CANCELADA**",
@@ -517,41 +1370,43 @@ class ConfirmCloseView(discord.ui.View):
 
         self.stop()
 
-    async def archive_ticket(self, channel: discord.TextChannel, guild: discord.Guild, opener, closer, duration: str):
-        if not ARCHIVE_CATEGORY_ID:
-            # If not configured, just lock the channel and rename it.
-            await channel.edit(name=f"arquivado-{channel.name}")
-            await channel.set_permissions(guild.default_role, send_messages=False, read_messages=False)
-            return
+    async def archive_ticket(
+        self, channel: discord.TextChannel, guild: discord.Guild, opener, closer, duration: str
+    ) -> bool:
+        ticket_type = TICKET_TYPES.from_channel_name(channel.name)
+        priority = ticket_type.rest_priority if ticket_type else PRIORITY_HIGH
 
         try:
-            archive_category = guild.get_channel(ARCHIVE_CATEGORY_ID)
-            if archive_category:
-                await channel.edit(category=archive_category, sync_permissions=True)
-
-            new_name = f"arquivado-{channel.name}"
-            if not new_name.startswith("arquivado-"):
-                await channel.edit(name=new_name)
-
-            staff_roles = await get_roles_by_names(
-                guild, SUPORTE_ROLES + DENUNCIA_ROLES + FINANCEIRO_ROLES + ROLEPLAY_ROLES
-            )
-
-            for member in channel.members:
-                if member.bot:
-                    continue
-                is_staff = any(role in member.roles for role in staff_roles) or member.guild_permissions.administrator
-                if not is_staff and member != opener:
-                    await channel.set_permissions(member, read_messages=False, send_messages=False)
-
-            await channel.set_permissions(guild.default_role, send_messages=False)
-
-        except Exception as e:
-            print(f"Erro ao arquivar ticket: {e}")
+            async with archive_slot(guild, channel) as archive_category:
+                plan = plan_archive(
+                    channel, archive_category, getattr(opener, "id", None), role_cache.staff_role_ids(guild)
+                )
+                if plan.edit_kwargs:
+                    await rest.submit(f"channel_edit:{channel.id}", lambda: channel.edit(**plan.edit_kwargs), priority)
+            archive_stats.record(plan)
+        except Exception:
+            archive_failures.inc()
+            log.exception("Erro ao arquivar ticket", extra={"channel_id": channel.id, "guild_id": guild.id})
+            return False
+
+        # Only once the channel is archived: a failed edit leaves the ticket
+        # open, so closing it again must still find it open, idle-tracked and
+        # on the dashboard.
+        open_tickets.discard_channel(channel.id)
+        inactivity.discard(channel.id)
+        record = await ticket_records.record_close(channel.id, closer.id if closer else None)
+        if record:
+            tickets_closed.inc(type=record.ticket_type)
+            sla_stats.record_resolution(record)
+            track_claimer(record.guild_id, record.claimer_id, None, "close")
+            recent_tickets.pop((record.guild_id, record.opener_id, record.ticket_type))
+            refresh_dashboard(guild.id)
+        return True
 
 
 @bot.tree.command(name="ticket", description="Cria o menu de tickets")
 @app_commands.default_permissions(administrator=True)
+@instrument("ticket")
 async def ticket(interaction: discord.Interaction):
     embed = discord.Embed(
         title=f"🎫 **SISTEMA DE TICKETS - {SERVER_NAME}**",
@@ -566,60 +1421,508 @@ async def ticket(interaction: discord.Interaction):
     await interaction.response.send_message(embed=embed, view=view)
 
 
-@bot.tree.command(name="config", description="Mostra configurações")
+def _fmt_ms(seconds: float | None) -> str:
+    return f"{seconds * 1000:.0f}ms" if seconds is not None else "—"
+
+
+def _fmt_duration(seconds: float | None, show_seconds: bool = False) -> str:
+    if seconds is None:
+        return "—"
+    seconds = int(seconds)
+    days, hours, minutes = seconds // 86400, seconds % 86400 // 3600, seconds % 3600 // 60
+    if days > 0:
+        return f"{days}d {hours}h {minutes}m"
+    if hours > 0:
+        return f"{hours}h {minutes}m"
+    if show_seconds and minutes == 0:
+        return f"{seconds}s"
+    return f"{minutes}m"
+
+
+async def apply_config_changes(
+    guild: discord.Guild,
+    ticket_type: TicketType | None,
+    category: discord.CategoryChannel | None,
+    role_names: str | None,
+    archive_category: discord.CategoryChannel | None,
+    reset: bool,
+) -> list[str]:
+    changes = []
+    if (reset and not ticket_type) or archive_category:
+        # Overflow categories belong to the previous archive category.
+        await guild_configs.set_archive_overflow(guild.id, [])
+    if reset and ticket_type:
+        await guild_configs.set_category(guild.id, ticket_type, None)
+        await guild_configs.set_roles(guild.id, ticket_type, None)
+        changes.append(f"• **{ticket_type.label}:** valores do `.env` restaurados")
+    elif reset:
+        await guild_configs.set_archive_category(guild.id, None)
+        changes.append("• **Arquivo:** valor do `.env` restaurado")
+    if category:
+        await guild_configs.set_category(guild.id, ticket_type, category.id)
+        changes.append(f"• **{ticket_type.label}:** categoria {category.mention}")
+    if role_names is not None:
+        names = [name.strip() for name in role_names.split(",") if name.strip()]
+        await guild_configs.set_roles(guild.id, ticket_type, names)
+        changes.append(f"• **{ticket_type.label}:** cargos {', '.join(names) or '(nenhum)'}")
+    if archive_category:
+        await guild_configs.set_archive_category(guild.id, archive_category.id)
+        changes.append(f"• **Arquivo:** {archive_category.mention}")
+
+    if changes:
+        # Everything derived from the old settings is rebuilt for this guild.
+        role_cache.invalidate(guild.id)
+        staff_assigner.drop_guild(guild.id)
+        open_tickets.rebuild(guild)
+        if CHANNEL_POOL_ENABLED:
+            for pool_category in ticket_categories():
+                if pool_category.guild == guild:
+                    channel_pool.rebuild(pool_category)
+        log.info("Configuração do servidor alterada", extra={"guild_id": guild.id, "changes": changes})
+    return changes
+
+
+@bot.tree.command(name="config", description="Mostra ou altera as configurações deste servidor")
 @app_commands.default_permissions(administrator=True)
-async def config(interaction: discord.Interaction):
+@app_commands.describe(
+    tipo="Tipo de ticket a alterar",
+    categoria="Categoria onde os tickets do tipo são criados",
+    cargos="Nomes dos cargos da equipe do tipo, separados por vírgula",
+    arquivo="Categoria para onde vão os tickets fechados",
+    redefinir="Volta o tipo escolhido (ou, sem tipo, o arquivo) aos valores do .env",
+)
+@app_commands.choices(tipo=[app_commands.Choice(name=t.label, value=t.key) for t in TICKET_TYPES])
+@instrument("config")
+async def config(
+    interaction: discord.Interaction,
+    tipo: app_commands.Choice[str] | None = None,
+    categoria: discord.CategoryChannel | None = None,
+    cargos: str | None = None,
+    arquivo: discord.CategoryChannel | None = None,
+    redefinir: bool = False,
+):
     guild = interaction.guild
+    ticket_type = TICKET_TYPES.get(tipo.value) if tipo else None
+    if (categoria or cargos is not None) and not ticket_type:
+        await interaction.response.send_message("❌ Escolha o `tipo` para alterar categoria ou cargos.", ephemeral=True)
+        return
+
+    # Saving and rebuilding the guild's indexes may take a while on big guilds.
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    changes = await apply_config_changes(guild, ticket_type, categoria, cargos, arquivo, redefinir)
+    guild_config = guild_configs.get(guild.id)
+
     embed = discord.Embed(
         title=f"⚙️ **CONFIG - {SERVER_NAME}**",
         description="Configurações atuais do sistema de tickets",
         color=0xF39C12,
         timestamp=datetime.datetime.utcnow(),
     )
+    if changes:
+        embed.add_field(name="✏️ **ALTERADO**", value="\n".join(changes), inline=False)
 
     cats_info = []
-    for ticket_type, cat_id in CATEGORY_IDS.items():
+    for ticket_type in TICKET_TYPES:
+        cat_id = guild_config.category_id(ticket_type)
+        origin = "servidor" if guild_config.is_custom(ticket_type) else "env"
+        roles = ", ".join(guild_config.role_names(ticket_type)) or "nenhum cargo"
         if not cat_id:
-            cats_info.append(f"• **{ticket_type.title()}:** ❌ Não configurada (env)")
+            cats_info.append(f"• **{ticket_type.label}:** ❌ Não configurada ({origin}) | {roles}")
             continue
         cat = guild.get_channel(cat_id)
         status = "✅ Operacional" if cat else "❌ Não encontrada"
-        cats_info.append(f"• **{ticket_type.title()}:** {status} | `{cat_id}`")
+        cats_info.append(f"• **{ticket_type.label}:** {status} | `{cat_id}` | {roles} ({origin})")
+
+    archive_id = guild_config.archive_category_id
+    if archive_id:
+        archive_status = "✅" if guild.get_channel(archive_id) else "❌ Não encontrada"
+        cats_info.append(f"• **Arquivo:** {archive_status} `{archive_id}`")
+    else:
+        cats_info.append("• **Arquivo:** arquiva no lugar (sem categoria)")
 
     embed.add_field(name="📁 **CATEGORIAS**", value="\n".join(cats_info), inline=False)
+    counts = await ticket_records.status_counts(guild.id)
+    embed.add_field(
+        name="📈 **TICKETS**",
+        value="\n".join(
+            f"• **{t.label}:** 🟢 `{counts.get((t.key, STATUS_OPEN), 0)}` abertos | "
+            f"🔒 `{counts.get((t.key, STATUS_CLOSED), 0)}` fechados"
+            for t in TICKET_TYPES
+        ),
+        inline=False,
+    )
+    if cluster.sharded or len(bot.guilds) > 1:
+        totals = Counter()
+        for (_, status), count in (await ticket_records.status_counts(None)).items():
+            totals[status] += count
+        embed.add_field(
+            name="🌐 **TODOS OS SERVIDORES**",
+            value=(
+                f"• **Servidores:** `{len(bot.guilds)}` neste processo"
+                + (f" (cluster `{cluster.cluster_id}`, shards `{shard_ids_text()}`)" if cluster.sharded else "")
+                + f"\n• **Tickets:** 🟢 `{totals[STATUS_OPEN]}` abertos | 🔒 `{totals[STATUS_CLOSED]}` fechados"
+            ),
+            inline=False,
+        )
+    embed.add_field(
+        name="🗄️ **ARQUIVAMENTO**",
+        value=(
+            f"• **Fechados:** `{archive_stats.closes}`\n"
+            f"• **Chamadas REST:** `{archive_stats.calls}` (antes: `{archive_stats.legacy_calls}`)\n"
+            f"• **Economia por fechamento:** `{archive_stats.saved_per_close:.1f}`\n"
+            f"• **Monitorados por inatividade:** `{len(inactivity)}`\n"
+            f"• **Categorias de arquivo:** `{len(archive_categories(guild)) or '—'}`"
+            + (
+                f"\n• **Expurgados ({ARCHIVE_RETENTION_DAYS}d):** `{retention.purged}` | falhas `{retention.failed}`"
+                if ARCHIVE_RETENTION_DAYS else ""
+            )
+        ),
+        inline=False,
+    )
+    embed.add_field(
+        name="🚦 **FILA REST**",
+        value=(
+            f"• **Na fila:** `{rest.depth}` (máx. `{rest.stats.max_depth}`/`{rest.max_queue}`)\n"
+            f"• **Espera média:** alta `{rest.stats.mean_wait(0):.2f}s` | normal `{rest.stats.mean_wait(1):.2f}s` | "
+            f"baixa `{rest.stats.mean_wait(2):.2f}s`\n"
+            f"• **Retentativas:** `{rest.stats.retries}` | **Recusados:** `{rest.stats.rejected}` | "
+            f"**429:** `{rest.stats.rate_limited}`"
+        ),
+        inline=False,
+    )
+    if CHANNEL_POOL_ENABLED:
+        pooled, cold = channel_pool.latency["pooled"], channel_pool.latency["cold"]
+        embed.add_field(
+            name="🏊 **POOL DE CANAIS**",
+            value=(
+                "\n".join(f"• **{c.name}:** `{channel_pool.size(c.id)}` prontos" for c in ticket_categories() if c.guild == guild)
+                + f"\n• **Pool:** p50 `{_fmt_ms(pooled.percentile(50))}` p95 `{_fmt_ms(pooled.percentile(95))}`"
+                + f"\n• **Criação:** p50 `{_fmt_ms(cold.percentile(50))}` p95 `{_fmt_ms(cold.percentile(95))}`"
+            ),
+            inline=False,
+        )
+    if LEAN_INTENTS:
+        embed.add_field(
+            name="👥 **MEMBROS (MODO ENXUTO)**",
+            value=(
+                f"• **Em cache:** `{len(member_cache)}/{member_cache.capacity}`\n"
+                f"• **Acertos:** `{member_cache.hits}` • **Buscas:** `{member_cache.fetches}`"
+            ),
+            inline=False,
+        )
+    counters = await counter_store.snapshot()
     embed.add_field(
         name="📊 **CONTADORES**",
-        value="\n".join([f"• **{k.title()}:** `{v}`" for k, v in ticket_counters.items()]),
+        value="\n".join(
+            f"• **{t.label}:** `{counters.get(guild_counter(guild.id, t.key), 0)}`"
+            for t in TICKET_TYPES
+        ),
         inline=False,
     )
 
     embed.set_footer(**brand_footer(SERVER_NAME))
     brand_thumbnail(embed)
 
-    await interaction.response.send_message(embed=embed, ephemeral=True)
+    await interaction.followup.send(embed=embed, ephemeral=True)
 
 
-@bot.tree.command(name="add", description="Adiciona membro ao ticket")
-async def add(interaction: discord.Interaction, member: discord.Member):
-    channel = interaction.channel
-    if not any(channel.name.startswith(prefix) for prefix in ["suporte-", "denúncia-", "financeiro-", "roleplay-"]):
-        await interaction.response.send_message("❌ Use em um ticket.", ephemeral=True)
-        return
-    await channel.set_permissions(member, read_messages=True, send_messages=True)
-    await interaction.response.send_message(f"✅ {member.mention} adicionado.")
+def _fmt_limit(limit: Limit | None) -> str:
+    return f"`{limit[0]}` a cada `{limit[1]:g}s`" if limit else "desativado"
+
+
+@bot.tree.command(name="limites", description="Mostra ou altera os limites de abertura de tickets")
+@app_commands.default_permissions(administrator=True)
+@app_commands.describe(
+    escopo="Limite a alterar",
+    tickets="Tickets permitidos por período (0 desativa)",
+    segundos="Duração do período em segundos",
+    redefinir="Volta o escopo escolhido ao valor do .env",
+)
+@app_commands.choices(escopo=[app_commands.Choice(name=label, value=scope) for scope, label in RATE_LIMIT_SCOPES.items()])
+@instrument("limites")
+async def limites(
+    interaction: discord.Interaction,
+    escopo: app_commands.Choice[str] | None = None,
+    tickets: app_commands.Range[int, 0, 1000] | None = None,
+    segundos: app_commands.Range[int, 1, 86400] | None = None,
+    redefinir: bool = False,
+):
+    guild = interaction.guild
+    if (tickets is not None or segundos is not None or redefinir) and not escopo:
+        await interaction.response.send_message("❌ Escolha o `escopo` a alterar.", ephemeral=True)
+        return
+
+    changed = None
+    if escopo and (redefinir or tickets is not None or segundos is not None):
+        scope = escopo.value
+        current = guild_configs.get(guild.id).rate_limit(scope, DEFAULT_RATE_LIMITS[scope])
+        if redefinir:
+            await guild_configs.set_rate_limit(guild.id, scope, None, reset=True)
+        else:
+            count = tickets if tickets is not None else (current[0] if current else 1)
+            per = float(segundos) if segundos is not None else (current[1] if current else 60.0)
+            await guild_configs.set_rate_limit(guild.id, scope, (count, per) if count else None)
+        changed = scope
+        log.info(
+            "Limite de abertura alterado",
+            extra={"guild_id": guild.id, "scope": scope, "limit": guild_configs.get(guild.id).rate_limits.get(scope)},
+        )
+
+    guild_config = guild_configs.get(guild.id)
+    lines = []
+    for scope, label in RATE_LIMIT_SCOPES.items():
+        origin = "servidor" if scope in guild_config.rate_limits else "env"
+        marker = " ✏️" if scope == changed else ""
+        lines.append(
+            f"• **Por {label}:** {_fmt_limit(guild_config.rate_limit(scope, DEFAULT_RATE_LIMITS[scope]))} "
+            f"({origin}) | recusados `{rate_limited_opens[(guild.id, scope)]}`{marker}"
+        )
+
+    embed = discord.Embed(
+        title=f"🚧 **LIMITES - {SERVER_NAME}**",
+        description="Limites de abertura de tickets (token bucket)",
+        color=0xF39C12,
+        timestamp=datetime.datetime.utcnow(),
+    )
+    embed.add_field(name="📏 **LIMITES**", value="\n".join(lines), inline=False)
+    embed.add_field(
+        name="🧠 **MEMÓRIA**",
+        value=f"• **Buckets:** `{len(open_limiter)}/{open_limiter.maxsize}` (todos os servidores deste processo)",
+        inline=False,
+    )
+    embed.set_footer(**brand_footer(SERVER_NAME))
+    brand_thumbnail(embed)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+@bot.tree.command(name="painel", description="Publica ou move o painel da fila de atendimento")
+@app_commands.default_permissions(administrator=True)
+@app_commands.describe(canal="Canal onde o painel fica (sem canal, atualiza o painel atual)")
+@instrument("painel")
+async def painel(interaction: discord.Interaction, canal: discord.TextChannel | None = None):
+    guild = interaction.guild
+    if canal:
+        await guild_configs.set_dashboard_channel(guild.id, canal.id)
+        await guild_configs.set_dashboard_message(guild.id, None)
+    channel_id = guild_configs.get(guild.id).dashboard_channel_id
+    if not channel_id:
+        await interaction.response.send_message("❌ Escolha o `canal` do painel.", ephemeral=True)
+        return
+
+    await interaction.response.defer(ephemeral=True)
+    try:
+        await render_dashboard(guild.id)
+    except Exception:
+        log.exception("Erro ao publicar painel", extra={"guild_id": guild.id, "channel_id": channel_id})
+        await interaction.followup.send("❌ Erro ao publicar o painel.", ephemeral=True)
+        return
+    await interaction.followup.send(f"✅ Painel atualizado em <#{channel_id}>.", ephemeral=True)
+
+
+STATS_STAFF_LIMIT = 10
+
+
+def _fmt_sla(label: str, summary: SlaSummary | None) -> str:
+    if summary is None:
+        return f"**{label}:** sem dados"
+    percentiles = " · ".join(
+        f"p{pct} `{_fmt_duration(value, show_seconds=True)}`"
+        for pct, value in ((50, summary.p50), (90, summary.p90), (99, summary.p99))
+    )
+    return f"**{label}:** {percentiles} ({summary.count})"
+
+
+def sla_field(guild_id: int, dimension: str, key: str | int = "", unanswered: int | None = None) -> str | None:
+    first_response = sla_stats.summary(guild_id, FIRST_RESPONSE, dimension, key)
+    resolution = sla_stats.summary(guild_id, RESOLUTION, dimension, key)
+    if first_response is None and resolution is None:
+        return None
+    lines = [_fmt_sla("1ª resposta", first_response), _fmt_sla("Resolução", resolution)]
+    if unanswered:
+        lines.append(f"Fechados sem resposta da equipe: **{unanswered}**")
+    return "\n".join(lines)
+
+
+@bot.tree.command(name="stats", description="Tempos de primeira resposta e de resolução dos tickets")
+@app_commands.default_permissions(administrator=True)
+@app_commands.describe(tipo="Só tickets deste tipo", membro="Só tickets assumidos por este membro da equipe")
+@app_commands.choices(tipo=[app_commands.Choice(name=t.label, value=t.key) for t in TICKET_TYPES])
+@instrument("stats")
+async def stats(
+    interaction: discord.Interaction,
+    tipo: app_commands.Choice[str] | None = None,
+    membro: discord.Member | None = None,
+):
+    guild = interaction.guild
+    embed = discord.Embed(
+        title=f"📊 **ESTATÍSTICAS DE ATENDIMENTO - {SERVER_NAME}**",
+        description="Percentis desde a abertura do ticket (entre parênteses, quantos tickets).",
+        color=0x3498DB,
+        timestamp=datetime.datetime.utcnow(),
+    )
+    if membro:
+        embed.add_field(
+            name=f"👤 {membro.display_name}",
+            value=sla_field(guild.id, BY_STAFF, membro.id) or "Nenhum ticket assumido.",
+            inline=False,
+        )
+    else:
+        types = [TICKET_TYPES.get(tipo.value)] if tipo else list(TICKET_TYPES)
+        if not tipo:
+            embed.add_field(
+                name="🌐 Geral",
+                value=sla_field(guild.id, ALL, unanswered=sla_stats.unanswered[(guild.id, "")])
+                or "Nenhum ticket registrado ainda.",
+                inline=False,
+            )
+        for ticket_type in types:
+            value = sla_field(guild.id, BY_TYPE, ticket_type.key, sla_stats.unanswered[(guild.id, ticket_type.key)])
+            if value or tipo:
+                embed.add_field(name=ticket_type.label, value=value or "Sem dados.", inline=False)
+        if not tipo:
+            staff = sla_stats.staff(guild.id)[:STATS_STAFF_LIMIT]
+            if staff:
+                embed.add_field(
+                    name="👥 Equipe (resolução)",
+                    value="\n".join(
+                        f"<@{staff_id}>: p50 `{_fmt_duration(summary.p50, show_seconds=True)}` · "
+                        f"p90 `{_fmt_duration(summary.p90, show_seconds=True)}` ({summary.count})"
+                        for staff_id, summary in staff
+                    ),
+                    inline=False,
+                )
+    embed.set_footer(**brand_footer(SERVER_NAME))
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+TICKETS_LIST_LIMIT = 15
+STATUS_LABELS = {STATUS_OPEN: "🟢 Aberto", STATUS_CLOSED: "🔒 Fechado", STATUS_PURGED: "🗑️ Excluído"}
+
+
+@bot.tree.command(name="tickets", description="Lista os tickets de um usuário, tipo ou status")
+@app_commands.default_permissions(administrator=True)
+@app_commands.describe(usuario="Só tickets abertos por este usuário", tipo="Só tickets deste tipo", status="Só tickets neste status")
+@app_commands.choices(
+    tipo=[app_commands.Choice(name=t.label, value=t.key) for t in TICKET_TYPES],
+    status=[app_commands.Choice(name=label, value=status) for status, label in STATUS_LABELS.items()],
+)
+@instrument("tickets")
+async def tickets(
+    interaction: discord.Interaction,
+    usuario: discord.User | None = None,
+    tipo: app_commands.Choice[str] | None = None,
+    status: app_commands.Choice[str] | None = None,
+):
+    # Straight from the record store's indexes: no channel history is read.
+    records = await ticket_records.find(
+        interaction.guild.id,
+        opener_id=usuario.id if usuario else None,
+        ticket_type=tipo.value if tipo else None,
+        status=status.value if status else None,
+        limit=TICKETS_LIST_LIMIT,
+    )
+    embed = discord.Embed(
+        title=f"🎫 **TICKETS - {SERVER_NAME}**",
+        description=f"Mais recentes primeiro (até {TICKETS_LIST_LIMIT})." if records else "Nenhum ticket encontrado.",
+        color=0x3498DB,
+        timestamp=datetime.datetime.utcnow(),
+    )
+    for record in records:
+        ticket_type = TICKET_TYPES.get(record.ticket_type)
+        lines = [
+            f"• **Canal:** <#{record.channel_id}> | **Aberto por:** <@{record.opener_id}>",
+            f"• **Aberto:** {discord.utils.format_dt(record.opened_datetime, 'R')} | "
+            f"**Status:** {STATUS_LABELS.get(record.status, record.status)}",
+        ]
+        if record.claimer_id is not None:
+            lines.append(f"• **Responsável:** <@{record.claimer_id}>")
+        embed.add_field(
+            name=f"{ticket_type.label if ticket_type else record.ticket_type} #{record.number}",
+            value="\n".join(lines),
+            inline=False,
+        )
+    embed.set_footer(**brand_footer(SERVER_NAME))
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+@bot.tree.command(name="add", description="Adiciona membro ao ticket")
+@instrument("add")
+async def add(interaction: discord.Interaction, member: discord.Member):
+    channel = interaction.channel
+    if not TICKET_TYPES.from_channel_name(channel.name):
+        await interaction.response.send_message("❌ Use em um ticket.", ephemeral=True)
+        return
+    await interaction.response.defer()
+    try:
+        await rest.submit(
+            f"permissions:{channel.id}",
+            lambda: channel.set_permissions(member, read_messages=True, send_messages=True),
+            PRIORITY_HIGH,
+        )
+    except QueueFull:
+        await interaction.followup.send(BUSY_MESSAGE, ephemeral=True)
+        return
+    await interaction.followup.send(f"✅ {member.mention} adicionado.")
 
 
 @bot.tree.command(name="remove", description="Remove membro do ticket")
+@instrument("remove")
 async def remove(interaction: discord.Interaction, member: discord.Member):
     channel = interaction.channel
-    if not any(channel.name.startswith(prefix) for prefix in ["suporte-", "denúncia-", "financeiro-", "roleplay-"]):
+    if not TICKET_TYPES.from_channel_name(channel.name):
         await interaction.response.send_message("❌ Use em um ticket.", ephemeral=True)
         return
-    await channel.set_permissions(member, read_messages=False, send_messages=False)
-    await interaction.response.send_message(f"✅ {member.mention} removido.")
+    await interaction.response.defer()
+    try:
+        await rest.submit(
+            f"permissions:{channel.id}",
+            lambda: channel.set_permissions(member, read_messages=False, send_messages=False),
+            PRIORITY_HIGH,
+        )
+    except QueueFull:
+        await interaction.followup.send(BUSY_MESSAGE, ephemeral=True)
+        return
+    await interaction.followup.send(f"✅ {member.mention} removido.")
+
+
+def shard_ids_text() -> str:
+    shard_ids = cluster.shard_ids or range(cluster.shard_count or 1)
+    return ",".join(map(str, shard_ids))
+
+
+@bot.tree.command(name="shards", description="Mostra a saúde e a latência de cada shard")
+@app_commands.default_permissions(administrator=True)
+@instrument("shards")
+async def shards(interaction: discord.Interaction):
+    rows = await shard_health.read()
+    now = time.time()
+    lines = []
+    for row in rows:
+        if row.is_stale(SHARD_HEARTBEAT_SECONDS, now):
+            icon = "⚪"
+        else:
+            icon = "🟢" if row.status == "up" else "🔴"
+        latency = f"{row.latency * 1000:.0f} ms" if row.latency is not None else "—"
+        seen = datetime.datetime.fromtimestamp(row.updated_at, datetime.timezone.utc)
+        lines.append(
+            f"{icon} **Shard {row.shard_id}** • cluster `{row.cluster_id}` • `{latency}` • "
+            f"`{row.guilds}` servidores • visto {discord.utils.format_dt(seen, 'R')}"
+        )
+
+    embed = discord.Embed(
+        title=f"🛰️ **SHARDS - {SERVER_NAME}**",
+        description="\n".join(lines) or "Nenhum shard registrou batimento ainda.",
+        color=0x3498DB,
+        timestamp=datetime.datetime.utcnow(),
+    )
+    if interaction.guild:
+        embed.add_field(name="📍 **ESTE SERVIDOR**", value=f"Shard `{interaction.guild.shard_id}`", inline=False)
+    embed.set_footer(**brand_footer(f"{SERVER_NAME} | 🟢 ativo • 🔴 desconectado • ⚪ sem batimento"))
+    await interaction.response.send_message(embed=embed, ephemeral=True)
 
 
 @bot.tree.command(name="test", description="Testa o bot")
+@instrument("test")
 async def test(interaction: discord.Interaction):
     await interaction.response.send_message("✅ Bot funcionando!", ephemeral=True)
 
@@ -629,22 +1932,677 @@ def setup_persistent_views():
     bot.add_view(TicketControlView())
 
 
+def ticket_categories():
+    for guild in bot.guilds:
+        config = guild_configs.get(guild.id)
+        for ticket_type in TICKET_TYPES:
+            category_id = config.category_id(ticket_type)
+            category = guild.get_channel(category_id) if category_id else None
+            if isinstance(category, discord.CategoryChannel):
+                yield category
+
+
 @bot.event
-async def on_ready():
-    print(f"Bot {bot.user.name} conectado!")
+async def on_guild_channel_create(channel: discord.abc.GuildChannel):
+    open_tickets.track(channel)
+    channel_pool.track(channel)
+
+
+@bot.event
+async def on_guild_channel_update(before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+    open_tickets.track(after)
+
+
+@bot.event
+async def on_guild_channel_delete(channel: discord.abc.GuildChannel):
+    open_tickets.discard_channel(channel.id)
+    channel_pool.discard(channel.id)
+    inactivity.discard(channel.id)
+
+
+@bot.event
+async def on_guild_join(guild: discord.Guild):
+    open_tickets.rebuild(guild)
+
+
+@bot.event
+async def on_guild_remove(guild: discord.Guild):
+    role_cache.invalidate(guild.id)
+    staff_assigner.forget_guild(guild.id)
+    member_cache.invalidate_guild(guild.id)
+    guild_configs.evict(guild.id)
+
+
+@bot.event
+async def on_guild_role_create(role: discord.Role):
+    role_cache.invalidate(role.guild.id)
+    staff_assigner.drop_guild(role.guild.id)
+
+
+@bot.event
+async def on_guild_role_update(before: discord.Role, after: discord.Role):
+    role_cache.invalidate(after.guild.id)
+    staff_assigner.drop_guild(after.guild.id)
+
+
+@bot.event
+async def on_member_update(before: discord.Member, after: discord.Member):
+    # Assignment pools are built from role members; rebuild them when staff roles change hands.
+    if before.roles != after.roles:
+        changed = {role.id for role in before.roles} ^ {role.id for role in after.roles}
+        if not changed.isdisjoint(role_cache.staff_role_ids(after.guild)):
+            staff_assigner.drop_guild(after.guild.id)
+
+
+@bot.event
+async def on_presence_update(before: discord.Member, after: discord.Member):
+    if AUTO_ASSIGN and AUTO_ASSIGN_PREFER_ONLINE and before.status != after.status:
+        staff_assigner.set_online(after.guild.id, after.id, after.status == discord.Status.online)
+
+
+@bot.event
+async def on_raw_member_remove(payload: discord.RawMemberRemoveEvent):
+    staff_assigner.remove_member(payload.guild_id, payload.user.id)
+
+
+@bot.event
+async def on_guild_role_delete(role: discord.Role):
+    role_cache.invalidate(role.guild.id)
+    staff_assigner.drop_guild(role.guild.id)
+
+
+@bot.event
+async def on_shard_ready(shard_id: int):
+    log.info("Shard pronto", extra={"shard_id": shard_id, "cluster_id": cluster.cluster_id})
+
+
+@bot.event
+async def on_shard_disconnect(shard_id: int):
+    log.warning("Shard desconectado", extra={"shard_id": shard_id, "cluster_id": cluster.cluster_id})
+
+
+@bot.event
+async def on_shard_resumed(shard_id: int):
+    log.info("Shard retomado", extra={"shard_id": shard_id, "cluster_id": cluster.cluster_id})
+
+
+# =========================
+# Inactivity
+# =========================
+def inactivity_minutes(ticket_type: TicketType) -> int:
+    if ticket_type.inactivity_minutes is None:
+        return TICKET_INACTIVITY_MINUTES
+    return ticket_type.inactivity_minutes
+
+
+def track_inactivity(
+    channel_id: int, ticket_type: TicketType, last_activity: float | None = None, last_message: float | None = None
+):
+    minutes = inactivity_minutes(ticket_type)
+    if minutes > 0:
+        inactivity.track(channel_id, minutes * 60, TICKET_INACTIVITY_WARNING_MINUTES * 60, last_activity, last_message)
+
+
+def rebuild_inactivity(ticket_types: set[str] | None = None):
+    """Deadlines from the open records' last human activity (no API calls)."""
+    for record in ticket_records.open_records():
+        if ticket_types is not None and record.ticket_type not in ticket_types:
+            continue
+        channel = bot.get_channel(record.channel_id)
+        ticket_type = TICKET_TYPES.get(record.ticket_type)
+        if not isinstance(channel, discord.TextChannel) or not ticket_type:
+            continue
+        last_message = None
+        if channel.last_message_id:
+            last_message = discord.utils.snowflake_time(channel.last_message_id).timestamp()
+        last_activity = record.last_activity
+        if last_activity is None:
+            # Records from before last_activity was kept: the last message is
+            # the best guess there is, even if a bot sent it.
+            last_activity = max(record.opened_at, last_message or 0)
+        track_inactivity(channel.id, ticket_type, last_activity, last_message)
+
+
+@bot.listen("on_message")
+async def track_ticket_activity(message: discord.Message):
+    # Dict lookup first: almost every message is outside a ticket channel.
+    if message.channel.id in inactivity and not message.author.bot:
+        inactivity.touch(message.channel.id, message.created_at.timestamp())
+        await ticket_records.record_activity(message.channel.id, message.created_at.timestamp())
+
+    # The first staff reply claims the ticket: it leaves the dashboard's
+    # "unclaimed" count and its first-response time goes into /stats.
+    record = ticket_records.get_open(message.channel.id)
+    if record is None or record.claimed_at is not None or message.author.bot or message.author.id == record.opener_id:
+        return
+    author = message.author
+    if not isinstance(author, discord.Member):
+        return
+    if author.guild_permissions.administrator or has_any_role(author, role_cache.role_ids(message.guild, record.ticket_type)):
+        # Loads move before any await (here and in every claim path), so two
+        # racing claims can't both count the same ticket.
+        if record.claimer_id is None:
+            track_claimer(record.guild_id, None, author.id, "reply")
+        claimed = await ticket_records.record_claim(message.channel.id, author.id)
+        if claimed:
+            sla_stats.record_first_response(claimed)
+
+
+async def warn_idle_ticket(channel_id: int, closes_at: float):
+    channel = bot.get_channel(channel_id)
+    if not isinstance(channel, discord.TextChannel):
+        inactivity.discard(channel_id)
+        return
+    closes = datetime.datetime.fromtimestamp(closes_at, datetime.timezone.utc)
+    embed = discord.Embed(
+        title="⏰ **TICKET INATIVO**",
+        description=(
+            f"Este ticket está sem mensagens e será fechado automaticamente {discord.utils.format_dt(closes, 'R')}.\n"
+            "Envie uma mensagem para mantê-lo aberto."
+        ),
+        color=0xF39C12,
+        timestamp=datetime.datetime.utcnow(),
+    )
+    embed.set_footer(**brand_footer(SERVER_NAME))
+    await rest.submit(f"message:{channel.id}", lambda: channel.send(embed=embed), PRIORITY_LOW)
+
+
+async def close_idle_ticket(channel_id: int):
+    channel = bot.get_channel(channel_id)
+    if not isinstance(channel, discord.TextChannel):
+        return
+    ticket_type = TICKET_TYPES.from_channel_name(channel.name)
+
+    embed = discord.Embed(
+        title=f"🔒 **TICKET FECHADO POR INATIVIDADE - {SERVER_NAME}**",
+        description="Este ticket ficou sem mensagens e foi encerrado e arquivado automaticamente.",
+        color=0xE74C3C,
+        timestamp=datetime.datetime.utcnow(),
+    )
+    embed.set_footer(**brand_footer(SERVER_NAME))
+    brand_thumbnail(embed)
+    await rest.submit(f"message:{channel.id}", lambda: channel.send(embed=embed), PRIORITY_LOW)
+
+    # Same path as the close button, with the bot as the closer.
+    view = ConfirmCloseView()
+    opener = await view.get_ticket_opener(channel)
+    duration = await view.get_ticket_duration(channel)
+    await view.archive_ticket(channel, channel.guild, opener, channel.guild.me, duration)
+    view.stop()
+    tickets_auto_closed.inc(type=ticket_type.key if ticket_type else "desconhecido")
+    log.info("Ticket fechado por inatividade", extra={"channel_id": channel.id, "duration": duration})
+
+
+# =========================
+# Search index
+# =========================
+def looks_like_ticket(channel) -> TicketType | None:
+    """Ticket type of a channel without a record: from its ticket category, or
+    from its name prefix (archived or not) when the topic carries the opener marker.
+
+    A name prefix alone also matches public channels such as "roleplay-geral".
+    """
+    ticket_type = guild_configs.get(channel.guild.id).ticket_type_for_category(channel.category_id)
+    if ticket_type or not TOPIC_OPENER_RE.search(channel.topic or ""):
+        return ticket_type
+    return TICKET_TYPES.from_channel_name(channel.name.removeprefix(ARCHIVED_PREFIX))
+
+
+async def register_search_ticket(channel: discord.TextChannel) -> bool:
+    record = await ticket_records.get(channel.id)
+    ticket_type = TICKET_TYPES.get(record.ticket_type) if record else looks_like_ticket(channel)
+    if not record and not ticket_type:
+        return False
+    await search_index.upsert_ticket(
+        channel.id, channel.guild.id, channel.name, ticket_type.key if ticket_type else record.ticket_type,
+        record.opener_id if record else None, record.number if record else None,
+    )
+    return True
+
+
+@bot.listen("on_message")
+async def index_ticket_message(message: discord.Message):
+    channel = message.channel
+    if channel.id not in search_index:
+        if not isinstance(channel, discord.TextChannel) or not (
+            ticket_records.get_open(channel.id) or looks_like_ticket(channel)
+        ):
+            return
+        if not await register_search_ticket(channel):
+            return
+    search_index.add(indexed_message(message))
+
+
+@bot.event
+async def on_raw_message_edit(payload: discord.RawMessageUpdateEvent):
+    message = getattr(payload, "message", None) or payload.cached_message
+    if payload.channel_id in search_index and message is not None and message.guild is not None:
+        search_index.add(indexed_message(message))
+
+
+@bot.event
+async def on_raw_message_delete(payload: discord.RawMessageDeleteEvent):
+    if payload.channel_id in search_index:
+        search_index.delete(payload.message_id)
+
+
+async def backfill_search_index():
+    """Index what ticket channels received while the bot was offline, oldest first."""
+    categories = list(ticket_categories())
+    for guild in bot.guilds:
+        categories += archive_categories(guild)
+    candidates = {channel.id: channel for category in categories for channel in category.channels}
+    for record in ticket_records.open_records():
+        channel = bot.get_channel(record.channel_id)
+        if channel:
+            candidates[channel.id] = channel
+
+    backfilled = 0
+    # Newest message read per channel; history comes oldest first, so even a
+    # channel cut short by an error is indexed up to there.
+    watermarks: dict[int, int] = {}
+    for channel in candidates.values():
+        if not isinstance(channel, discord.TextChannel) or not channel.last_message_id:
+            continue
+        watermark = await search_index.watermark(channel.id)
+        if watermark is not None and watermark >= channel.last_message_id:
+            continue  # Up to date: no history call needed.
+        if watermark is None and not await register_search_ticket(channel):
+            continue
+        try:
+            async for message in channel.history(limit=None, after=discord.Object(watermark or 0), oldest_first=True):
+                search_index.add(indexed_message(message))
+                watermarks[channel.id] = message.id
+                backfilled += 1
+        except discord.HTTPException:
+            log.exception("Erro ao indexar histórico do ticket", extra={"channel_id": channel.id})
+    await search_index.flush()
+    await search_index.mark_backfilled(watermarks)
+    log.info("Índice de busca atualizado", extra={"messages": backfilled})
+
+
+SEARCH_PAGE_SIZE = 5
+SEARCH_ERROR_MESSAGE = "❌ Não foi possível fazer essa busca; tente outras palavras."
+
+
+def parse_search_date(text: str | None, end: bool = False) -> float | None:
+    # "AAAA-MM-DD" in UTC; an end date includes that whole day.
+    if not text:
+        return None
+    day = datetime.date.fromisoformat(text.strip())
+    moment = datetime.datetime.combine(day, datetime.time(), datetime.timezone.utc)
+    return (moment + datetime.timedelta(days=1 if end else 0)).timestamp()
+
+
+def search_embed(guild: discord.Guild, hits: list[SearchHit], page: int, elapsed: float) -> discord.Embed:
+    embed = discord.Embed(
+        title=f"🔎 **BUSCA - {SERVER_NAME}**",
+        description=None if hits else "Nenhuma mensagem encontrada.",
+        color=0x3498DB,
+        timestamp=datetime.datetime.utcnow(),
+    )
+    for hit in hits:
+        ticket_type = TICKET_TYPES.get(hit.ticket_type) if hit.ticket_type else None
+        label = ticket_type.label if ticket_type else "Ticket"
+        number = f" #{hit.number:03d}" if hit.number is not None else ""
+        sent_at = datetime.datetime.fromtimestamp(hit.created_at, datetime.timezone.utc)
+        link = f"https://discord.com/channels/{guild.id}/{hit.channel_id}/{hit.message_id}"
+        embed.add_field(
+            name=f"{label}{number} • {hit.author}"[:256],
+            value=f"{hit.snippet[:700]}\n<#{hit.channel_id}> • {discord.utils.format_dt(sent_at, 'f')} • [mensagem]({link})",
+            inline=False,
+        )
+    embed.set_footer(**brand_footer(f"Página {page + 1} • {elapsed * 1000:.0f} ms"))
+    return embed
+
+
+class SearchResultsView(discord.ui.View):
+    """Previous/next pages of a /search, for the staff member who ran it."""
+
+    def __init__(self, user_id: int, query: dict, page: int, has_next: bool):
+        super().__init__(timeout=300)
+        self.user_id = user_id
+        self.query = query
+        self.page = page
+        self.previous_page.disabled = page == 0
+        self.next_page.disabled = not has_next
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.user_id
+
+    async def show(self, interaction: discord.Interaction, page: int):
+        try:
+            embed, view = await run_search(interaction.guild, self.user_id, self.query, page)
+        except sqlite3.OperationalError:
+            log.exception("Erro na busca", extra={"guild_id": interaction.guild.id})
+            await interaction.response.send_message(SEARCH_ERROR_MESSAGE, ephemeral=True)
+            return
+        await interaction.response.edit_message(embed=embed, view=view)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.page - 1)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.page + 1)
+
+
+async def run_search(guild: discord.Guild, user_id: int, query: dict, page: int):
+    started = time.perf_counter()
+    # One extra row tells whether there is a next page.
+    hits = await search_index.search(guild.id, **query, limit=SEARCH_PAGE_SIZE + 1, offset=page * SEARCH_PAGE_SIZE)
+    elapsed = time.perf_counter() - started
+    has_next = len(hits) > SEARCH_PAGE_SIZE
+    embed = search_embed(guild, hits[:SEARCH_PAGE_SIZE], page, elapsed)
+    return embed, SearchResultsView(user_id, query, page, has_next)
+
+
+@bot.tree.command(name="search", description="Busca nas conversas dos tickets")
+@app_commands.default_permissions(administrator=True)
+@app_commands.describe(
+    texto="Palavras a buscar (todas precisam aparecer)",
+    tipo="Só tickets deste tipo",
+    usuario="Mensagens deste usuário ou tickets abertos por ele",
+    desde="Data inicial (AAAA-MM-DD)",
+    ate="Data final, inclusive (AAAA-MM-DD)",
+)
+@app_commands.choices(tipo=[app_commands.Choice(name=t.label, value=t.key) for t in TICKET_TYPES])
+@instrument("search")
+async def search(
+    interaction: discord.Interaction,
+    texto: str | None = None,
+    tipo: app_commands.Choice[str] | None = None,
+    usuario: discord.User | None = None,
+    desde: str | None = None,
+    ate: str | None = None,
+):
+    try:
+        since, until = parse_search_date(desde), parse_search_date(ate, end=True)
+    except ValueError:
+        await interaction.response.send_message("❌ Use datas no formato `AAAA-MM-DD`.", ephemeral=True)
+        return
+    query = {
+        "text": texto.strip() if texto else None,
+        "ticket_type": tipo.value if tipo else None,
+        "user_id": usuario.id if usuario else None,
+        "since": since,
+        "until": until,
+    }
+    try:
+        embed, view = await run_search(interaction.guild, interaction.user.id, query, 0)
+    except sqlite3.OperationalError:
+        log.exception("Erro na busca", extra={"guild_id": interaction.guild.id})
+        await interaction.response.send_message(SEARCH_ERROR_MESSAGE, ephemeral=True)
+        return
+    await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+
+
+# =========================
+# Config reload
+# =========================
+def reload_env() -> dict[str, str | None]:
+    """Re-read .env into os.environ; returns the previous values of the variables it changed."""
+    global _dotenv_names
+    values = dotenv_values(DOTENV_PATH) if DOTENV_PATH else {}
+    previous = {}
+    for name in (_dotenv_names | values.keys()) - _PROCESS_ENV:
+        value = values.get(name)
+        if os.environ.get(name) != value:
+            previous[name] = os.environ.get(name)
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    _dotenv_names = set(values)
+    return previous
+
+
+def restore_env(previous: dict[str, str | None]):
+    for name, value in previous.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+
+
+def apply_bot_config(new: BotConfig):
+    """Swap in ``new`` and rebuild what is derived from it.
+
+    Nothing here awaits, so every handler runs entirely on the old config or
+    entirely on the new one.
+    """
+    global BOT_CONFIG, TICKET_TYPES, SERVER_NAME, BRAND_ICON_URL, BRAND_THUMB_URL
+    global ARCHIVE_CATEGORY_ID, DASHBOARD_CHANNEL_ID
+    old = BOT_CONFIG
+    BOT_CONFIG, TICKET_TYPES = new, new.ticket_types
+    SERVER_NAME, BRAND_ICON_URL, BRAND_THUMB_URL = new.server_name, new.brand_icon_url, new.brand_thumb_url
+    ARCHIVE_CATEGORY_ID, DASHBOARD_CHANNEL_ID = new.archive_category_id, new.dashboard_channel_id
+    guild_configs.set_defaults(TICKET_TYPES, ARCHIVE_CATEGORY_ID, DASHBOARD_CHANNEL_ID)
+
+    role_cache.clear()
+    # Re-registered so the menu buttons hold the new TicketType objects.
     setup_persistent_views()
+    for guild in bot.guilds:
+        staff_assigner.drop_guild(guild.id)
+        open_tickets.rebuild(guild)
+        refresh_dashboard(guild.id)
+        if new.archive_category_id != old.archive_category_id and not guild_configs.get(guild.id).archive_override:
+            # Overflow categories belong to the previous archive category.
+            asyncio.create_task(guild_configs.set_archive_overflow(guild.id, []))
+    if CHANNEL_POOL_ENABLED:
+        for category in ticket_categories():
+            channel_pool.rebuild(category)
+
+    # Idle deadlines only change for types whose effective timeout did;
+    # tracking a channel again replaces its deadline.
+    retimed = {
+        ticket_type.key for ticket_type in new.ticket_types
+        if inactivity_minutes(ticket_type) != inactivity_minutes(old.ticket_types.get(ticket_type.key))
+    }
+    if retimed:
+        for record in ticket_records.open_records():
+            if record.ticket_type in retimed and inactivity_minutes(TICKET_TYPES.get(record.ticket_type)) == 0:
+                inactivity.discard(record.channel_id)
+        rebuild_inactivity(retimed)
+
+
+def reload_config(source: str) -> list[str]:
+    """Re-read .env, CONFIG_FILE and TICKET_TYPES_FILE and swap the result in.
+
+    Returns the names of the settings that changed. An invalid config raises
+    ValueError and leaves the running one (and the environment) untouched.
+    """
+    global _dotenv_names
+    dotenv_names = _dotenv_names
+    previous_env = reload_env()
+    try:
+        new = load_config()
+        check_reloadable(BOT_CONFIG, new)
+    except Exception as e:
+        restore_env(previous_env)
+        _dotenv_names = dotenv_names
+        config_reloads.inc(result="invalid")
+        log.error("Configuração inválida, mantendo a atual", extra={"source": source, "error": str(e)})
+        raise ValueError(str(e)) from e
+    finally:
+        config_watcher.mark()
+
+    changes = config_changes(BOT_CONFIG, new)
+    if changes:
+        apply_bot_config(new)
+    config_reloads.inc(result="applied" if changes else "unchanged")
+    log.info("Configuração recarregada", extra={"source": source, "changes": changes})
+    return changes
+
+
+config_watcher = FileWatcher([DOTENV_PATH, CONFIG_FILE, TICKET_TYPES_FILE], CONFIG_WATCH_SECONDS)
+
+
+def reload_on_change():
+    # An invalid file is already logged; the next save is picked up again.
+    with contextlib.suppress(ValueError):
+        reload_config("watcher")
+
 
+@bot.tree.command(name="reload", description="Recarrega a configuração (.env e arquivos de config) sem reiniciar")
+@app_commands.default_permissions(administrator=True)
+@instrument("reload")
+async def reload(interaction: discord.Interaction):
+    try:
+        changes = reload_config("command")
+    except ValueError as e:
+        await interaction.response.send_message(
+            f"❌ Configuração inválida; a atual continua valendo.\n```{str(e)[:1500]}```", ephemeral=True
+        )
+        return
+
+    embed = discord.Embed(
+        title="🔄 **CONFIGURAÇÃO RECARREGADA**",
+        description="\n".join(f"• `{change}`" for change in changes) or "Nenhuma mudança encontrada.",
+        color=0x2ECC71,
+        timestamp=datetime.datetime.utcnow(),
+    )
+    if cluster.sharded:
+        embed.add_field(name="🛰️ **SHARDS**", value="Os outros processos recarregam ao notar a mudança nos arquivos.")
+    embed.set_footer(**brand_footer(SERVER_NAME))
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+# =========================
+# Startup
+# =========================
+startup_phases: dict[str, float] = {}
+_last_startup_mark = _process_started
+
+
+def mark_startup(phase: str):
+    global _last_startup_mark
+    now = time.perf_counter()
+    startup_phases[phase] = now - _last_startup_mark
+    _last_startup_mark = now
+
+
+registry.callback(
+    "ticketbot_startup_seconds", "Seconds spent in each phase of the first start.", ("phase",),
+    lambda: dict(startup_phases),
+)
+
+
+async def sync_commands(force: bool = False):
+    tree_hash = command_tree_hash(bot.tree)
+    if not force and command_sync.is_synced(bot.application_id, tree_hash):
+        log.info("Comandos inalterados, sincronização ignorada", extra={"hash": tree_hash[:12]})
+        return
     try:
         synced = await bot.tree.sync()
-        print(f"Comandos sincronizados: {len(synced)}")
-    except Exception as e:
-        print(f"Erro ao sincronizar comandos: {e}")
+    except Exception:
+        log.exception("Erro ao sincronizar comandos")
+        return
+    command_sync.mark_synced(bot.application_id, tree_hash)
+    log.info("Comandos sincronizados", extra={"count": len(synced), "hash": tree_hash[:12], "forced": force})
+
+
+@bot.event
+async def setup_hook():
+    # Runs once per process, after login and before the gateway connects;
+    # on_ready fires again on every reconnect.
+    global shard_health
+    mark_startup("login")
+    shard_health = ShardHealthStore(CLUSTER_DB)
+    setup_persistent_views()
+
+    # Staff loads come from the open records, before any claim can arrive.
+    for record in ticket_records.open_records():
+        if record.claimer_id is not None:
+            staff_assigner.add_load(record.guild_id, record.claimer_id, 1)
+
+    if METRICS_ENABLED:
+        await start_metrics_server(METRICS_HOST, METRICS_PORT)
+
+    # Commands are global: with several workers only the first one syncs them.
+    if cluster.cluster_id == 0:
+        await sync_commands(force=FORCE_SYNC)
+    mark_startup("sync")
+
+    asyncio.create_task(warm_up())
+
+
+async def migrate_legacy_counters():
+    """Move each old per-type counter into the guild that owned it: the one holding the .env category."""
+    for ticket_type in TICKET_TYPES:
+        category = bot.get_channel(ticket_type.category_id) if ticket_type.category_id else None
+        if category is None:
+            continue
+        value = await counter_store.migrate(ticket_type.key, guild_counter(category.guild.id, ticket_type.key))
+        if value is not None:
+            log.info(
+                "Contador antigo migrado",
+                extra={"ticket_type": ticket_type.key, "guild_id": category.guild.id, "value": value},
+            )
+
 
-    activity = discord.Activity(type=discord.ActivityType.watching, name=_env("PRESENCE_TEXT", "seus tickets 👀"))
-    await bot.change_presence(activity=activity, status=discord.Status.online)
+async def warm_up():
+    """One-time work that needs the guild cache, run after the first READY."""
+    await bot.wait_until_ready()
+    mark_startup("gateway_ready")
 
+    await migrate_legacy_counters()
+
+    for guild in bot.guilds:
+        open_tickets.rebuild(guild)
+    log.info("Tickets abertos indexados", extra={"count": len(open_tickets)})
+
+    asyncio.create_task(shard_heartbeat())
+
+    rebuild_inactivity()
+    asyncio.create_task(inactivity.run(warn_idle_ticket, close_idle_ticket))
+    log.info("Prazos de inatividade carregados", extra={"count": len(inactivity)})
+
+    if CHANNEL_POOL_ENABLED:
+        for category in ticket_categories():
+            channel_pool.rebuild(category)
+        asyncio.create_task(channel_pool.run(ticket_categories, CHANNEL_POOL_REFILL_SECONDS))
+
+    if ARCHIVE_RETENTION_DAYS:
+        asyncio.create_task(retention_loop())
+
+    for guild in bot.guilds:
+        refresh_dashboard(guild.id)
+
+    if SEARCH_BACKFILL:
+        asyncio.create_task(backfill_search_index())
+
+    if CONFIG_WATCH_SECONDS > 0 and config_watcher.paths:
+        asyncio.create_task(config_watcher.run(reload_on_change))
+
+    log.info(
+        "Inicialização concluída",
+        extra={"phases": {phase: round(seconds, 3) for phase, seconds in startup_phases.items()},
+               "total": round(sum(startup_phases.values()), 3)},
+    )
+
+
+@bot.event
+async def on_ready():
+    log.info("Bot conectado", extra={"user": str(bot.user), "guilds": len(bot.guilds)})
+
+
+mark_startup("import")
 
-load_ticket_counters()
 
 if __name__ == "__main__":
-    bot.run(TOKEN)
+    parser = argparse.ArgumentParser(description="Bot de tickets")
+    parser.add_argument("--force-sync", action="store_true", help="sincroniza os comandos mesmo sem mudanças")
+    FORCE_SYNC = parser.parse_args().force_sync
+    try:
+        bot.run(TOKEN, log_handler=None)
+    finally:
+        counter_store.close()
+        ticket_records.close()
+        search_index.close()
+        sla_stats.close()
+        guild_configs.close()
+        if shard_health is not None:
+            shard_health.close()
+        transcript_exporter.close()
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from collections import OrderedDict
+
+import discord
+
+log = logging.getLogger(__name__)
+
+
+def lean_intents() -> discord.Intents:
+    """Just what the ticket flow uses: guild/channel/role events and message content for transcripts."""
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.guild_messages = True
+    intents.message_content = True
+    return intents
+
+
+class MemberCache:
+    """LRU of members fetched on demand, for when the gateway member cache is off.
+
+    Lookups try the gateway cache first (it always holds the bot itself, and
+    every member when the members intent is on), then the LRU, and only then
+    fetch from the API. Concurrent lookups of the same member share a fetch.
+    """
+
+    def __init__(self, capacity: int = 5000):
+        self.capacity = capacity
+        self._members: OrderedDict[tuple[int, int], discord.Member] = OrderedDict()
+        self._inflight: dict[tuple[int, int], asyncio.Future] = {}
+        self.hits = 0
+        self.fetches = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def put(self, member: discord.Member):
+        if not isinstance(member, discord.Member):
+            return
+        key = (member.guild.id, member.id)
+        self._members[key] = member
+        self._members.move_to_end(key)
+        while len(self._members) > self.capacity:
+            self._members.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate_guild(self, guild_id: int):
+        for key in [key for key in self._members if key[0] == guild_id]:
+            del self._members[key]
+
+    async def get(self, guild: discord.Guild, member_id: int) -> discord.Member | None:
+        member = guild.get_member(member_id)
+        if member:
+            return member
+
+        key = (guild.id, member_id)
+        member = self._members.get(key)
+        if member:
+            self._members.move_to_end(key)
+            self.hits += 1
+            return member
+
+        pending = self._inflight.get(key)
+        if pending:
+            return await asyncio.shield(pending)
+
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            member = await self._fetch(guild, member_id)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; don't leave "exception never retrieved".
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+        if member:
+            self.put(member)
+        future.set_result(member)
+        return member
+
+    async def _fetch(self, guild: discord.Guild, member_id: int) -> discord.Member | None:
+        self.fetches += 1
+        try:
+            return await guild.fetch_member(member_id)
+        except discord.NotFound:
+            return None
+        except discord.HTTPException as e:
+            log.warning("Erro ao buscar membro", extra={"guild_id": guild.id, "member_id": member_id, "error": str(e)})
+            return None
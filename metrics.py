@@ -0,0 +1,270 @@
+import datetime
+import functools
+import json
+import logging
+import math
+import time
+from typing import Callable, Iterable
+
+from aiohttp import web
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+log = logging.getLogger(__name__)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple, extra: dict | None = None) -> str:
+    pairs = list(zip(labelnames, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(labels[name] for name in self.labelnames)
+
+    def samples(self) -> Iterable[tuple[str, tuple, dict | None, float]]:
+        return ()
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, values, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, values, extra)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        for key, value in self._values.items():
+            yield "", key, None, value
+
+
+class CallbackMetric(Metric):
+    """Gauge or counter whose values are read from ``fn`` at scrape time.
+
+    ``fn`` returns a mapping of label-value tuples to numbers.
+    """
+
+    def __init__(self, name, documentation, labelnames, fn: Callable[[], dict], kind: str = "gauge"):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.fn = fn
+
+    def samples(self):
+        for key, value in self.fn().items():
+            yield "", key if isinstance(key, tuple) else (key,), None, value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: dict[tuple, list[int]] = {}
+        self._sums: dict[tuple, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._sums[key] = 0.0
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        self._sums[key] += value
+
+    def samples(self):
+        for key, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield "_bucket", key, {"le": _format_value(bound)}, cumulative
+            yield "_sum", key, None, self._sums[key]
+            yield "_count", key, None, cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name, documentation, labelnames, fn, kind="gauge") -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, labelnames, fn, kind))
+
+    def render(self) -> str:
+        parts = []
+        for metric in self._metrics.values():
+            try:
+                parts.append(metric.render())
+            except Exception as e:
+                log.warning("Erro ao coletar métrica", extra={"metric": metric.name, "error": str(e)})
+        return "\n".join(parts) + "\n"
+
+
+registry = Registry()
+
+handler_latency = registry.histogram(
+    "ticketbot_handler_latency_seconds", "Latency of view callbacks and slash commands.", ("handler",)
+)
+handler_errors = registry.counter(
+    "ticketbot_handler_errors_total", "Unhandled exceptions raised by view callbacks and slash commands.", ("handler",)
+)
+
+interaction_ack_latency = registry.histogram(
+    "ticketbot_interaction_ack_seconds",
+    "Time from an interaction's creation until its handler had acknowledged it and returned.",
+    ("handler",),
+)
+interaction_e2e_latency = registry.histogram(
+    "ticketbot_interaction_e2e_seconds",
+    "Time from an interaction's creation until all of its work, background jobs included, was done.",
+    ("handler",),
+)
+
+
+def interaction_age(interaction) -> float:
+    # Measured from the interaction's snowflake, so gateway delay counts too.
+    return max(0.0, time.time() - interaction.created_at.timestamp())
+
+
+def _find_interaction(args):
+    return next((arg for arg in args if hasattr(arg, "response") and hasattr(arg, "extras")), None)
+
+
+def instrument(handler: str):
+    """Record latency and errors of an async callback under ``handler``.
+
+    Handlers acknowledge first and hand slow work to the background pool, so
+    the time until they return is their ack latency. Handlers that queued a
+    background job (``interaction.extras["background"]``) record their
+    end-to-end latency when that job finishes instead.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                handler_errors.inc(handler=handler)
+                raise
+            finally:
+                handler_latency.observe(time.perf_counter() - started, handler=handler)
+                interaction = _find_interaction(args)
+                if interaction is not None and interaction.response.is_done():
+                    interaction_ack_latency.observe(interaction_age(interaction), handler=handler)
+                    if not interaction.extras.get("background"):
+                        interaction_e2e_latency.observe(interaction_age(interaction), handler=handler)
+
+        return wrapper
+
+    return decorator
+
+
+class RateLimitLogCounter(logging.Handler):
+    """Counts discord.py's own "rate limited" warnings (it retries 429s internally)."""
+
+    def __init__(self, counter: Counter):
+        super().__init__(level=logging.WARNING)
+        self.counter = counter
+
+    def emit(self, record: logging.LogRecord):
+        if "rate limit" in record.getMessage().lower():
+            self.counter.inc()
+
+
+async def start_metrics_server(host: str, port: int, reg: Registry = registry) -> web.AppRunner:
+    async def metrics(request: web.Request) -> web.Response:
+        return web.Response(text=reg.render(), content_type="text/plain", charset="utf-8")
+
+    async def healthz(request: web.Request) -> web.Response:
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    app.router.add_get("/healthz", healthz)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    log.info("Endpoint de métricas ativo", extra={"host": host, "port": port})
+    return runner
+
+
+# =========================
+# Structured logging
+# =========================
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(fmt: str = "json", level: str = "INFO"):
+    handler = logging.StreamHandler()
+    if fmt == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level.upper())
@@ -0,0 +1,266 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+import aiohttp
+import discord
+
+from buckets import TokenBucket
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+PRIORITY_NAMES = {"high": PRIORITY_HIGH, "normal": PRIORITY_NORMAL, "low": PRIORITY_LOW}
+
+# (requests, per seconds) for each route kind; the major parameter (guild or
+# channel id) after the ":" gets its own bucket, like Discord's own buckets.
+DEFAULT_ROUTE_LIMITS = {
+    "channel_create": (5, 5.0),
+    "channel_edit": (5, 5.0),
+    "channel_delete": (5, 5.0),
+    "permissions": (5, 5.0),
+    "message": (5, 5.0),
+}
+DEFAULT_LIMIT = (5, 5.0)
+GLOBAL_LIMIT = (50, 1.0)
+# Calls that may have taken effect even when they failed with a 5xx or a
+# dropped connection; retrying them could duplicate the channel or message.
+NON_IDEMPOTENT_ROUTES = frozenset({"channel_create", "message"})
+
+log = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """The scheduler is at capacity; the caller should ask the user to retry."""
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    seq: int
+    route: str = field(compare=False)
+    factory: Callable[[], Awaitable[Any]] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    idempotent: bool = field(compare=False, default=True)
+    attempt: int = field(compare=False, default=0)
+    # Set when the job leaves the park holding its route token.
+    has_token: bool = field(compare=False, default=False)
+
+
+class RestStats:
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.max_depth = 0
+        self.calls_by_route: dict[str, int] = defaultdict(int)
+        self.wait_total: dict[int, float] = defaultdict(float)
+        self.wait_max: dict[int, float] = defaultdict(float)
+        self.wait_count: dict[int, int] = defaultdict(int)
+
+    def record_wait(self, priority: int, waited: float):
+        self.wait_total[priority] += waited
+        self.wait_count[priority] += 1
+        self.wait_max[priority] = max(self.wait_max[priority], waited)
+
+    def mean_wait(self, priority: int) -> float:
+        count = self.wait_count[priority]
+        return self.wait_total[priority] / count if count else 0.0
+
+
+def route_kind(route: str) -> str:
+    return route.partition(":")[0]
+
+
+class RestScheduler:
+    """Priority queue in front of every ticket mutation sent to Discord.
+
+    Jobs are coroutine factories so that retries can re-issue the call.
+    ``submit`` raises QueueFull instead of queueing without bound.
+
+    Workers never sleep on a route's bucket: a job whose route is out of
+    tokens is parked with the route's other waiting jobs and put back in the
+    queue as tokens come in, and a retry waits out its backoff the same way,
+    so one throttled route can't hold up jobs for idle routes.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_queue: int = 500,
+        max_retries: int = 3,
+        route_limits: dict[str, tuple[int, float]] | None = None,
+        global_limit: tuple[int, float] = GLOBAL_LIMIT,
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.route_limits = {**DEFAULT_ROUTE_LIMITS, **(route_limits or {})}
+        self.stats = RestStats()
+        self._queue: asyncio.PriorityQueue[_Job] = asyncio.PriorityQueue()
+        self._seq = itertools.count()
+        self._buckets: dict[str, TokenBucket] = {}
+        self._global = TokenBucket(global_limit[0] / global_limit[1], global_limit[0])
+        self._tasks: list[asyncio.Task] = []
+        # Jobs waiting for their route's bucket, per route, in priority order.
+        self._parked: dict[str, list[_Job]] = {}
+        # Jobs parked or waiting out a retry backoff, outside the queue.
+        self._deferred = 0
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() + self._deferred
+
+    @property
+    def saturated(self) -> bool:
+        # Leave headroom so jobs already in flight (e.g. the archive step of
+        # a close) are not rejected after the user was told "ok".
+        return self.depth >= self.max_queue * 0.8
+
+    @property
+    def idle(self) -> bool:
+        return self.depth == 0
+
+    def _bucket(self, route: str) -> TokenBucket:
+        bucket = self._buckets.get(route)
+        if bucket is None:
+            count, per = self.route_limits.get(route_kind(route), DEFAULT_LIMIT)
+            bucket = self._buckets[route] = TokenBucket(count / per, count)
+        return bucket
+
+    def _ensure_started(self):
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._worker(), name=f"rest-worker-{i}") for i in range(self.workers)]
+
+    async def submit(
+        self,
+        route: str,
+        factory: Callable[[], Awaitable[Any]],
+        priority: int = PRIORITY_NORMAL,
+        idempotent: bool | None = None,
+    ) -> Any:
+        """Queue ``factory()`` on ``route`` and return its result.
+
+        Non-idempotent calls (by default the NON_IDEMPOTENT_ROUTES kinds) are
+        only retried on a 429, when Discord has not processed them.
+        """
+        if self.depth >= self.max_queue:
+            self.stats.rejected += 1
+            raise QueueFull(f"REST queue full ({self.depth} jobs)")
+
+        self._ensure_started()
+        if idempotent is None:
+            idempotent = route_kind(route) not in NON_IDEMPOTENT_ROUTES
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_Job(priority, next(self._seq), route, factory, future, time.monotonic(), idempotent))
+        self.stats.submitted += 1
+        self.stats.max_depth = max(self.stats.max_depth, self.depth)
+        return await future
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.future.cancelled():
+                    continue
+                if not job.has_token and (job.route in self._parked or self._bucket(job.route).try_acquire() > 0):
+                    self._park(job)
+                    continue
+                job.has_token = False
+                await self._run(job)
+            except Exception:
+                log.exception("Erro inesperado no agendador REST", extra={"route": job.route})
+            finally:
+                self._queue.task_done()
+
+    def _park(self, job: _Job):
+        parked = self._parked.get(job.route)
+        if parked is None:
+            parked = self._parked[job.route] = []
+            self._wake_route(job.route)
+        heapq.heappush(parked, job)
+        self._deferred += 1
+
+    def _wake_route(self, route: str):
+        delay = self._bucket(route).wait_time()
+        asyncio.get_running_loop().call_later(delay, self._unpark, route)
+
+    def _unpark(self, route: str):
+        # Hand back as many jobs as the bucket has tokens for; the rest stay
+        # parked, so later jobs on the route can't overtake them.
+        parked = self._parked[route]
+        bucket = self._bucket(route)
+        while parked and bucket.try_acquire() <= 0:
+            job = heapq.heappop(parked)
+            job.has_token = True
+            self._deferred -= 1
+            self._queue.put_nowait(job)
+        if parked:
+            self._wake_route(route)
+        else:
+            del self._parked[route]
+
+    def _retry_later(self, job: _Job, delay: float):
+        self._deferred += 1
+
+        def requeue():
+            self._deferred -= 1
+            self._queue.put_nowait(job)
+
+        asyncio.get_running_loop().call_later(delay, requeue)
+
+    async def _run(self, job: _Job):
+        """One attempt at ``job``; its route token is already taken."""
+        if job.attempt == 0:
+            self.stats.record_wait(job.priority, time.monotonic() - job.enqueued_at)
+        await self._global.acquire()
+        self.stats.calls_by_route[route_kind(job.route)] += 1
+        try:
+            result = await job.factory()
+        except discord.HTTPException as e:
+            if e.status == 429:
+                self.stats.rate_limited += 1
+                self._bucket(job.route).penalize(getattr(e, "retry_after", 1.0) or 1.0)
+            retryable = e.status == 429 or (e.status >= 500 and job.idempotent)
+            if not retryable or job.attempt == self.max_retries:
+                return self._fail(job, e)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if not job.idempotent or job.attempt == self.max_retries:
+                return self._fail(job, e)
+        except Exception as e:
+            return self._fail(job, e)
+        else:
+            self.stats.completed += 1
+            if not job.future.done():
+                job.future.set_result(result)
+            return
+
+        self.stats.retries += 1
+        # Exponential backoff with full jitter; a 429's penalty is waited out
+        # in the park when the job comes back around.
+        delay = random.uniform(0, min(30.0, 0.5 * 2**job.attempt))
+        job.attempt += 1
+        self._retry_later(job, delay)
+
+    def _fail(self, job: _Job, error: BaseException):
+        self.stats.failed += 1
+        if not job.future.done():
+            job.future.set_exception(error)
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
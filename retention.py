@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from buckets import Limit, TokenBucket
+
+log = logging.getLogger(__name__)
+
+# How long the purge backs off while live traffic keeps ``busy()`` true.
+BUSY_BACKOFF = 2.0
+
+
+class RetentionPurger:
+    """Exports and deletes archived tickets older than the retention period.
+
+    Work is fetched in batches of ``batch_size``. At most ``concurrency``
+    tickets are in flight, deletions are paced by the ``budget`` token bucket,
+    and the purge waits while ``busy()`` is true, so clearing thousands of old
+    tickets never competes with live traffic for Discord's rate limits.
+    """
+
+    def __init__(self, retention_seconds: float, batch_size: int = 25, concurrency: int = 1, budget: Limit = (10, 60.0)):
+        self.retention_seconds = retention_seconds
+        self.batch_size = batch_size
+        self.budget = TokenBucket(budget[0] / budget[1], budget[0])
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.purged = 0
+        self.failed = 0
+        self.last_run: float | None = None
+
+    async def _purge_one(self, item: Any, purge: Callable[[Any], Awaitable[bool]], busy: Callable[[], bool]) -> bool:
+        async with self._semaphore:
+            while busy():
+                await asyncio.sleep(BUSY_BACKOFF)
+            await self.budget.acquire()
+            try:
+                return await purge(item)
+            except Exception:
+                log.exception("Erro ao expurgar ticket", extra={"channel_id": getattr(item, "channel_id", None)})
+                return False
+
+    async def run_once(
+        self,
+        fetch: Callable[[float, int, int], Awaitable[list]],
+        purge: Callable[[Any], Awaitable[bool]],
+        busy: Callable[[], bool] = lambda: False,
+    ) -> int:
+        """Purge everything past the retention period; returns how many items went.
+
+        ``fetch(cutoff, limit, offset)`` returns the next batch, oldest first,
+        and ``purge(item)`` returns True once the item is gone. Items that fail
+        stay in the store and are skipped with ``offset`` until the next run.
+        """
+        cutoff = time.time() - self.retention_seconds
+        purged = skipped = 0
+        while True:
+            batch = await fetch(cutoff, self.batch_size, skipped)
+            if not batch:
+                break
+            results = await asyncio.gather(*(self._purge_one(item, purge, busy) for item in batch))
+            purged += sum(results)
+            skipped += len(results) - sum(results)
+
+        self.purged += purged
+        self.failed += skipped
+        self.last_run = time.time()
+        if purged or skipped:
+            log.info("Expurgo de tickets arquivados concluído", extra={"purged": purged, "skipped": skipped})
+        return purged
@@ -0,0 +1,312 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass
+
+import discord
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_tickets (
+    channel_id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    ticket_type TEXT,
+    opener_id INTEGER,
+    number INTEGER,
+    channel_name TEXT NOT NULL,
+    -- Newest message id ingested from this channel, live or by backfill.
+    last_message_id INTEGER NOT NULL DEFAULT 0,
+    -- Every message up to this id is indexed; only backfill and a clean
+    -- shutdown advance it, so live messages can't hide an offline gap.
+    backfilled_id INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS search_messages (
+    message_id INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL,
+    guild_id INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    author TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS search_messages_guild ON search_messages (guild_id, created_at);
+CREATE INDEX IF NOT EXISTS search_messages_author ON search_messages (guild_id, author_id);
+CREATE INDEX IF NOT EXISTS search_tickets_opener ON search_tickets (guild_id, opener_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+    content, author, content='search_messages', content_rowid='message_id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS search_messages_ai AFTER INSERT ON search_messages BEGIN
+    INSERT INTO search_fts (rowid, content, author) VALUES (new.message_id, new.content, new.author);
+END;
+CREATE TRIGGER IF NOT EXISTS search_messages_ad AFTER DELETE ON search_messages BEGIN
+    INSERT INTO search_fts (search_fts, rowid, content, author) VALUES ('delete', old.message_id, old.content, old.author);
+END;
+CREATE TRIGGER IF NOT EXISTS search_messages_au AFTER UPDATE ON search_messages BEGIN
+    INSERT INTO search_fts (search_fts, rowid, content, author) VALUES ('delete', old.message_id, old.content, old.author);
+    INSERT INTO search_fts (rowid, content, author) VALUES (new.message_id, new.content, new.author);
+END;
+"""
+
+
+@dataclass(frozen=True)
+class IndexedMessage:
+    message_id: int
+    channel_id: int
+    guild_id: int
+    author_id: int
+    author: str
+    created_at: float
+    content: str
+
+
+def indexed_message(message: discord.Message) -> IndexedMessage:
+    """The searchable text of a message: content, attachment names and embed text."""
+    parts = [message.clean_content]
+    parts += [attachment.filename for attachment in message.attachments]
+    for embed in message.embeds:
+        parts += [embed.title, embed.description, *(field.value for field in embed.fields)]
+    return IndexedMessage(
+        message_id=message.id,
+        channel_id=message.channel.id,
+        guild_id=message.guild.id,
+        author_id=message.author.id,
+        author=str(message.author),
+        created_at=message.created_at.timestamp(),
+        content="\n".join(part for part in parts if part),
+    )
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    message_id: int
+    channel_id: int
+    channel_name: str
+    ticket_type: str | None
+    number: int | None
+    opener_id: int | None
+    author_id: int
+    author: str
+    created_at: float
+    snippet: str
+
+
+def fts_query(text: str) -> str:
+    """Each word as a quoted FTS5 prefix term, all required; FTS5 syntax in ``text`` is not interpreted."""
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in text.split())
+
+
+class SearchIndex:
+    """SQLite FTS5 index of ticket messages plus each ticket's metadata.
+
+    Messages are buffered and written in one transaction per batch, at most
+    ``flush_delay`` seconds after the first buffered one (or right away once
+    ``batch_size`` pile up), so chatty tickets cost one disk write per batch.
+    """
+
+    def __init__(self, path: str, batch_size: int = 200, flush_delay: float = 2.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_delay = flush_delay
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(search_tickets)")}
+        if "backfilled_id" not in columns:
+            # Before this column, last_message_id was only advanced by backfill.
+            self._conn.execute("ALTER TABLE search_tickets ADD COLUMN backfilled_id INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE search_tickets SET backfilled_id = last_message_id")
+        self._channels = {row[0] for row in self._conn.execute("SELECT channel_id FROM search_tickets")}
+        self._pending: dict[int, IndexedMessage] = {}
+        self._deleted: set[int] = set()
+        self._flush_task: asyncio.Task | None = None
+        self.ingested = 0
+
+    def __contains__(self, channel_id: int) -> bool:
+        return channel_id in self._channels
+
+    # ---- writes ----
+
+    def _upsert_ticket(self, channel_id, guild_id, ticket_type, opener_id, number, channel_name):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO search_tickets (channel_id, guild_id, ticket_type, opener_id, number, channel_name) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(channel_id) DO UPDATE SET "
+                "ticket_type = coalesce(excluded.ticket_type, ticket_type), "
+                "opener_id = coalesce(excluded.opener_id, opener_id), "
+                "number = coalesce(excluded.number, number), channel_name = excluded.channel_name",
+                (channel_id, guild_id, ticket_type, opener_id, number, channel_name),
+            )
+
+    async def upsert_ticket(
+        self,
+        channel_id: int,
+        guild_id: int,
+        channel_name: str,
+        ticket_type: str | None = None,
+        opener_id: int | None = None,
+        number: int | None = None,
+    ):
+        await asyncio.to_thread(self._upsert_ticket, channel_id, guild_id, ticket_type, opener_id, number, channel_name)
+        self._channels.add(channel_id)
+
+    def add(self, message: IndexedMessage):
+        self._pending[message.message_id] = message
+        self._deleted.discard(message.message_id)
+        self._schedule()
+
+    def delete(self, message_id: int):
+        self._pending.pop(message_id, None)
+        self._deleted.add(message_id)
+        self._schedule()
+
+    def _schedule(self):
+        if len(self._pending) + len(self._deleted) >= self.batch_size:
+            asyncio.create_task(self.flush())
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_delay)
+        await self.flush()
+
+    def _write(self, messages: list[IndexedMessage], deleted: list[int]):
+        watermarks: dict[int, int] = {}
+        for message in messages:
+            watermarks[message.channel_id] = max(watermarks.get(message.channel_id, 0), message.message_id)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO search_messages (message_id, channel_id, guild_id, author_id, author, created_at, content) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(message_id) DO UPDATE SET content = excluded.content",
+                    [
+                        (m.message_id, m.channel_id, m.guild_id, m.author_id, m.author, m.created_at, m.content)
+                        for m in messages
+                    ],
+                )
+                self._conn.executemany("DELETE FROM search_messages WHERE message_id = ?", [(i,) for i in deleted])
+                self._conn.executemany(
+                    "UPDATE search_tickets SET last_message_id = max(last_message_id, ?) WHERE channel_id = ?",
+                    [(message_id, channel_id) for channel_id, message_id in watermarks.items()],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    async def flush(self):
+        if not self._pending and not self._deleted:
+            return
+        messages, deleted = list(self._pending.values()), list(self._deleted)
+        self._pending, self._deleted = {}, set()
+        try:
+            await asyncio.to_thread(self._write, messages, deleted)
+            self.ingested += len(messages)
+        except Exception as e:
+            # Put the batch back (newer versions of a message win) and retry later.
+            for message in messages:
+                self._pending.setdefault(message.message_id, message)
+            self._deleted.update(deleted)
+            log.error("Erro ao gravar índice de busca", extra={"path": self.path, "error": str(e)})
+
+    # ---- reads ----
+
+    def _watermark(self, channel_id: int) -> int | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT backfilled_id FROM search_tickets WHERE channel_id = ?", (channel_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    async def watermark(self, channel_id: int) -> int | None:
+        """Id up to which a ticket channel's history is fully indexed, or None if the channel is unknown.
+
+        Backfill resumes after it. Live messages don't move it: one arriving
+        before backfill runs must not hide what was sent while offline.
+        """
+        return await asyncio.to_thread(self._watermark, channel_id)
+
+    def _mark_backfilled(self, watermarks: dict[int, int]):
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE search_tickets SET backfilled_id = max(backfilled_id, ?) WHERE channel_id = ?",
+                [(message_id, channel_id) for channel_id, message_id in watermarks.items()],
+            )
+
+    async def mark_backfilled(self, watermarks: dict[int, int]):
+        """Record that each channel's history is indexed up to the given message id (call after ``flush``)."""
+        await asyncio.to_thread(self._mark_backfilled, watermarks)
+
+    def _search(self, guild_id, text, ticket_type, user_id, since, until, limit, offset) -> list[SearchHit]:
+        clauses, params = ["m.guild_id = ?"], [guild_id]
+        if ticket_type:
+            clauses.append("t.ticket_type = ?")
+            params.append(ticket_type)
+        if user_id:
+            clauses.append("(m.author_id = ? OR t.opener_id = ?)")
+            params += [user_id, user_id]
+        if since is not None:
+            clauses.append("m.created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("m.created_at < ?")
+            params.append(until)
+
+        columns = (
+            "m.message_id, m.channel_id, t.channel_name, t.ticket_type, t.number, t.opener_id, "
+            "m.author_id, m.author, m.created_at"
+        )
+        if text:
+            sql = (
+                f"SELECT {columns}, snippet(search_fts, 0, '**', '**', '…', 16) FROM search_fts "
+                "JOIN search_messages m ON m.message_id = search_fts.rowid "
+                "JOIN search_tickets t ON t.channel_id = m.channel_id "
+                f"WHERE search_fts MATCH ? AND {' AND '.join(clauses)} ORDER BY rank LIMIT ? OFFSET ?"
+            )
+            params = [fts_query(text), *params]
+        else:
+            sql = (
+                f"SELECT {columns}, substr(m.content, 1, 120) FROM search_messages m "
+                "JOIN search_tickets t ON t.channel_id = m.channel_id "
+                f"WHERE {' AND '.join(clauses)} ORDER BY m.created_at DESC LIMIT ? OFFSET ?"
+            )
+        with self._lock:
+            rows = self._conn.execute(sql, (*params, limit, offset)).fetchall()
+        return [SearchHit(*row) for row in rows]
+
+    async def search(
+        self,
+        guild_id: int,
+        text: str | None = None,
+        ticket_type: str | None = None,
+        user_id: int | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        limit: int = 10,
+        offset: int = 0,
+    ) -> list[SearchHit]:
+        """Messages matching ``text`` (best first) or, without text, the newest ones matching the filters.
+
+        ``user_id`` matches both the message author and the ticket's opener.
+        Blank ``text`` counts as no text.
+        """
+        text = text.strip() if text else None
+        return await asyncio.to_thread(
+            self._search, guild_id, text, ticket_type, user_id, since, until, limit, offset
+        )
+
+    def close(self):
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        if self._pending or self._deleted:
+            self._write(list(self._pending.values()), list(self._deleted))
+            self._pending, self._deleted = {}, set()
+        with self._lock:
+            # Everything the gateway delivered is written: the next start only
+            # needs to backfill what arrives after this point.
+            self._conn.execute("UPDATE search_tickets SET backfilled_id = last_message_id")
+            self._conn.close()
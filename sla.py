@@ -0,0 +1,257 @@
+import asyncio
+import json
+import logging
+import math
+from collections import Counter
+from dataclasses import dataclass
+
+from counter_store import atomic_write_json
+from ticket_records import TicketRecord
+
+log = logging.getLogger(__name__)
+
+FIRST_RESPONSE = "first_response"
+RESOLUTION = "resolution"
+
+# Dimensions each sample is recorded under: the whole guild, its ticket type
+# and the staff member who took the ticket.
+ALL = "all"
+BY_TYPE = "type"
+BY_STAFF = "staff"
+
+# Durations below this (clock skew, instant replies) count as zero.
+MIN_VALUE = 1e-3
+
+
+@dataclass(frozen=True)
+class SlaSummary:
+    count: int
+    mean: float
+    p50: float
+    p90: float
+    p99: float
+
+
+class QuantileSketch:
+    """Quantiles of a stream of durations with relative error ``accuracy``.
+
+    Each value x is counted in bucket ceil(log_gamma(x)), gamma = (1+a)/(1-a),
+    and a quantile is read back as its bucket's midpoint, so it is within
+    ``accuracy`` of the true value whatever the distribution. Memory grows
+    with the log of the value range (about 400 buckets from one second to a
+    month at 2%), not with the number of samples. Sketches with the same
+    accuracy merge exactly by adding their bucket counts.
+    """
+
+    __slots__ = ("accuracy", "_log_gamma", "buckets", "zeros", "count", "total", "_summary")
+
+    def __init__(self, accuracy: float = 0.02):
+        if not 0 < accuracy < 1:
+            raise ValueError(f"accuracy must be between 0 and 1 (got {accuracy})")
+        self.accuracy = accuracy
+        self._log_gamma = math.log((1 + accuracy) / (1 - accuracy))
+        self.buckets: dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self._summary: SlaSummary | None = None
+
+    def add(self, value: float):
+        if value < MIN_VALUE:
+            self.zeros += 1
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+            self.total += value
+        self.count += 1
+        self._summary = None
+
+    def merge(self, other: "QuantileSketch"):
+        if other.accuracy != self.accuracy:
+            raise ValueError(f"Cannot merge sketches of accuracy {self.accuracy} and {other.accuracy}")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+        self._summary = None
+
+    def _value(self, index: int) -> float:
+        # Midpoint of (gamma^(i-1), gamma^i] in relative terms: 2 * gamma^i / (gamma + 1).
+        gamma = math.exp(self._log_gamma)
+        return 2 * gamma**index / (gamma + 1)
+
+    def quantiles(self, qs: tuple[float, ...]) -> list[float | None]:
+        """Values at the (ascending) quantiles ``qs`` by nearest rank, in one pass over the buckets."""
+        if not self.count:
+            return [None for _ in qs]
+        results: list[float | None] = []
+        ranks = iter(max(1, math.ceil(q * self.count)) for q in qs)
+        rank = next(ranks)
+        seen = self.zeros
+        while rank is not None and rank <= seen:
+            results.append(0.0)
+            rank = next(ranks, None)
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            while rank is not None and rank <= seen:
+                results.append(self._value(index))
+                rank = next(ranks, None)
+            if rank is None:
+                break
+        return results
+
+    def summary(self) -> SlaSummary | None:
+        # Samples arrive once per ticket event while reads may come from every
+        # /stats call, so the percentiles are kept until the next add or merge.
+        if not self.count:
+            return None
+        if self._summary is None:
+            p50, p90, p99 = self.quantiles((0.5, 0.9, 0.99))
+            self._summary = SlaSummary(self.count, self.total / self.count, p50, p90, p99)
+        return self._summary
+
+    def to_dict(self) -> dict:
+        return {
+            "accuracy": self.accuracy,
+            "zeros": self.zeros,
+            "count": self.count,
+            "total": self.total,
+            "buckets": {str(index): count for index, count in self.buckets.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileSketch":
+        sketch = cls(float(data["accuracy"]))
+        sketch.buckets = {int(index): int(count) for index, count in data["buckets"].items()}
+        sketch.zeros = int(data["zeros"])
+        sketch.count = int(data["count"])
+        sketch.total = float(data["total"])
+        return sketch
+
+
+SketchKey = tuple[str, str, str]  # (metric, dimension, key)
+
+
+class SlaStats:
+    """First-response and resolution times per guild, ticket type and staff member.
+
+    First response is the time from opening to the first staff reply (the
+    ticket's claim); resolution is the time from opening to closing. Both are
+    fed once per ticket from the record store's claim and close events and
+    kept as in-memory sketches, checkpointed to ``path`` at most once per
+    ``flush_delay`` seconds and on close, so /stats never reads channel
+    history. Samples recorded after the last checkpoint are lost on a crash.
+    """
+
+    def __init__(self, path: str, accuracy: float = 0.02, flush_delay: float = 60.0):
+        self.path = path
+        self.accuracy = accuracy
+        self.flush_delay = flush_delay
+        self._sketches: dict[int, dict[SketchKey, QuantileSketch]] = {}
+        # Tickets closed before any staff member answered, per (guild_id, type)
+        # and per (guild_id, "") for the whole guild.
+        self.unanswered: Counter[tuple[int, str]] = Counter()
+        self._dirty = False
+        self._flush_task: asyncio.Task | None = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (ValueError, OSError) as e:
+            log.error("Erro ao ler estatísticas de atendimento", extra={"path": self.path, "error": str(e)})
+            return
+        for entry in data.get("sketches", []):
+            sketch = QuantileSketch.from_dict(entry["sketch"])
+            if sketch.accuracy != self.accuracy:
+                # Buckets of another accuracy can't be merged; start that series over.
+                continue
+            self._sketch(int(entry["guild_id"]), (entry["metric"], entry["dimension"], entry["key"])).merge(sketch)
+        for entry in data.get("unanswered", []):
+            self.unanswered[(int(entry["guild_id"]), entry["type"])] += int(entry["count"])
+        log.info("Estatísticas de atendimento carregadas", extra={"path": self.path, "guilds": len(self._sketches)})
+
+    def _sketch(self, guild_id: int, key: SketchKey) -> QuantileSketch:
+        sketches = self._sketches.setdefault(guild_id, {})
+        sketch = sketches.get(key)
+        if sketch is None:
+            sketch = sketches[key] = QuantileSketch(self.accuracy)
+        return sketch
+
+    def _add(self, record: TicketRecord, metric: str, seconds: float):
+        keys = [(ALL, ""), (BY_TYPE, record.ticket_type)]
+        if record.claimer_id is not None:
+            keys.append((BY_STAFF, str(record.claimer_id)))
+        for dimension, key in keys:
+            self._sketch(record.guild_id, (metric, dimension, key)).add(max(0.0, seconds))
+        self._schedule()
+
+    def record_first_response(self, record: TicketRecord):
+        if record.claimed_at is not None:
+            self._add(record, FIRST_RESPONSE, record.claimed_at - record.opened_at)
+
+    def record_resolution(self, record: TicketRecord):
+        if record.closed_at is None:
+            return
+        self._add(record, RESOLUTION, record.closed_at - record.opened_at)
+        if record.claimed_at is None:
+            self.unanswered[(record.guild_id, record.ticket_type)] += 1
+            self.unanswered[(record.guild_id, "")] += 1
+
+    def summary(self, guild_id: int, metric: str, dimension: str = ALL, key: str | int = "") -> SlaSummary | None:
+        sketch = self._sketches.get(guild_id, {}).get((metric, dimension, str(key)))
+        return sketch.summary() if sketch else None
+
+    def staff(self, guild_id: int, metric: str = RESOLUTION) -> list[tuple[int, SlaSummary]]:
+        """Every staff member with samples in ``metric``, busiest first."""
+        found = [
+            (int(key), sketch.summary())
+            for (m, dimension, key), sketch in self._sketches.get(guild_id, {}).items()
+            if m == metric and dimension == BY_STAFF and sketch.count
+        ]
+        return sorted(found, key=lambda item: -item[1].count)
+
+    def _schedule(self):
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_delay)
+        await self.flush()
+
+    def _snapshot(self) -> dict:
+        return {
+            "sketches": [
+                {"guild_id": guild_id, "metric": metric, "dimension": dimension, "key": key, "sketch": sketch.to_dict()}
+                for guild_id, sketches in self._sketches.items()
+                for (metric, dimension, key), sketch in sketches.items()
+            ],
+            "unanswered": [
+                {"guild_id": guild_id, "type": ticket_type, "count": count}
+                for (guild_id, ticket_type), count in self.unanswered.items()
+            ],
+        }
+
+    async def flush(self):
+        if not self._dirty:
+            return
+        # Snapshot on the event loop (sketches only change there), write in a thread.
+        data = self._snapshot()
+        self._dirty = False
+        try:
+            await asyncio.to_thread(atomic_write_json, self.path, data)
+        except OSError as e:
+            self._dirty = True
+            log.error("Erro ao salvar estatísticas de atendimento", extra={"path": self.path, "error": str(e)})
+
+    def close(self):
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        if self._dirty:
+            atomic_write_json(self.path, self._snapshot())
+            self._dirty = False
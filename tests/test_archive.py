@@ -0,0 +1,100 @@
+import os
+import sys
+
+import discord
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archive import ARCHIVED_PREFIX, RESTRICTED_OVERWRITE, plan_archive  # noqa: E402
+
+STAFF_ROLE = discord.Object(10, type=discord.Role)
+
+
+class Member:
+    def __init__(self, id, roles=(), bot=False):
+        self.id = id
+        self.roles = list(roles)
+        self.bot = bot
+        self.guild_permissions = discord.Permissions.none()
+
+
+class Guild:
+    def __init__(self, members, roles):
+        self.default_role = discord.Object(1, type=discord.Role)
+        self.me = Member(2, bot=True)
+        self._members = {member.id: member for member in [*members, self.me]}
+        self._roles = {role.id: role for role in [*roles, self.default_role]}
+
+    def get_member(self, member_id):
+        return self._members.get(member_id)
+
+    def get_role(self, role_id):
+        return self._roles.get(role_id)
+
+
+class Channel:
+    def __init__(self, guild, name, category_id, overwrites):
+        self.guild = guild
+        self.name = name
+        self.category_id = category_id
+        self.overwrites = overwrites
+
+
+class Category:
+    def __init__(self, id, overwrites):
+        self.id = id
+        self.overwrites = overwrites
+
+
+def ticket(opener, staff, added):
+    guild = Guild([opener, staff, added], [STAFF_ROLE])
+    allowed = discord.PermissionOverwrite(read_messages=True, send_messages=True)
+    overwrites = {
+        guild.default_role: discord.PermissionOverwrite(read_messages=False),
+        STAFF_ROLE: allowed,
+        opener: allowed,
+        guild.me: allowed,
+        staff: allowed,
+        added: allowed,
+        # Added with /add but missing from the member cache (lean mode).
+        discord.Object(99, type=discord.Member): allowed,
+    }
+    return Channel(guild, "suporte-ana", 500, overwrites)
+
+
+def test_archiving_restricts_only_non_staff_members():
+    opener, staff, added = Member(3), Member(4, roles=[STAFF_ROLE]), Member(5)
+    channel = ticket(opener, staff, added)
+    archive = Category(600, {STAFF_ROLE: discord.PermissionOverwrite(read_messages=True)})
+
+    plan = plan_archive(channel, archive, opener.id, frozenset({STAFF_ROLE.id}))
+
+    assert sorted(plan.restricted) == [5, 99]
+    assert plan.overwrites[added] == RESTRICTED_OVERWRITE
+    assert opener not in plan.overwrites and staff not in plan.overwrites
+    assert plan.overwrites[channel.guild.default_role].send_messages is False
+    assert plan.edit_kwargs.keys() == {"name", "category", "overwrites"}
+    assert plan.name == ARCHIVED_PREFIX + "suporte-ana"
+
+
+def test_archiving_an_archived_channel_costs_no_calls():
+    opener = Member(3)
+    channel = ticket(opener, Member(4, roles=[STAFF_ROLE]), Member(5))
+    archive = Category(600, {STAFF_ROLE: discord.PermissionOverwrite(read_messages=True)})
+    plan = plan_archive(channel, archive, opener.id, frozenset({STAFF_ROLE.id}))
+    channel.name, channel.category_id, channel.overwrites = plan.name, archive.id, plan.overwrites
+
+    again = plan_archive(channel, archive, opener.id, frozenset({STAFF_ROLE.id}))
+
+    assert again.edit_kwargs == {} and again.calls == 0
+
+
+def test_archiving_in_place_locks_everyone():
+    opener = Member(3)
+    channel = ticket(opener, Member(4, roles=[STAFF_ROLE]), Member(5))
+
+    plan = plan_archive(channel, None, opener.id, frozenset({STAFF_ROLE.id}))
+
+    everyone = plan.overwrites[channel.guild.default_role]
+    assert (everyone.read_messages, everyone.send_messages) == (False, False)
+    assert plan.category is None and plan.restricted == []
@@ -0,0 +1,66 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from counter_store import JsonCounterStore, SqliteCounterStore, guild_counter  # noqa: E402
+
+
+def open_store(backend, tmp_path):
+    if backend == "json":
+        return JsonCounterStore(str(tmp_path / "counters.json"), {})
+    return SqliteCounterStore(str(tmp_path / "counters.db"), {}, seed_file=str(tmp_path / "counters.json"))
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_legacy_counter_is_migrated_into_one_guild_only(backend, tmp_path):
+    (tmp_path / "counters.json").write_text(json.dumps({"suporte": 41}))
+
+    async def scenario():
+        store = open_store(backend, tmp_path)
+        assert await store.migrate("suporte", guild_counter(1, "suporte")) == 41
+        assert await store.migrate("suporte", guild_counter(2, "suporte")) is None
+        assert await store.increment(guild_counter(1, "suporte")) == 42
+        assert await store.increment(guild_counter(2, "suporte")) == 1
+        assert "suporte" not in await store.snapshot()
+        store.close()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_migration_keeps_the_higher_value(backend, tmp_path):
+    (tmp_path / "counters.json").write_text(json.dumps({"suporte": 5, "1:suporte": 9}))
+
+    async def scenario():
+        store = open_store(backend, tmp_path)
+        await store.migrate("suporte", "1:suporte")
+        assert await store.increment("1:suporte") == 10
+        store.close()
+
+    asyncio.run(scenario())
+
+
+def test_json_store_survives_a_restart(tmp_path):
+    async def scenario():
+        store = open_store("json", tmp_path)
+        await store.increment("1:suporte")
+        await store.increment("1:suporte")
+        store.close()
+        store = open_store("json", tmp_path)
+        assert await store.increment("1:suporte") == 3
+        store.close()
+
+    asyncio.run(scenario())
+
+
+def test_unreadable_json_file_is_never_overwritten(tmp_path):
+    path = tmp_path / "counters.json"
+    path.write_text("{broken")
+    with pytest.raises(ValueError):
+        open_store("json", tmp_path)
+    assert path.read_text() == "{broken"
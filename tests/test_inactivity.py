@@ -0,0 +1,51 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inactivity import InactivityTracker  # noqa: E402
+
+
+def test_pop_due_skips_entries_of_a_previous_track():
+    tracker = InactivityTracker()
+    tracker.track(1, 2, 1, last_activity=100.0)
+    tracker.discard(1)
+    tracker.track(1, 2, 1, last_activity=100.0)
+    assert [channel_id for channel_id, _ in tracker._pop_due(101.5)] == [1]
+    assert tracker._pop_due(101.5) == []
+
+
+def test_retracked_channel_is_warned_before_it_closes():
+    events = []
+
+    async def on_warning(channel_id, closes_at):
+        events.append(("warn", channel_id))
+
+    async def on_expired(channel_id):
+        events.append(("close", channel_id))
+
+    async def scenario():
+        tracker = InactivityTracker()
+        now = time.time()
+        tracker.track(1, 0.4, 0.2, last_activity=now)
+        tracker.discard(1)
+        tracker.track(1, 0.4, 0.2, last_activity=now)
+        tracker.track(1, 0.4, 0.2, last_activity=now)
+        task = asyncio.create_task(tracker.run(on_warning, on_expired))
+        await asyncio.sleep(0.3)
+        assert events == [("warn", 1)]
+        await asyncio.sleep(0.25)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert events == [("warn", 1), ("close", 1)]
+
+
+def test_message_after_the_warning_time_means_already_warned():
+    tracker = InactivityTracker()
+    tracker.track(1, 100, 10, last_activity=1000.0, last_message=1095.0)
+    tracker.track(2, 100, 10, last_activity=1000.0, last_message=1000.0)
+    assert [channel_id for channel_id, _ in tracker._pop_due(1095.0)] == [2]
+    assert [(channel_id, state.warned) for channel_id, state in tracker._pop_due(1100.0)] == [(1, True)]
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rest_scheduler  # noqa: E402
+from rest_scheduler import PRIORITY_HIGH, PRIORITY_LOW, RestScheduler  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(rest_scheduler.random, "uniform", lambda a, b: 0.0)
+
+
+def http_error(status, retry_after=None):
+    error = discord.HTTPException(SimpleNamespace(status=status, reason="error"), "error")
+    if retry_after is not None:
+        error.retry_after = retry_after
+    return error
+
+
+def flaky(*errors, result="ok"):
+    """Factory that raises each of ``errors`` in turn, then returns ``result``."""
+    calls = []
+
+    async def call():
+        calls.append(None)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return call, calls
+
+
+def test_throttled_route_does_not_hold_up_other_routes():
+    async def scenario():
+        rest = RestScheduler(workers=1, route_limits={"channel_edit": (1, 0.5)})
+        done = []
+
+        async def call(name):
+            done.append(name)
+
+        edits = [asyncio.create_task(rest.submit("channel_edit:1", lambda i=i: call(f"edit{i}"), PRIORITY_LOW))
+                 for i in range(3)]
+        await asyncio.sleep(0.05)
+        await asyncio.wait_for(rest.submit("message:2", lambda: call("message"), PRIORITY_HIGH), 0.2)
+        assert done == ["edit0", "message"]
+        assert rest.depth == 2
+        await asyncio.gather(*edits)
+        assert done == ["edit0", "message", "edit1", "edit2"]
+        await rest.close()
+
+    asyncio.run(scenario())
+
+
+def test_idempotent_route_is_retried_after_server_errors():
+    async def scenario():
+        rest = RestScheduler()
+        call, calls = flaky(http_error(503), http_error(502))
+        assert await rest.submit("channel_edit:1", call) == "ok"
+        assert len(calls) == 3 and rest.stats.retries == 2
+        await rest.close()
+
+    asyncio.run(scenario())
+
+
+def test_message_is_not_retried_after_a_server_error():
+    async def scenario():
+        rest = RestScheduler()
+        call, calls = flaky(http_error(503))
+        with pytest.raises(discord.HTTPException):
+            await rest.submit("message:1", call)
+        assert len(calls) == 1 and rest.stats.failed == 1
+        await rest.close()
+
+    asyncio.run(scenario())
+
+
+def test_rate_limited_message_is_retried():
+    async def scenario():
+        rest = RestScheduler()
+        call, calls = flaky(http_error(429, retry_after=0.05))
+        assert await rest.submit("message:1", call) == "ok"
+        assert len(calls) == 2 and rest.stats.rate_limited == 1
+        await rest.close()
+
+    asyncio.run(scenario())
+
+
+def test_gives_up_after_max_retries():
+    async def scenario():
+        rest = RestScheduler(max_retries=2)
+        call, calls = flaky(*[http_error(500)] * 5)
+        with pytest.raises(discord.HTTPException):
+            await rest.submit("channel_edit:1", call)
+        assert len(calls) == 3
+        await rest.close()
+
+    asyncio.run(scenario())
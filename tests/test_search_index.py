@@ -0,0 +1,57 @@
+import asyncio
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import IndexedMessage, SearchIndex  # noqa: E402
+
+
+def message(message_id, channel_id=1):
+    return IndexedMessage(message_id, channel_id, 10, 20, "user", 0.0, f"msg {message_id}")
+
+
+def test_live_messages_do_not_advance_the_backfill_watermark(tmp_path):
+    async def scenario():
+        index = SearchIndex(str(tmp_path / "search.db"))
+        await index.upsert_ticket(1, 10, "suporte-1")
+        index.add(message(500))
+        await index.flush()
+        assert await index.watermark(1) == 0
+        await index.mark_backfilled({1: 400})
+        assert await index.watermark(1) == 400
+        index.close()
+
+    asyncio.run(scenario())
+
+
+def test_clean_close_marks_live_messages_as_backfilled(tmp_path):
+    path = str(tmp_path / "search.db")
+
+    async def scenario():
+        index = SearchIndex(path)
+        await index.upsert_ticket(1, 10, "suporte-1")
+        index.add(message(500))
+        index.close()
+        index = SearchIndex(path)
+        assert await index.watermark(1) == 500
+        index.close()
+
+    asyncio.run(scenario())
+
+
+def test_existing_database_keeps_its_watermark(tmp_path):
+    path = str(tmp_path / "search.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE search_tickets (channel_id INTEGER PRIMARY KEY, guild_id INTEGER NOT NULL, ticket_type TEXT,"
+        " opener_id INTEGER, number INTEGER, channel_name TEXT NOT NULL, last_message_id INTEGER NOT NULL DEFAULT 0)"
+    )
+    conn.execute("INSERT INTO search_tickets (channel_id, guild_id, channel_name, last_message_id) VALUES (1, 10, 'suporte-1', 700)")
+    conn.commit()
+    conn.close()
+
+    index = SearchIndex(path)
+    assert asyncio.run(index.watermark(1)) == 700
+    index.close()
@@ -0,0 +1,246 @@
+import asyncio
+import datetime
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, fields
+from typing import Callable
+
+STATUS_OPEN = "open"
+STATUS_CLOSED = "closed"
+# Closed, exported and deleted by the retention purge.
+STATUS_PURGED = "purged"
+
+
+@dataclass
+class TicketRecord:
+    channel_id: int
+    guild_id: int
+    opener_id: int
+    ticket_type: str
+    number: int
+    opened_at: float
+    status: str = STATUS_OPEN
+    closed_at: float | None = None
+    closer_id: int | None = None
+    # Staff member holding the ticket (first reply, claim button, transfer or
+    # auto-assignment), and when staff first answered (reply or claim button).
+    claimer_id: int | None = None
+    claimed_at: float | None = None
+    # Last message from someone other than a bot, for the inactivity deadline.
+    last_activity: float | None = None
+
+    @property
+    def opened_datetime(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.opened_at, datetime.timezone.utc)
+
+
+_COLUMNS = [f.name for f in fields(TicketRecord)]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    channel_id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    opener_id INTEGER NOT NULL,
+    ticket_type TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    opened_at REAL NOT NULL,
+    status TEXT NOT NULL,
+    closed_at REAL,
+    closer_id INTEGER,
+    claimer_id INTEGER,
+    claimed_at REAL,
+    last_activity REAL
+);
+CREATE INDEX IF NOT EXISTS tickets_opener ON tickets (guild_id, opener_id, status);
+CREATE INDEX IF NOT EXISTS tickets_type ON tickets (guild_id, ticket_type, status);
+CREATE INDEX IF NOT EXISTS tickets_status ON tickets (guild_id, status, opened_at);
+CREATE INDEX IF NOT EXISTS tickets_closed ON tickets (status, closed_at);
+"""
+
+# Columns added after the first release; ALTERed into older databases.
+ADDED_COLUMNS = {"claimer_id": "INTEGER", "claimed_at": "REAL", "last_activity": "REAL"}
+
+# A ticket's last activity is written at most this often; a restart loses
+# less than that of it.
+ACTIVITY_WRITE_INTERVAL = 60.0
+
+
+class TicketRecordStore:
+    """Ticket lifecycle records keyed by channel id, persisted in SQLite.
+
+    Open tickets are also kept in memory, so the close path and status
+    lookups for live tickets never touch the disk or Discord. When several
+    processes share the database, ``owns`` limits that in-memory set to the
+    guilds this process serves.
+    """
+
+    def __init__(self, path: str, owns: Callable[[int], bool] | None = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(tickets)")}
+        for column, column_type in ADDED_COLUMNS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE tickets ADD COLUMN {column} {column_type}")
+
+        self._open: dict[int, TicketRecord] = {
+            record.channel_id: record
+            for record in self._select("WHERE status = ?", (STATUS_OPEN,))
+            if owns is None or owns(record.guild_id)
+        }
+        # Last activity time on disk per open ticket, to throttle record_activity.
+        self._activity_written: dict[int, float] = {}
+
+    def _select(self, where: str = "", params: tuple = (), limit: int | None = None) -> list[TicketRecord]:
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM tickets {where}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [TicketRecord(*row) for row in rows]
+
+    def _upsert(self, record: TicketRecord):
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        values = tuple(getattr(record, name) for name in _COLUMNS)
+        with self._lock:
+            self._conn.execute(f"INSERT OR REPLACE INTO tickets ({', '.join(_COLUMNS)}) VALUES ({placeholders})", values)
+
+    def get_open(self, channel_id: int) -> TicketRecord | None:
+        return self._open.get(channel_id)
+
+    def open_records(self, guild_id: int | None = None) -> list[TicketRecord]:
+        if guild_id is None:
+            return list(self._open.values())
+        return [record for record in self._open.values() if record.guild_id == guild_id]
+
+    async def get(self, channel_id: int) -> TicketRecord | None:
+        record = self._open.get(channel_id)
+        if record:
+            return record
+        found = await asyncio.to_thread(self._select, "WHERE channel_id = ?", (channel_id,))
+        return found[0] if found else None
+
+    async def record_open(
+        self, channel_id: int, guild_id: int, opener_id: int, ticket_type: str, number: int
+    ) -> TicketRecord:
+        record = TicketRecord(
+            channel_id=channel_id,
+            guild_id=guild_id,
+            opener_id=opener_id,
+            ticket_type=ticket_type,
+            number=number,
+            opened_at=time.time(),
+        )
+        self._open[channel_id] = record
+        await asyncio.to_thread(self._upsert, record)
+        return record
+
+    async def record_close(self, channel_id: int, closer_id: int | None) -> TicketRecord | None:
+        record = self._open.pop(channel_id, None)
+        self._activity_written.pop(channel_id, None)
+        if record is None:
+            return None
+        record.status = STATUS_CLOSED
+        record.closed_at = time.time()
+        record.closer_id = closer_id
+        await asyncio.to_thread(self._upsert, record)
+        return record
+
+    async def record_claim(self, channel_id: int, claimer_id: int) -> TicketRecord | None:
+        """First staff response: sets ``claimed_at`` once, and the claimer if nobody holds the ticket yet."""
+        record = self._open.get(channel_id)
+        if record is None or record.claimed_at is not None:
+            return None
+        if record.claimer_id is None:
+            record.claimer_id = claimer_id
+        record.claimed_at = time.time()
+        await asyncio.to_thread(self._upsert, record)
+        return record
+
+    async def record_assign(self, channel_id: int, claimer_id: int) -> TicketRecord | None:
+        """Hand the ticket to ``claimer_id`` (transfer or auto-assignment) without touching ``claimed_at``."""
+        record = self._open.get(channel_id)
+        if record is None:
+            return None
+        record.claimer_id = claimer_id
+        await asyncio.to_thread(self._upsert, record)
+        return record
+
+    def _set_activity(self, channel_id: int, when: float):
+        with self._lock:
+            self._conn.execute("UPDATE tickets SET last_activity = ? WHERE channel_id = ?", (when, channel_id))
+
+    async def record_activity(self, channel_id: int, when: float):
+        """Move the open ticket's last human activity to ``when``; persisted at most every ACTIVITY_WRITE_INTERVAL."""
+        record = self._open.get(channel_id)
+        if record is None:
+            return
+        if record.last_activity is not None and when <= record.last_activity:
+            return
+        record.last_activity = when
+        written = self._activity_written.get(channel_id)
+        if written is None or when - written >= ACTIVITY_WRITE_INTERVAL:
+            self._activity_written[channel_id] = when
+            await asyncio.to_thread(self._set_activity, channel_id, when)
+
+    async def find(
+        self,
+        guild_id: int,
+        opener_id: int | None = None,
+        ticket_type: str | None = None,
+        status: str | None = None,
+        limit: int = 50,
+    ) -> list[TicketRecord]:
+        clauses, params = ["guild_id = ?"], [guild_id]
+        for column, value in (("opener_id", opener_id), ("ticket_type", ticket_type), ("status", status)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)} ORDER BY opened_at DESC"
+        return await asyncio.to_thread(self._select, where, tuple(params), limit)
+
+    async def closed_before(
+        self, cutoff: float, limit: int, offset: int = 0, shards: tuple[int, list[int]] | None = None
+    ) -> list[TicketRecord]:
+        """Closed tickets closed before ``cutoff``, oldest first.
+
+        ``shards`` = (shard_count, shard_ids) keeps only guilds on those shards,
+        using the same formula as Discord: (guild_id >> 22) % shard_count.
+        """
+        where, params = "WHERE status = ? AND closed_at < ?", [STATUS_CLOSED, cutoff]
+        if shards is not None:
+            shard_count, shard_ids = shards
+            where += f" AND (guild_id >> 22) % ? IN ({', '.join('?' for _ in shard_ids)})"
+            params += [shard_count, *shard_ids]
+        where += f" ORDER BY closed_at LIMIT {int(limit)} OFFSET {int(offset)}"
+        return await asyncio.to_thread(self._select, where, tuple(params))
+
+    def _set_status(self, channel_id: int, status: str):
+        with self._lock:
+            self._conn.execute("UPDATE tickets SET status = ? WHERE channel_id = ?", (status, channel_id))
+
+    async def record_purge(self, channel_id: int):
+        await asyncio.to_thread(self._set_status, channel_id, STATUS_PURGED)
+
+    def _status_counts(self, guild_id: int | None) -> dict[tuple[str, str], int]:
+        where, params = ("WHERE guild_id = ?", (guild_id,)) if guild_id is not None else ("", ())
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT ticket_type, status, COUNT(*) FROM tickets {where} GROUP BY ticket_type, status", params
+            ).fetchall()
+        return {(ticket_type, status): count for ticket_type, status, count in rows}
+
+    async def status_counts(self, guild_id: int | None) -> dict[tuple[str, str], int]:
+        """Ticket counts by (type, status) for one guild, or every guild when ``guild_id`` is None."""
+        return await asyncio.to_thread(self._status_counts, guild_id)
+
+    def close(self):
+        for record in self._open.values():
+            if record.last_activity is not None and record.last_activity != self._activity_written.get(record.channel_id):
+                self._set_activity(record.channel_id, record.last_activity)
+        with self._lock:
+            self._conn.close()
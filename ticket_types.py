@@ -0,0 +1,222 @@
+import json
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+
+import discord
+
+from rest_scheduler import PRIORITY_NAMES, PRIORITY_NORMAL
+
+# Discord allows at most 25 components (5 rows x 5 buttons) per view.
+MAX_TICKET_TYPES = 25
+
+MEMBER_OVERWRITE = discord.PermissionOverwrite(read_messages=True, send_messages=True)
+HIDDEN_OVERWRITE = discord.PermissionOverwrite(read_messages=False)
+
+
+@dataclass(frozen=True)
+class TicketType:
+    key: str  # lowercase, used as channel prefix and counter name
+    label: str
+    emoji: str = "🎫"
+    style: discord.ButtonStyle = discord.ButtonStyle.secondary
+    custom_id: str = ""
+    category_id: int | None = None
+    roles: tuple[str, ...] = ()
+    color: int = 0x3498DB
+    description: str = ""
+    priority: str = "🟡 Média"
+    rest_priority: int = PRIORITY_NORMAL  # queue class for this type's REST calls
+    inactivity_minutes: int | None = None  # auto-close after this long idle; None = global default, 0 = never
+    # Overwrite templates shared by every channel of this type
+    member_overwrite: discord.PermissionOverwrite = field(default_factory=lambda: MEMBER_OVERWRITE, compare=False)
+    staff_overwrite: discord.PermissionOverwrite = field(default_factory=lambda: MEMBER_OVERWRITE, compare=False)
+    everyone_overwrite: discord.PermissionOverwrite = field(default_factory=lambda: HIDDEN_OVERWRITE, compare=False)
+
+    @property
+    def prefix(self) -> str:
+        return f"{self.key}-"
+
+    @property
+    def button_label(self) -> str:
+        return f"{self.emoji} {self.label}"
+
+    def build_overwrites(
+        self,
+        guild: discord.Guild,
+        user: discord.abc.Snowflake,
+        staff_roles: list[discord.Role],
+        bot_member: discord.Member | None = None,
+    ) -> dict:
+        overwrites = {guild.default_role: self.everyone_overwrite, user: self.member_overwrite}
+        for role in staff_roles:
+            overwrites[role] = self.staff_overwrite
+        if bot_member:
+            overwrites[bot_member] = MEMBER_OVERWRITE
+        return overwrites
+
+
+class TicketTypeRegistry:
+    """Ticket types indexed by key, label, channel prefix and category id."""
+
+    def __init__(self, ticket_types: list[TicketType]):
+        if len(ticket_types) > MAX_TICKET_TYPES:
+            raise ValueError(f"At most {MAX_TICKET_TYPES} ticket types are supported (got {len(ticket_types)})")
+
+        self._types = list(ticket_types)
+        self._by_key: dict[str, TicketType] = {}
+        self._by_category: dict[int, TicketType] = {}
+        for ticket_type in self._types:
+            if "-" in ticket_type.key or ticket_type.key != ticket_type.key.lower():
+                raise ValueError(f"Ticket type key {ticket_type.key!r} must be lowercase and contain no '-'")
+            if ticket_type.key in self._by_key:
+                raise ValueError(f"Duplicate ticket type key {ticket_type.key!r}")
+            self._by_key[ticket_type.key] = ticket_type
+            if ticket_type.category_id:
+                self._by_category[ticket_type.category_id] = ticket_type
+
+        self._by_label = {ticket_type.label.lower(): ticket_type for ticket_type in self._types}
+
+    def __iter__(self) -> Iterator[TicketType]:
+        return iter(self._types)
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def keys(self) -> list[str]:
+        return list(self._by_key)
+
+    def get(self, name: str) -> TicketType | None:
+        name = name.lower()
+        return self._by_key.get(name) or self._by_label.get(name)
+
+    def from_channel_name(self, channel_name: str) -> TicketType | None:
+        prefix, sep, _ = channel_name.lower().partition("-")
+        return self._by_key.get(prefix) if sep else None
+
+    def for_category(self, category_id: int | None) -> TicketType | None:
+        return self._by_category.get(category_id) if category_id else None
+
+
+DEFAULT_TICKET_TYPES = [
+    {
+        "key": "suporte",
+        "label": "Suporte",
+        "emoji": "📋",
+        "style": "primary",
+        "custom_id": "persistent:ticket_support",
+        "roles": ["Support", "Moderator", "Admin"],
+        "color": 0x3498DB,
+        "description": "🔧 **Atendimento de Suporte**\nNossa equipe irá ajudar com dúvidas e problemas técnicos.",
+        "priority": "🟡 Média",
+    },
+    {
+        "key": "denúncia",
+        "label": "Denúncia",
+        "emoji": "🚨",
+        "style": "danger",
+        "custom_id": "persistent:ticket_report",
+        "roles": ["Moderator", "Admin"],
+        "color": 0xE74C3C,
+        "description": "🚨 **Central de Denúncias**\nRelate situações que violem regras e diretrizes.",
+        "priority": "🔴 Alta",
+        "rest_priority": "high",
+    },
+    {
+        "key": "roleplay",
+        "label": "Roleplay",
+        "emoji": "🎭",
+        "style": "secondary",
+        "custom_id": "persistent:ticket_roleplay",
+        "roles": ["Roleplay Team", "Admin"],
+        "color": 0x9B59B6,
+        "description": "🎭 **Equipe Roleplay**\nSolicitações, histórias, personagens e assuntos de RP.",
+        "priority": "🟣 Especial",
+        "rest_priority": "low",
+    },
+    {
+        "key": "financeiro",
+        "label": "Financeiro",
+        "emoji": "💰",
+        "style": "success",
+        "custom_id": "persistent:ticket_financial",
+        "roles": ["Admin"],
+        "color": 0x2ECC71,
+        "description": "💰 **Departamento Financeiro**\nAtendimento sobre pagamentos, reembolsos e doações.",
+        "priority": "🟢 Normal",
+    },
+]
+
+
+def env_name_for(key: str) -> str:
+    # "denúncia" -> "DENUNCIA", matching CATEGORY_DENUNCIA_ID / DENUNCIA_ROLES
+    return unicodedata.normalize("NFKD", key).encode("ascii", "ignore").decode().upper()
+
+
+def _parse_color(value) -> int:
+    if isinstance(value, str):
+        return int(value.removeprefix("#"), 16)
+    return int(value)
+
+
+def ticket_type_from_dict(
+    entry: dict,
+    env_int: Callable[[str], int | None],
+    env_list: Callable[[str], list[str]],
+) -> TicketType:
+    try:
+        key = str(entry["key"]).strip().lower()
+    except KeyError:
+        raise ValueError(f"Ticket type entry is missing 'key': {entry!r}")
+
+    env_name = env_name_for(key)
+    category_id = env_int(f"CATEGORY_{env_name}_ID") or entry.get("category_id")
+    roles = env_list(f"{env_name}_ROLES") or entry.get("roles", [])
+    inactivity = env_int(f"{env_name}_INACTIVITY_MINUTES")
+    if inactivity is None:
+        inactivity = entry.get("inactivity_minutes")
+
+    try:
+        style = discord.ButtonStyle[entry.get("style", "secondary")]
+    except KeyError:
+        raise ValueError(f"Ticket type {key!r} has an invalid button style {entry.get('style')!r}")
+
+    rest_priority = entry.get("rest_priority", "normal")
+    if rest_priority not in PRIORITY_NAMES:
+        raise ValueError(f"Ticket type {key!r} has an invalid rest_priority {rest_priority!r}")
+
+    return TicketType(
+        key=key,
+        label=entry.get("label", key.title()),
+        emoji=entry.get("emoji", "🎫"),
+        style=style,
+        custom_id=entry.get("custom_id") or f"persistent:ticket_{key}",
+        category_id=int(category_id) if category_id else None,
+        roles=tuple(roles),
+        color=_parse_color(entry.get("color", 0x3498DB)),
+        description=entry.get("description", ""),
+        priority=entry.get("priority", "🟡 Média"),
+        rest_priority=PRIORITY_NAMES[rest_priority],
+        inactivity_minutes=int(inactivity) if inactivity is not None else None,
+    )
+
+
+def load_ticket_types(
+    path: str | None,
+    env_int: Callable[[str], int | None],
+    env_list: Callable[[str], list[str]],
+    entries: list[dict] | None = None,
+) -> TicketTypeRegistry:
+    """Build the registry from ``entries``, a JSON list of types at ``path``, or the four built-in ones.
+
+    Per-type env vars (CATEGORY_<KEY>_ID, <KEY>_ROLES) override the file.
+    """
+    if entries is None:
+        entries = DEFAULT_TICKET_TYPES
+        if path:
+            with open(path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+    if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+        raise ValueError(f"{path or 'ticket_types'} must be a JSON list of ticket type objects")
+
+    return TicketTypeRegistry([ticket_type_from_dict(entry, env_int, env_list) for entry in entries])
@@ -0,0 +1,163 @@
+import asyncio
+import datetime
+import gzip
+import html
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import discord
+
+TRANSCRIPT_FORMATS = ("txt", "html", "jsonl")
+
+HTML_HEADER = """<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body{{font-family:sans-serif;background:#313338;color:#dbdee1;margin:2em}}
+.m{{margin:.4em 0}}.t{{color:#949ba4;font-size:.8em}}.a{{font-weight:bold;color:#f2f3f5}}
+.b{{background:#5865f2;color:#fff;border-radius:3px;font-size:.7em;padding:0 .3em}}
+.c{{white-space:pre-wrap}}a{{color:#00a8fc}}
+</style></head><body><h1>{title}</h1>
+"""
+HTML_FOOTER = "<p class=\"t\">{count} mensagens</p></body></html>\n"
+
+
+@dataclass
+class TranscriptResult:
+    path: str
+    message_count: int
+    size_bytes: int
+
+
+def message_to_dict(message: discord.Message) -> dict:
+    return {
+        "id": message.id,
+        "created_at": message.created_at.isoformat(),
+        "author": str(message.author),
+        "author_id": message.author.id,
+        "bot": message.author.bot,
+        "content": message.clean_content,
+        "attachments": [attachment.url for attachment in message.attachments],
+        "embeds": [
+            " - ".join(part for part in (embed.title, embed.description) if part)
+            for embed in message.embeds
+        ],
+    }
+
+
+def _approx_size(entry: dict) -> int:
+    # Rough in-memory footprint; only used to decide when to hand a batch off.
+    return 200 + len(entry["content"]) + sum(len(x) for x in entry["attachments"]) + sum(len(x) for x in entry["embeds"])
+
+
+class _TranscriptWriter:
+    """Renders message dicts and appends them to a gzip file. Runs off-loop."""
+
+    def __init__(self, path: str, fmt: str, title: str):
+        self.fmt = fmt
+        self.title = title
+        self.count = 0
+        self._file = gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+        if fmt == "html":
+            self._file.write(HTML_HEADER.format(title=html.escape(title)))
+        elif fmt == "txt":
+            self._file.write(f"{title}\n{'=' * len(title)}\n\n")
+
+    def write(self, entries: list[dict]):
+        render = getattr(self, f"_render_{self.fmt}")
+        self._file.write("".join(render(entry) for entry in entries))
+        self.count += len(entries)
+
+    def close(self):
+        if self.fmt == "html":
+            self._file.write(HTML_FOOTER.format(count=self.count))
+        self._file.close()
+
+    @staticmethod
+    def _render_jsonl(entry: dict) -> str:
+        return json.dumps(entry, ensure_ascii=False) + "\n"
+
+    @staticmethod
+    def _render_txt(entry: dict) -> str:
+        lines = [f"[{entry['created_at'][:19].replace('T', ' ')}] {entry['author']} ({entry['author_id']}): {entry['content']}"]
+        lines += [f"    [anexo] {url}" for url in entry["attachments"]]
+        lines += [f"    [embed] {text}" for text in entry["embeds"]]
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_html(entry: dict) -> str:
+        badge = ' <span class="b">BOT</span>' if entry["bot"] else ""
+        parts = [
+            f'<div class="m"><span class="a">{html.escape(entry["author"])}</span>{badge} '
+            f'<span class="t">{entry["created_at"][:19].replace("T", " ")}</span>'
+            f'<div class="c">{html.escape(entry["content"])}</div>'
+        ]
+        parts += [f'<div><a href="{html.escape(url)}">{html.escape(url)}</a></div>' for url in entry["attachments"]]
+        parts += [f'<div class="c t">{html.escape(text)}</div>' for text in entry["embeds"]]
+        parts.append("</div>\n")
+        return "".join(parts)
+
+
+class TranscriptExporter:
+    """Streams channel history into compressed transcript files.
+
+    At most ``max_concurrent`` exports run at once. Each export holds at most
+    two batches in memory (one being filled, one being written), each capped
+    at half of ``max_buffer_bytes``.
+    """
+
+    def __init__(self, directory: str, max_concurrent: int = 2, max_buffer_bytes: int = 8 * 1024 * 1024):
+        self.directory = directory
+        self.max_buffer_bytes = max_buffer_bytes
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="transcript")
+
+    @property
+    def busy(self) -> bool:
+        return self._semaphore.locked()
+
+    async def export(self, channel: discord.TextChannel, fmt: str = "html") -> TranscriptResult:
+        if fmt not in TRANSCRIPT_FORMATS:
+            raise ValueError(f"Unknown transcript format {fmt!r} (expected one of {TRANSCRIPT_FORMATS})")
+
+        async with self._semaphore:
+            return await self._export(channel, fmt)
+
+    async def _export(self, channel: discord.TextChannel, fmt: str) -> TranscriptResult:
+        loop = asyncio.get_running_loop()
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(self.directory, f"{channel.name}-{channel.id}-{stamp}.{fmt}.gz")
+        title = f"#{channel.name} ({channel.guild.name})"
+
+        writer = await loop.run_in_executor(self._executor, _TranscriptWriter, path, fmt, title)
+        batch_limit = self.max_buffer_bytes // 2
+        batch: list[dict] = []
+        batch_bytes = 0
+        pending: asyncio.Future | None = None
+
+        try:
+            async for message in channel.history(limit=None, oldest_first=True):
+                entry = message_to_dict(message)
+                batch.append(entry)
+                batch_bytes += _approx_size(entry)
+                if batch_bytes >= batch_limit:
+                    if pending is not None:
+                        await pending
+                    pending = loop.run_in_executor(self._executor, writer.write, batch)
+                    batch, batch_bytes = [], 0
+
+            if pending is not None:
+                await pending
+            if batch:
+                await loop.run_in_executor(self._executor, writer.write, batch)
+        finally:
+            if pending is not None and not pending.done():
+                await asyncio.wait([pending])
+            await loop.run_in_executor(self._executor, writer.close)
+
+        return TranscriptResult(path=path, message_count=writer.count, size_bytes=os.path.getsize(path))
+
+    def close(self):
+        self._executor.shutdown(wait=True)